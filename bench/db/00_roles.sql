@@ -0,0 +1,12 @@
+-- The roles Supabase provisions and the migrations grant to. service_role bypasses RLS
+-- like the hosted service key does.
+create role anon nologin;
+create role authenticated nologin;
+create role service_role nologin bypassrls;
+create role authenticator login password 'authenticator' noinherit;
+grant anon, authenticated, service_role to authenticator;
+
+grant usage on schema public to anon, authenticated, service_role;
+alter default privileges in schema public grant all on tables to service_role;
+alter default privileges in schema public grant all on sequences to service_role;
+alter default privileges in schema public grant execute on functions to service_role;
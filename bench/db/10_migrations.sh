@@ -0,0 +1,7 @@
+#!/bin/sh
+# Applies supabase/migrations in filename order, as `supabase db push` would.
+set -e
+for f in /migrations/*.sql; do
+  echo "applying $f"
+  psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" -f "$f"
+done
@@ -0,0 +1,33 @@
+-- Bench-only helpers; never part of supabase/migrations.
+create extension if not exists pg_stat_statements;
+
+create or replace function public.bench_reset()
+returns void
+language plpgsql
+security definer
+as $$
+begin
+  truncate public.run_span, public.run_log, public.news_item, public.news_item_hash,
+    public.news_item_archive, public.ai_digest_job,
+    public.translation_cache, public.news_count_cache, public.rss_feed_state,
+    public.sync_job, public.sync_job_source, public.news_daily_rollup, public.run_daily_rollup,
+    public.url_alias, public.source_watermark;
+  update public.job_state set last_success_at = null, lease_owner = null, lease_until = null, updated_at = now();
+  perform pg_stat_statements_reset();
+end;
+$$;
+
+-- Statement-level round trips and time as Postgres saw them, for the bench report.
+create or replace function public.bench_db_stats()
+returns table (calls bigint, total_ms numeric, rows bigint)
+language sql
+security definer
+as $$
+  select coalesce(sum(s.calls), 0)::bigint, round(coalesce(sum(s.total_exec_time), 0)::numeric, 1), coalesce(sum(s.rows), 0)::bigint
+  from pg_stat_statements s
+  join pg_database d on d.oid = s.dbid
+  where d.datname = current_database();
+$$;
+
+grant execute on function public.bench_reset() to service_role;
+grant execute on function public.bench_db_stats() to service_role;
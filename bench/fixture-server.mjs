@@ -0,0 +1,146 @@
+// Serves bench/fixtures in place of Google News RSS and the GDELT DOC API, multiplied by
+// the current scale. Every copy gets a distinct link and a publish time inside the
+// requested window, so 10x/100x produce that many distinct rows downstream.
+// Point the app at it with GOOGLE_NEWS_BASE_URL and GDELT_BASE_URL.
+//
+//   BENCH_FIXTURE_PORT      default 8788
+//   BENCH_SCALE             initial scale, default 1 (POST /__scale?n=10 changes it)
+//   BENCH_FIXTURE_LATENCY_MS  added per response, default 150
+// GET /__stats returns request counters, POST /__reset clears them.
+import http from "node:http";
+import crypto from "node:crypto";
+import fs from "node:fs";
+import path from "node:path";
+import { fileURLToPath } from "node:url";
+
+const dir = path.join(path.dirname(fileURLToPath(import.meta.url)), "fixtures");
+const port = Number(process.env.BENCH_FIXTURE_PORT ?? 8788);
+const latencyMs = Number(process.env.BENCH_FIXTURE_LATENCY_MS ?? 150);
+let scale = Math.max(1, Number(process.env.BENCH_SCALE ?? 1));
+
+const rssXml = fs.readFileSync(path.join(dir, "google-news-rss.xml"), "utf8");
+const rssHead = rssXml.slice(0, rssXml.indexOf("<item>"));
+const rssItems = rssXml.match(/<item>[\s\S]*?<\/item>/g) ?? [];
+const gdeltArticles = JSON.parse(fs.readFileSync(path.join(dir, "gdelt-doc.json"), "utf8")).articles ?? [];
+
+let stats = freshStats();
+
+function freshStats() {
+  return { rss: 0, gdelt: 0, redirects: 0, rssItems: 0, gdeltArticles: 0 };
+}
+
+function tag(query, k) {
+  return `${crypto.createHash("sha1").update(query).digest("hex").slice(0, 8)}${k}`;
+}
+
+function gdeltTime(v) {
+  const m = /^(\d{4})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})$/.exec(v ?? "");
+  return m ? Date.UTC(+m[1], +m[2] - 1, +m[3], +m[4], +m[5], +m[6]) : NaN;
+}
+
+function seenDate(ms) {
+  return new Date(ms).toISOString().replace(/[-:]/g, "").replace(/\.\d{3}/, "");
+}
+
+// Old-style Google News ids embed the publisher URL (see src/server/urlResolver.ts).
+function legacyArticleId(url) {
+  const bytes = Buffer.from(url, "utf8");
+  const len = [];
+  for (let n = bytes.length; ; n >>= 7) {
+    if (n < 0x80) {
+      len.push(n);
+      break;
+    }
+    len.push((n & 0x7f) | 0x80);
+  }
+  return Buffer.concat([Buffer.from([0x08, 0x13, 0x22, ...len]), bytes]).toString("base64url");
+}
+
+// Half the links decode offline, the other half go through the /rss/articles redirect below.
+function rewriteLink(item, n) {
+  if (n % 2) return item;
+  return item.replace(/(<link>https:\/\/news\.google\.com\/rss\/articles\/)([^<?]+)/, (_, prefix, id) => {
+    return `${prefix}${legacyArticleId(`https://publisher.example/articles/${id}`)}`;
+  });
+}
+
+function renderRss(query) {
+  const now = Date.now();
+  const total = rssItems.length * scale;
+  const parts = [];
+  for (let k = 0; k < scale; k++) {
+    rssItems.forEach((item, i) => {
+      const n = k * rssItems.length + i;
+      const published = new Date(now - Math.floor(((n + 0.5) / total) * 36 * 3600 * 1000)).toUTCString();
+      const t = tag(query, k);
+      parts.push(
+        rewriteLink(item.replace(/(<link>[^<?]+)/, `$1${t}`), n)
+          .replace(/(<guid[^>]*>[^<]+)/, `$1${t}`)
+          .replace(/<pubDate>[^<]*<\/pubDate>/, `<pubDate>${published}</pubDate>`)
+          .replace(/<title>([^<]*?) - /, k ? `<title>$1 (${k}) - ` : "<title>$1 - "),
+      );
+    });
+  }
+  stats.rssItems += parts.length;
+  return `${rssHead}${parts.join("\n")}\n</channel></rss>\n`;
+}
+
+function renderGdelt(params) {
+  const query = params.get("query") ?? "";
+  const max = Math.max(1, Number(params.get("maxrecords") ?? 75));
+  const end = gdeltTime(params.get("enddatetime")) || Date.now();
+  const start = gdeltTime(params.get("startdatetime")) || end - 24 * 3600 * 1000;
+  const total = gdeltArticles.length * scale;
+  const articles = [];
+  for (let n = 0; n < total && articles.length < max; n++) {
+    const a = gdeltArticles[n % gdeltArticles.length];
+    const k = Math.floor(n / gdeltArticles.length);
+    const at = start + Math.floor(((n + 0.5) / total) * (end - start));
+    articles.push({
+      ...a,
+      url: `${a.url}-${tag(`${query}|${start}`, k)}`,
+      title: k ? `${a.title} (${k})` : a.title,
+      seendate: seenDate(at),
+    });
+  }
+  stats.gdeltArticles += articles.length;
+  return JSON.stringify({ articles });
+}
+
+function send(res, status, body, type = "application/json") {
+  res.writeHead(status, { "content-type": type });
+  res.end(typeof body === "string" ? body : JSON.stringify(body));
+}
+
+const server = http.createServer(async (req, res) => {
+  const url = new URL(req.url ?? "/", "http://localhost");
+  if (url.pathname === "/__stats") return send(res, 200, { ...stats, scale });
+  if (url.pathname === "/__reset" && req.method === "POST") {
+    stats = freshStats();
+    return send(res, 200, { ok: true });
+  }
+  if (url.pathname === "/__scale" && req.method === "POST") {
+    scale = Math.max(1, Number(url.searchParams.get("n") ?? 1));
+    return send(res, 200, { ok: true, scale });
+  }
+
+  await new Promise((r) => setTimeout(r, latencyMs * (0.5 + Math.random())));
+  if (url.pathname === "/rss/search") {
+    stats.rss += 1;
+    return send(res, 200, renderRss(`${url.searchParams.get("q")}|${url.searchParams.get("hl")}`), "application/xml");
+  }
+  if (url.pathname.startsWith("/rss/articles/")) {
+    stats.redirects += 1;
+    res.writeHead(302, { location: `https://publisher.example/articles/${url.pathname.slice("/rss/articles/".length)}` });
+    return res.end();
+  }
+  if (url.pathname === "/api/v2/doc/doc") {
+    stats.gdelt += 1;
+    return send(res, 200, renderGdelt(url.searchParams));
+  }
+  send(res, 404, { error: "not found" });
+});
+
+server.listen(port, () => {
+  console.log(`fixture server on http://127.0.0.1:${port} (scale ${scale}x)`);
+});
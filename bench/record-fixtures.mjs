@@ -0,0 +1,22 @@
+// Refreshes bench/fixtures from the live services (one Google News feed, one GDELT ArtList
+// query). The fixture server scales whatever is recorded here.
+//   node bench/record-fixtures.mjs
+import fs from "node:fs/promises";
+import path from "node:path";
+import { fileURLToPath } from "node:url";
+
+const dir = path.join(path.dirname(fileURLToPath(import.meta.url)), "fixtures");
+const rssUrl = "https://news.google.com/rss/search?q=%E5%AE%81%E5%BE%B7%E6%97%B6%E4%BB%A3&hl=zh-CN&gl=CN&ceid=CN:zh-Hans";
+const gdeltUrl =
+  "https://api.gdeltproject.org/api/v2/doc/doc?query=(CATL%20OR%20Xiaomi)&mode=ArtList&format=json&sort=HybridRel&maxrecords=50&timespan=1d";
+
+async function record(url, file) {
+  const res = await fetch(url, { headers: { "user-agent": "daily-news-bot" } });
+  if (!res.ok) throw new Error(`${url} HTTP ${res.status}`);
+  const body = await res.text();
+  await fs.writeFile(path.join(dir, file), body);
+  console.log(`${file}: ${body.length} bytes`);
+}
+
+await record(rssUrl, "google-news-rss.xml");
+await record(gdeltUrl, "gdelt-doc.json");
@@ -0,0 +1,65 @@
+// Maps Supabase's /rest/v1 prefix onto the bench PostgREST and counts every request,
+// so each supabase-js call made by the app shows up as one round trip.
+// GET /__stats returns counters by method and table/RPC, POST /__reset clears them.
+//
+//   BENCH_PROXY_PORT  default 54321 (use SUPABASE_URL=http://127.0.0.1:54321)
+//   POSTGREST_URL     default http://127.0.0.1:54330
+import http from "node:http";
+
+const port = Number(process.env.BENCH_PROXY_PORT ?? 54321);
+const upstream = new URL(process.env.POSTGREST_URL ?? "http://127.0.0.1:54330");
+
+let stats = freshStats();
+
+function freshStats() {
+  return { requests: 0, errors: 0, totalMs: 0, byTarget: {} };
+}
+
+function send(res, status, body) {
+  res.writeHead(status, { "content-type": "application/json" });
+  res.end(JSON.stringify(body));
+}
+
+const agent = new http.Agent({ keepAlive: true, maxSockets: 64 });
+
+const server = http.createServer((req, res) => {
+  if (req.url === "/__stats") return send(res, 200, stats);
+  if (req.url === "/__reset" && req.method === "POST") {
+    stats = freshStats();
+    return send(res, 200, { ok: true });
+  }
+  if (!req.url?.startsWith("/rest/v1/")) return send(res, 404, { error: "not found" });
+
+  const path = req.url.slice("/rest/v1".length);
+  const target = `${req.method} ${path.split("?")[0]}`;
+  const started = performance.now();
+  const proxied = http.request(
+    {
+      host: upstream.hostname,
+      port: upstream.port,
+      method: req.method,
+      path,
+      headers: { ...req.headers, host: upstream.host },
+      agent,
+    },
+    (up) => {
+      res.writeHead(up.statusCode ?? 502, up.headers);
+      up.pipe(res);
+      up.on("end", () => {
+        const ms = performance.now() - started;
+        stats.requests += 1;
+        stats.totalMs += ms;
+        if ((up.statusCode ?? 500) >= 400) stats.errors += 1;
+        const t = (stats.byTarget[target] ??= { requests: 0, totalMs: 0 });
+        t.requests += 1;
+        t.totalMs += ms;
+      });
+    },
+  );
+  proxied.on("error", (e) => send(res, 502, { error: e.message }));
+  req.pipe(proxied);
+});
+
+server.listen(port, () => {
+  console.log(`bench REST proxy on http://127.0.0.1:${port} -> ${upstream.origin}`);
+});
@@ -0,0 +1,241 @@
+// Offline throughput benchmark: daily cron, manual sync job, AI digest jobs and /news
+// queries at 1x/10x/100x fixture volume against the local stack in bench/docker-compose.yml.
+// Start the stack, bench/rest-proxy.mjs, bench/fixture-server.mjs,
+// scripts/mock-llm-server.mjs and the app (see README "离线基准测试"), then:
+//   node bench/run.mjs
+//
+//   APP_URL      default http://localhost:3000
+//   PROXY_URL    default http://127.0.0.1:54321 (the app's SUPABASE_URL)
+//   FIXTURE_URL  default http://127.0.0.1:8788
+//   MOCK_URL     default http://127.0.0.1:8787
+//   SCALES       default 1,10,100
+//   DIGEST_JOBS  digest jobs per scale, default 8
+//   NEWS_PAGES   /news requests per scale, default 20
+//   CRON_SECRET  sent as bearer token when set
+//   BENCH_OUT    result directory, default bench/results
+import fs from "node:fs/promises";
+import path from "node:path";
+import { execSync } from "node:child_process";
+import { fileURLToPath } from "node:url";
+import { serviceKey } from "./service-key.mjs";
+
+const here = path.dirname(fileURLToPath(import.meta.url));
+const appUrl = (process.env.APP_URL ?? "http://localhost:3000").replace(/\/+$/, "");
+const proxyUrl = (process.env.PROXY_URL ?? "http://127.0.0.1:54321").replace(/\/+$/, "");
+const fixtureUrl = (process.env.FIXTURE_URL ?? "http://127.0.0.1:8788").replace(/\/+$/, "");
+const mockUrl = (process.env.MOCK_URL ?? "http://127.0.0.1:8787").replace(/\/+$/, "");
+const scales = (process.env.SCALES ?? "1,10,100").split(",").map(Number).filter((n) => n > 0);
+const digestJobs = Number(process.env.DIGEST_JOBS ?? 8);
+const newsPages = Number(process.env.NEWS_PAGES ?? 20);
+const outDir = process.env.BENCH_OUT ?? path.join(here, "results");
+const auth = process.env.CRON_SECRET ? { authorization: `Bearer ${process.env.CRON_SECRET}` } : {};
+const key = serviceKey();
+const restHeaders = { apikey: key, authorization: `Bearer ${key}`, "content-type": "application/json" };
+
+async function json(url, init) {
+  const res = await fetch(url, init);
+  if (!res.ok) throw new Error(`${url} HTTP ${res.status}: ${(await res.text()).slice(0, 200)}`);
+  return res.json();
+}
+
+const rest = (pathAndQuery, init = {}) =>
+  json(`${proxyUrl}/rest/v1/${pathAndQuery}`, { ...init, headers: { ...restHeaders, ...init.headers } });
+const sleep = (ms) => new Promise((r) => setTimeout(r, ms));
+
+function percentile(sorted, p) {
+  if (!sorted.length) return null;
+  return sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))];
+}
+
+function summarizeSpans(spans) {
+  const byName = new Map();
+  for (const s of spans) {
+    const list = byName.get(s.name) ?? [];
+    list.push(s);
+    byName.set(s.name, list);
+  }
+  return Object.fromEntries(
+    Array.from(byName, ([name, list]) => {
+      const ms = list.map((s) => s.duration_ms).sort((a, b) => a - b);
+      return [
+        name,
+        {
+          calls: list.length,
+          errors: list.filter((s) => s.status === "error").length,
+          totalMs: ms.reduce((a, b) => a + b, 0),
+          p50Ms: percentile(ms, 0.5),
+          p95Ms: percentile(ms, 0.95),
+          tokens: list.reduce((a, s) => a + (typeof s.attrs?.tokens === "number" ? s.attrs.tokens : 0), 0),
+        },
+      ];
+    }),
+  );
+}
+
+// Samples the app's RSS through /api/metrics while fn runs and reports the peak.
+async function measure(fn) {
+  let peakRss = 0;
+  let sampling = true;
+  const sampler = (async () => {
+    while (sampling) {
+      const m = await json(`${appUrl}/api/metrics?format=json`, { headers: auth }).catch(() => null);
+      if (m?.process?.rssBytes) peakRss = Math.max(peakRss, m.process.rssBytes);
+      await sleep(200);
+    }
+  })();
+
+  // Snapshot the database before the proxy so the proxy delta includes exactly one
+  // bench_db_stats call (the closing one) and the statement delta exactly one (the opening one).
+  const db0 = await rest("rpc/bench_db_stats", { method: "POST", body: "{}" });
+  const proxy0 = await json(`${proxyUrl}/__stats`);
+  const llm0 = await json(`${mockUrl}/stats`).catch(() => null);
+  const started = performance.now();
+  let result;
+  let error = null;
+  try {
+    result = await fn();
+  } catch (e) {
+    error = e instanceof Error ? e.message : String(e);
+  }
+  const wallMs = Math.round(performance.now() - started);
+  sampling = false;
+  await sampler;
+  const db1 = await rest("rpc/bench_db_stats", { method: "POST", body: "{}" });
+  const proxy1 = await json(`${proxyUrl}/__stats`);
+  const llm1 = await json(`${mockUrl}/stats`).catch(() => null);
+
+  return {
+    wallMs,
+    error,
+    restRoundTrips: proxy1.requests - proxy0.requests - 1,
+    dbStatements: Number(db1[0]?.calls ?? 0) - Number(db0[0]?.calls ?? 0) - 1,
+    dbTimeMs: Math.round(Number(db1[0]?.total_ms ?? 0) - Number(db0[0]?.total_ms ?? 0)),
+    llmRequests: llm1 && llm0 ? llm1.requests - llm0.requests : null,
+    llmTokens: llm1 && llm0 ? llm1.tokens - llm0.tokens : null,
+    peakRssMb: peakRss ? Math.round(peakRss / 1024 / 1024) : null,
+    ...result,
+  };
+}
+
+async function reset(scale) {
+  await rest("rpc/bench_reset", { method: "POST", body: "{}" });
+  await json(`${fixtureUrl}/__scale?n=${scale}`, { method: "POST" });
+  await fetch(`${mockUrl}/reset`, { method: "POST" }).catch(() => null);
+}
+
+async function latestRunSpans() {
+  const [run] = await rest("run_log?select=id,stage_timings,fetched_count,output_count&order=started_at.desc&limit=1");
+  if (!run) return { run: null, spans: {} };
+  const spans = await rest(`run_span?select=name,duration_ms,status,attrs&run_id=eq.${run.id}&limit=5000`);
+  return { run, spans: summarizeSpans(spans) };
+}
+
+function rate(items, wallMs) {
+  return wallMs ? Number(((items * 1000) / wallMs).toFixed(2)) : null;
+}
+
+async function benchDaily() {
+  const out = await json(`${appUrl}/api/cron/daily`, { headers: auth });
+  const { run, spans } = await latestRunSpans();
+  return { status: out.status, fetched: out.fetchedCount, written: out.outputCount, stages: run?.stage_timings ?? null, spans };
+}
+
+async function benchSyncJob() {
+  const created = await json(`${appUrl}/api/sync/jobs`, {
+    method: "POST",
+    headers: { "content-type": "application/json", ...auth },
+    body: JSON.stringify({ lookbackHours: 48, incremental: false }),
+  });
+  const id = created.job.id;
+  let job = null;
+  for (;;) {
+    await sleep(500);
+    job = (await json(`${appUrl}/api/sync/jobs/${id}`)).job;
+    if (job?.status === "SUCCESS" || job?.status === "FAILED") break;
+  }
+  const { spans } = await latestRunSpans();
+  return { status: job.status, fetched: job.fetched_count, written: job.inserted_count, translated: job.translated_count, spans };
+}
+
+async function benchDigest() {
+  const topics = ["CATL", "XIAOMI"];
+  const days = ["1", "7", "30", "ALL"];
+  const modes = ["llm", "hybrid", "local"];
+  for (let i = 0; i < digestJobs; i++) {
+    await json(`${appUrl}/api/ai/digest/jobs`, {
+      method: "POST",
+      headers: { "content-type": "application/json" },
+      body: JSON.stringify({ topic: topics[i % 2], days: days[Math.floor(i / 2) % 4], q: "", rankMode: modes[i % 3] }),
+    });
+  }
+  let processed = 0;
+  for (;;) {
+    const out = await json(`${appUrl}/api/ai/digest/worker?limit=8`, { headers: auth });
+    const ids = Array.isArray(out.processedIds) ? out.processedIds : [];
+    if (!ids.length) break;
+    processed += ids.length;
+  }
+  const spans = await rest("run_span?select=name,duration_ms,status,attrs&trace_kind=eq.ai_digest&limit=5000");
+  return { jobs: digestJobs, processed, spans: summarizeSpans(spans) };
+}
+
+async function benchNews() {
+  const queries = ["", "电池", "SU7", "recall"];
+  const latencies = [];
+  for (let i = 0; i < newsPages; i++) {
+    const topic = i % 2 ? "XIAOMI" : "CATL";
+    const q = encodeURIComponent(queries[i % queries.length]);
+    const t0 = performance.now();
+    const res = await fetch(`${appUrl}/news?topic=${topic}&days=ALL&q=${q}&pageSize=50&page=${1 + (i % 3)}`);
+    await res.text();
+    latencies.push(performance.now() - t0);
+  }
+  latencies.sort((a, b) => a - b);
+  return {
+    requests: latencies.length,
+    p50Ms: Math.round(percentile(latencies, 0.5)),
+    p95Ms: Math.round(percentile(latencies, 0.95)),
+  };
+}
+
+function gitSha() {
+  try {
+    return execSync("git rev-parse --short HEAD", { cwd: here }).toString().trim();
+  } catch {
+    return null;
+  }
+}
+
+const report = { startedAt: new Date().toISOString(), git: gitSha(), node: process.version, scales: {} };
+
+for (const scale of scales) {
+  console.error(`scale ${scale}x`);
+  const r = {};
+
+  await reset(scale);
+  r.dailyCron = await measure(benchDaily);
+  r.dailyCron.itemsPerSec = rate(r.dailyCron.fetched ?? 0, r.dailyCron.wallMs);
+
+  await reset(scale);
+  r.syncJob = await measure(benchSyncJob);
+  r.syncJob.itemsPerSec = rate(r.syncJob.fetched ?? 0, r.syncJob.wallMs);
+
+  r.digestJobs = await measure(benchDigest);
+  r.digestJobs.jobsPerSec = rate(r.digestJobs.processed ?? 0, r.digestJobs.wallMs);
+
+  r.newsQueries = await measure(benchNews);
+  r.newsQueries.requestsPerSec = rate(r.newsQueries.requests ?? 0, r.newsQueries.wallMs);
+
+  const countRes = await fetch(`${proxyUrl}/rest/v1/news_item?select=id&limit=1`, {
+    headers: { ...restHeaders, prefer: "count=exact" },
+  });
+  r.newsItemRows = Number(countRes.headers.get("content-range")?.split("/")[1] ?? 0);
+  report.scales[`${scale}x`] = r;
+}
+
+report.endedAt = new Date().toISOString();
+await fs.mkdir(outDir, { recursive: true });
+const file = path.join(outDir, `${report.startedAt.replace(/[:.]/g, "-")}${report.git ? `-${report.git}` : ""}.json`);
+await fs.writeFile(file, `${JSON.stringify(report, null, 2)}\n`);
+console.log(JSON.stringify(report, null, 2));
+console.error(`wrote ${path.relative(process.cwd(), file)}`);
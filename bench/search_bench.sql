@@ -0,0 +1,58 @@
+-- Seeds synthetic news_item rows into a local Postgres (with supabase/migrations applied)
+-- and compares the substring ILIKE filter (served by the trigram indexes of migration 023)
+-- with whole-token search_tokens containment at 100k / 500k / 1M rows.
+--   psql "$DATABASE_URL" -f bench/search_bench.sql
+\timing on
+\set ON_ERROR_STOP on
+
+create temp table bench_words (w text);
+insert into bench_words (w) values
+  ('CATL'), ('battery'), ('sodium-ion'), ('energy storage'), ('Xiaomi'), ('SU7'), ('smartphone'),
+  ('宁德时代'), ('动力电池'), ('储能'), ('小米汽车'), ('交付'), ('财报'), ('召回'), ('订单');
+
+create or replace function pg_temp.seed_news(n int) returns void language sql as $$
+  insert into public.news_item (topic, title, url, source, published_at, content_hash, language, summary)
+  select
+    case when g % 2 = 0 then 'CATL' else 'XIAOMI' end,
+    (select string_agg(w, ' ') from (select w from bench_words where g > 0 order by random() limit 4) s) || ' #' || g,
+    'https://bench.example/' || md5(g::text || clock_timestamp()::text),
+    'bench-' || (g % 50),
+    now() - (g % 525600) * interval '1 minute',
+    md5('bench|' || g::text || clock_timestamp()::text),
+    case when g % 3 = 0 then 'zh' else 'en' end,
+    (select string_agg(w, ' ') from (select w from bench_words where g > 0 order by random() limit 8) s)
+  from generate_series(1, n) as g;
+$$;
+
+\echo '== seeding 100k =='
+select pg_temp.seed_news(100000);
+analyze public.news_item;
+\echo '-- ILIKE'
+explain (analyze, buffers) select id from public.news_item
+where topic = 'CATL' and (title ilike '%储能%' or title_zh ilike '%储能%' or summary ilike '%储能%' or summary_zh ilike '%储能%' or source ilike '%储能%')
+order by published_at desc limit 50;
+\echo '-- search_tokens'
+explain (analyze, buffers) select id from public.news_item
+where topic = 'CATL' and search_tokens @> array['储能'] order by published_at desc limit 50;
+
+\echo '== seeding to 500k =='
+select pg_temp.seed_news(400000);
+analyze public.news_item;
+explain (analyze, buffers) select id from public.news_item
+where topic = 'CATL' and (title ilike '%储能%' or title_zh ilike '%储能%' or summary ilike '%储能%' or summary_zh ilike '%储能%' or source ilike '%储能%')
+order by published_at desc limit 50;
+explain (analyze, buffers) select id from public.news_item
+where topic = 'CATL' and search_tokens @> array['储能'] order by published_at desc limit 50;
+
+\echo '== seeding to 1M =='
+select pg_temp.seed_news(500000);
+analyze public.news_item;
+explain (analyze, buffers) select id from public.news_item
+where topic = 'CATL' and (title ilike '%储能%' or title_zh ilike '%储能%' or summary ilike '%储能%' or summary_zh ilike '%储能%' or source ilike '%储能%')
+order by published_at desc limit 50;
+explain (analyze, buffers) select id from public.news_item
+where topic = 'CATL' and search_tokens @> array['储能'] order by published_at desc limit 50;
+select * from public.search_news_item('CATL', '储能', array['储能'], null, true, 50, 0) limit 5;
+
+\echo '== cleanup =='
+delete from public.news_item where url like 'https://bench.example/%';
@@ -0,0 +1,22 @@
+// Prints a service_role JWT for the local PostgREST in bench/docker-compose.yml, for use as
+// SUPABASE_SERVICE_ROLE_KEY when running the app against the bench database.
+//   SUPABASE_SERVICE_ROLE_KEY=$(node bench/service-key.mjs)
+import crypto from "node:crypto";
+import { fileURLToPath } from "node:url";
+
+const DEFAULT_SECRET = "bench-jwt-secret-at-least-32-characters";
+
+function b64url(input) {
+  return Buffer.from(input).toString("base64url");
+}
+
+export function serviceKey(secret = process.env.BENCH_JWT_SECRET ?? DEFAULT_SECRET) {
+  const header = b64url(JSON.stringify({ alg: "HS256", typ: "JWT" }));
+  const payload = b64url(JSON.stringify({ role: "service_role", iss: "bench", iat: Math.floor(Date.now() / 1000) }));
+  const sig = crypto.createHmac("sha256", secret).update(`${header}.${payload}`).digest("base64url");
+  return `${header}.${payload}.${sig}`;
+}
+
+if (process.argv[1] === fileURLToPath(import.meta.url)) {
+  console.log(serviceKey());
+}
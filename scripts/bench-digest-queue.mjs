@@ -0,0 +1,69 @@
+// Enqueues digest jobs against a running app and drains them through the batch worker,
+// reporting throughput. Run the app with OPENAI_BASE_URL/ZHIPU_BASE_URL pointing at
+// scripts/mock-llm-server.mjs to benchmark offline.
+//
+//   APP_URL     default http://localhost:3000
+//   MOCK_URL    default http://127.0.0.1:8787
+//   JOBS        number of jobs to enqueue, default 24
+//   BATCH       worker batch size (?limit=), default 8
+//   TOPICS      comma-separated topic keys, default CATL,XIAOMI
+//   CRON_SECRET sent as bearer token when set
+const appUrl = (process.env.APP_URL ?? "http://localhost:3000").replace(/\/+$/, "");
+const mockUrl = (process.env.MOCK_URL ?? "http://127.0.0.1:8787").replace(/\/+$/, "");
+const jobs = Number(process.env.JOBS ?? 24);
+const batch = Number(process.env.BATCH ?? 8);
+const topics = (process.env.TOPICS ?? "CATL,XIAOMI").split(",").filter(Boolean);
+const days = ["1", "7", "30", "ALL"];
+const auth = process.env.CRON_SECRET ? { authorization: `Bearer ${process.env.CRON_SECRET}` } : {};
+
+async function json(url, init) {
+  const res = await fetch(url, init);
+  if (!res.ok) throw new Error(`${url} HTTP ${res.status}`);
+  return res.json();
+}
+
+await fetch(`${mockUrl}/reset`, { method: "POST" }).catch(() => null);
+
+let cached = 0;
+let queued = 0;
+for (let i = 0; i < jobs; i += 1) {
+  const body = { topic: topics[i % topics.length], days: days[Math.floor(i / topics.length) % days.length], q: "" };
+  const out = await json(`${appUrl}/api/ai/digest/jobs`, {
+    method: "POST",
+    headers: { "content-type": "application/json" },
+    body: JSON.stringify(body),
+  });
+  if (out.job?.status === "SUCCESS") cached += 1;
+  else queued += 1;
+}
+
+const started = Date.now();
+let processed = 0;
+let rounds = 0;
+for (;;) {
+  const out = await json(`${appUrl}/api/ai/digest/worker?limit=${batch}`, { headers: auth });
+  const ids = Array.isArray(out.processedIds) ? out.processedIds : [];
+  if (!ids.length) break;
+  processed += ids.length;
+  rounds += 1;
+}
+const elapsedMs = Date.now() - started;
+const mock = await json(`${mockUrl}/stats`).catch(() => null);
+
+console.log(
+  JSON.stringify(
+    {
+      jobs,
+      batch,
+      cachedAtCreate: cached,
+      queued,
+      processed,
+      rounds,
+      elapsedMs,
+      jobsPerSec: elapsedMs ? Number(((processed * 1000) / elapsedMs).toFixed(2)) : null,
+      llm: mock,
+    },
+    null,
+    2,
+  ),
+);
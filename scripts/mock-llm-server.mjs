@@ -0,0 +1,104 @@
+// OpenAI/Zhipu-compatible stand-in for offline benchmarks.
+// Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8787/v1 (or ZHIPU_BASE_URL)
+// and a dummy API key. GET /stats returns counters, POST /reset clears them.
+//
+//   MOCK_LLM_PORT             default 8787
+//   MOCK_LLM_LATENCY_MS       mean response latency, default 800
+//   MOCK_LLM_429_RATE         fraction of requests answered with 429, default 0
+//   MOCK_LLM_MAX_CONCURRENCY  requests above this many in flight get 429, default unlimited
+import http from "node:http";
+
+const port = Number(process.env.MOCK_LLM_PORT ?? 8787);
+const latencyMs = Number(process.env.MOCK_LLM_LATENCY_MS ?? 800);
+const rate429 = Number(process.env.MOCK_LLM_429_RATE ?? 0);
+const maxConcurrency = Number(process.env.MOCK_LLM_MAX_CONCURRENCY ?? Infinity);
+
+let stats = freshStats();
+let inflight = 0;
+
+function freshStats() {
+  return { requests: 0, throttled: 0, peakInflight: 0, tokens: 0, byKind: { translate: 0, pick: 0, digest: 0 } };
+}
+
+function classify(system) {
+  if (system.includes("翻译引擎")) return "translate";
+  if (system.includes("新闻编辑")) return "pick";
+  return "digest";
+}
+
+function parseUser(messages) {
+  const user = messages.find((m) => m.role === "user")?.content ?? "{}";
+  try {
+    return JSON.parse(user);
+  } catch {
+    return {};
+  }
+}
+
+function respond(kind, payload) {
+  const items = Array.isArray(payload.items) ? payload.items : Array.isArray(payload.added) ? payload.added : [];
+  if (kind === "translate") {
+    return JSON.stringify(
+      items.map((it) => ({ i: it.i, title_zh: `【译】${it.title}`, summary_zh: it.summary ? `【译】${it.summary}` : null })),
+    );
+  }
+  if (kind === "pick") {
+    return JSON.stringify(items.slice(0, 30).map((it) => it.i));
+  }
+  const entry = (it) => ({ title: it.title, topic: it.topic ?? "BOTH", reason: "模拟解读", urls: it.url ? [it.url] : [] });
+  return JSON.stringify({
+    overall: `模拟综述：共 ${items.length} 条新闻`,
+    majorChanges: items.slice(0, 3).map(entry),
+    bullish: items.slice(3, 5).map(entry),
+    bearish: items.slice(5, 7).map(entry),
+    watch: items.slice(7, 9).map(entry),
+  });
+}
+
+function send(res, status, body, headers = {}) {
+  res.writeHead(status, { "content-type": "application/json", ...headers });
+  res.end(JSON.stringify(body));
+}
+
+const server = http.createServer((req, res) => {
+  if (req.method === "GET" && req.url === "/stats") return send(res, 200, { ...stats, inflight });
+  if (req.method === "POST" && req.url === "/reset") {
+    stats = freshStats();
+    return send(res, 200, { ok: true });
+  }
+  if (req.method !== "POST" || !req.url?.endsWith("/chat/completions")) return send(res, 404, { error: "not found" });
+
+  let raw = "";
+  req.on("data", (chunk) => (raw += chunk));
+  req.on("end", async () => {
+    stats.requests += 1;
+    if (inflight >= maxConcurrency || Math.random() < rate429) {
+      stats.throttled += 1;
+      return send(res, 429, { error: { message: "Too Many Requests" } }, { "retry-after": "1" });
+    }
+    inflight += 1;
+    stats.peakInflight = Math.max(stats.peakInflight, inflight);
+    try {
+      const body = JSON.parse(raw || "{}");
+      const messages = Array.isArray(body.messages) ? body.messages : [];
+      const kind = classify(messages.find((m) => m.role === "system")?.content ?? "");
+      stats.byKind[kind] += 1;
+      await new Promise((r) => setTimeout(r, latencyMs * (0.5 + Math.random())));
+      const content = respond(kind, parseUser(messages));
+      const totalTokens = Math.ceil((raw.length + content.length) / 4);
+      stats.tokens += totalTokens;
+      send(res, 200, {
+        choices: [{ message: { role: "assistant", content } }],
+        usage: { total_tokens: totalTokens },
+      });
+    } catch (e) {
+      send(res, 400, { error: { message: e instanceof Error ? e.message : String(e) } });
+    } finally {
+      inflight -= 1;
+    }
+  });
+});
+
+server.listen(port, () => {
+  console.log(`mock LLM listening on http://127.0.0.1:${port}`);
+});
@@ -1,5 +1,7 @@
-import { createJob, findRecentSuccess } from "../../../../../server/aiDigestJob";
+import { createJob, findCachedDigest } from "../../../../../server/aiDigestJob";
+import { loadTopics } from "../../../../../server/topicRegistry";
 import { safeTopic } from "../../../../../config/topics";
+import { RANK_MODES, type RankMode } from "../../../../../server/ranker";
 
 export const dynamic = "force-dynamic";
 export const runtime = "nodejs";
@@ -9,6 +11,8 @@ type CreateJobBody = {
   topic?: string;
   days?: string;
   q?: string;
+  rankMode?: string;
+  archive?: boolean;
 };
 
 function safeDays(v: unknown): "1" | "7" | "30" | "ALL" {
@@ -17,22 +21,28 @@ function safeDays(v: unknown): "1" | "7" | "30" | "ALL" {
   return "ALL";
 }
 
+function safeRankModeParam(v: unknown): RankMode | undefined {
+  return typeof v === "string" && (RANK_MODES as string[]).includes(v) ? (v as RankMode) : undefined;
+}
+
 function safeString(v: unknown): string {
   return typeof v === "string" ? v : "";
 }
 
 export async function POST(req: Request) {
   const body = (await req.json().catch(() => ({}))) as CreateJobBody;
-  const topic = safeTopic(body.topic);
+  const topic = safeTopic(body.topic, await loadTopics());
   const days = safeDays(body.days);
   const q = safeString(body.q);
+  const rankMode = safeRankModeParam(body.rankMode);
+  const archive = body.archive === true;
 
-  const recent = await findRecentSuccess({ topic, days, q });
-  if (recent?.digest) {
-    return Response.json({ ok: true, job: recent });
+  const cached = await findCachedDigest({ topic, days, q, rankMode, archive });
+  if (cached?.digest) {
+    return Response.json({ ok: true, job: cached });
   }
 
-  const created = await createJob({ topic, days, q });
+  const created = await createJob({ topic, days, q, rankMode, archive });
 
   return Response.json({
     ok: true,
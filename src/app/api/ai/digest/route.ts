@@ -1,7 +1,9 @@
 import { getOptionalEnv } from "../../../../lib/env";
-import { createSupabaseAdmin } from "../../../../lib/supabaseAdmin";
 import type { NewsItemRow } from "../../../../lib/types";
 import { buildAiDigest } from "../../../../server/aiDigest";
+import { safeDays, sanitizeQuery } from "../../../../server/newsQuery";
+import { readNewsPage, readNewsRanked } from "../../../../server/readCache";
+import { loadTopics } from "../../../../server/topicRegistry";
 import { safeTopic } from "../../../../config/topics";
 
 export const dynamic = "force-dynamic";
@@ -13,10 +15,6 @@ function safeInt(v: string, fallback: number, min: number, max: number): number
   return Math.max(min, Math.min(max, n));
 }
 
-function sanitizeQuery(q: string): string {
-  return q.replaceAll("%", " ").replaceAll("_", " ").trim().slice(0, 80);
-}
-
 export async function GET(req: Request) {
   const envReady = Boolean(getOptionalEnv("SUPABASE_URL") && getOptionalEnv("SUPABASE_SERVICE_ROLE_KEY"));
   if (!envReady) {
@@ -25,41 +23,42 @@ export async function GET(req: Request) {
 
   const url = new URL(req.url);
   const topicRaw = url.searchParams.get("topic") ?? "";
-  const topic = safeTopic(topicRaw);
-  const daysRaw = (url.searchParams.get("days") ?? "ALL").toUpperCase();
-  const days = (daysRaw === "1" || daysRaw === "7" || daysRaw === "30" ? daysRaw : "ALL") as "1" | "7" | "30" | "ALL";
+  const topic = safeTopic(topicRaw, await loadTopics());
+  const days = safeDays(url.searchParams.get("days") ?? "ALL");
   const q = sanitizeQuery(url.searchParams.get("q") ?? "");
   const pageSize = safeInt(url.searchParams.get("pageSize") ?? "50", 50, 10, 200);
   const page = safeInt(url.searchParams.get("page") ?? "1", 1, 1, 1000000);
 
-  const supabase = createSupabaseAdmin();
-  let query = supabase.from("news_item").select("*").order("published_at", { ascending: false });
-
-  query = query.eq("topic", topic);
+  const filters = {
+    topic,
+    days,
+    q,
+    collapse: url.searchParams.get("collapse") !== "0",
+    archive: url.searchParams.get("archive") === "1",
+  };
 
-  if (days !== "ALL") {
-    const n = Number.parseInt(days, 10);
-    const since = new Date(Date.now() - n * 24 * 60 * 60 * 1000).toISOString();
-    query = query.gte("published_at", since);
+  let items: NewsItemRow[] | null = null;
+  let nextCursor: string | null = null;
+  if (url.searchParams.get("sort") === "relevance") {
+    items = await readNewsRanked(filters, { limit: pageSize, offset: (page - 1) * pageSize });
   }
-
-  if (q) {
-    const like = `%${q}%`;
-    query = query.or(
-      [
-        `title.ilike.${like}`,
-        `title_zh.ilike.${like}`,
-        `summary.ilike.${like}`,
-        `summary_zh.ilike.${like}`,
-        `source.ilike.${like}`,
-      ].join(","),
-    );
+  if (!items) {
+    // time order pages by cursor (nextCursor in the response); page numbers only apply to
+    // sort=relevance with a query, so a bare page=N would silently return page 1
+    if (page > 1) {
+      return Response.json(
+        { ok: false, message: "按时间排序请用 cursor 翻页；page 仅适用于带关键词的 sort=relevance" },
+        { status: 400 },
+      );
+    }
+    const result = await readNewsPage(filters, {
+      pageSize,
+      cursor: url.searchParams.get("cursor"),
+      direction: url.searchParams.get("dir") === "prev" ? "prev" : "next",
+    });
+    items = result.items;
+    nextCursor = result.nextCursor;
   }
-
-  const from = (page - 1) * pageSize;
-  const to = from + pageSize - 1;
-  const { data } = await query.range(from, to);
-  const items = (data ?? []) as NewsItemRow[];
   if (!items.length) {
     return Response.json({ ok: false, message: "当前筛选结果为空" }, { status: 400 });
   }
@@ -69,7 +68,7 @@ export async function GET(req: Request) {
     if (!digest) {
       return Response.json({ ok: false, message: "AI 解读未启用或未配置 Key" }, { status: 400 });
     }
-    return Response.json({ ok: true, digest });
+    return Response.json({ ok: true, digest, nextCursor });
   } catch (e) {
     const msg = e instanceof Error ? e.message : "AI 解读失败";
     if (msg.includes("HTTP 429")) {
@@ -1,5 +1,5 @@
 import { getOptionalEnv } from "../../../../../lib/env";
-import { processNextJob } from "../../../../../server/aiDigestJob";
+import { processJobBatch } from "../../../../../server/aiDigestJob";
 
 export const dynamic = "force-dynamic";
 export const runtime = "nodejs";
@@ -16,8 +16,9 @@ export async function GET(req: Request) {
   if (!verifyCronAuth(req)) {
     return new Response("Unauthorized", { status: 401 });
   }
-  const id = await processNextJob();
-  return Response.json({ ok: true, processed: id });
+  const limitRaw = Number.parseInt(new URL(req.url).searchParams.get("limit") ?? "", 10);
+  const ids = await processJobBatch(Number.isFinite(limitRaw) ? limitRaw : undefined);
+  return Response.json({ ok: true, processed: ids[0] ?? null, processedIds: ids });
 }
 
 export async function POST(req: Request) {
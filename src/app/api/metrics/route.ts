@@ -0,0 +1,32 @@
+import { getOptionalEnv } from "../../../lib/env";
+import { getHttpMetrics, renderHttpMetrics } from "../../../server/http";
+import { getReadCacheMetrics, renderReadCacheMetrics } from "../../../server/readCache";
+
+export const dynamic = "force-dynamic";
+export const runtime = "nodejs";
+
+function verifyCronAuth(req: Request): boolean {
+  const secret = getOptionalEnv("CRON_SECRET");
+  if (!secret) return true;
+  const auth = req.headers.get("authorization") ?? "";
+  return auth === `Bearer ${secret}`;
+}
+
+// Per-instance counters: each serverless instance reports what it has served since it started.
+export async function GET(req: Request) {
+  if (!verifyCronAuth(req)) {
+    return new Response("Unauthorized", { status: 401 });
+  }
+  if (new URL(req.url).searchParams.get("format") === "json") {
+    const mem = process.memoryUsage();
+    return Response.json({
+      ok: true,
+      http: getHttpMetrics(),
+      readCache: getReadCacheMetrics(),
+      process: { rssBytes: mem.rss, heapUsedBytes: mem.heapUsed, uptimeSec: Math.round(process.uptime()) },
+    });
+  }
+  return new Response(`${renderHttpMetrics()}${renderReadCacheMetrics()}`, {
+    headers: { "content-type": "text/plain; version=0.0.4; charset=utf-8" },
+  });
+}
@@ -0,0 +1,16 @@
+import { createSupabaseAdmin } from "../../../lib/supabaseAdmin";
+import { loadDailyStats, safeStatsDays } from "../../../server/stats";
+
+export const dynamic = "force-dynamic";
+export const runtime = "nodejs";
+
+export async function GET(req: Request) {
+  const days = safeStatsDays(new URL(req.url).searchParams.get("days"));
+  try {
+    const stats = await loadDailyStats(createSupabaseAdmin(), { days });
+    return Response.json({ ok: true, ...stats });
+  } catch (e) {
+    const msg = e instanceof Error ? e.message : "Unknown error";
+    return Response.json({ ok: false, message: msg }, { status: 500 });
+  }
+}
@@ -0,0 +1,13 @@
+import { getSyncJob } from "../../../../../server/syncJob";
+
+export const dynamic = "force-dynamic";
+export const runtime = "nodejs";
+
+export async function GET(_: Request, ctx: { params: Promise<{ id: string }> }) {
+  const { id } = await ctx.params;
+  const result = await getSyncJob(id);
+  if (!result) {
+    return Response.json({ ok: false, message: "Not found" }, { status: 404 });
+  }
+  return Response.json({ ok: true, ...result });
+}
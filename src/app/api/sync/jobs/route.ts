@@ -0,0 +1,32 @@
+import { after } from "next/server";
+import { getOptionalEnv } from "../../../../lib/env";
+import { createSyncJob, runSyncJob } from "../../../../server/syncJob";
+
+export const dynamic = "force-dynamic";
+export const runtime = "nodejs";
+export const maxDuration = 300;
+
+type Body = { secret?: string; lookbackHours?: number; incremental?: boolean };
+
+function verify(req: Request, body: Body): boolean {
+  const expected = getOptionalEnv("CRON_SECRET");
+  if (!expected) return true;
+  const auth = req.headers.get("authorization") ?? "";
+  if (auth === `Bearer ${expected}`) return true;
+  return (body.secret ?? "") === expected;
+}
+
+export async function POST(req: Request) {
+  const body = (await req.json().catch(() => ({}))) as Body;
+  if (!verify(req, body)) {
+    return new Response("Unauthorized", { status: 401 });
+  }
+
+  const id = await createSyncJob({
+    lookbackHours: typeof body.lookbackHours === "number" ? body.lookbackHours : undefined,
+    incremental: body.incremental,
+  });
+  after(() => runSyncJob(id));
+
+  return Response.json({ ok: true, job: { id, status: "QUEUED" } });
+}
@@ -54,6 +54,7 @@ export async function POST(req: Request) {
 
   await supabase.from("run_log").insert({
     status,
+    kind: "sync",
     started_at: now,
     ended_at: now,
     window_start: windowStart,
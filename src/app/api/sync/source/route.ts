@@ -1,14 +1,11 @@
-import { DateTime } from "luxon";
 import { getOptionalEnv } from "../../../../lib/env";
 import { createSupabaseAdmin } from "../../../../lib/supabaseAdmin";
-import { SOURCE_LIST } from "../../../../config/sources";
-import {
-  fetchGoogleNewsRssWithLocales,
-  GOOGLE_NEWS_ZH_CN,
-  GOOGLE_NEWS_EN_US,
-} from "../../../../server/googleNewsRss";
-import { fetchGdeltDocs } from "../../../../server/gdelt";
+import { buildSourceList } from "../../../../config/sources";
 import type { NewNewsItem } from "../../../../lib/types";
+import { saveFeedStates } from "../../../../server/feedState";
+import { toNewsRow, writeNewsItems } from "../../../../server/newsWriter";
+import { fetchSourceItems } from "../../../../server/syncJob";
+import { loadTopics } from "../../../../server/topicRegistry";
 
 export const dynamic = "force-dynamic";
 export const runtime = "nodejs";
@@ -19,6 +16,7 @@ type Body = {
   sourceIndex?: number;
   windowStart?: string;
   windowEnd?: string;
+  incremental?: boolean;
 };
 
 function verify(req: Request, body: Body): boolean {
@@ -36,7 +34,7 @@ export async function POST(req: Request) {
   }
 
   const sourceIndex = typeof body.sourceIndex === "number" ? body.sourceIndex : -1;
-  const source = SOURCE_LIST[sourceIndex];
+  const source = buildSourceList(await loadTopics())[sourceIndex];
   if (!source) {
     return Response.json({ ok: false, errorMessage: `无效的源索引: ${sourceIndex}` }, { status: 400 });
   }
@@ -48,71 +46,26 @@ export async function POST(req: Request) {
   }
 
   try {
-    let items: Array<{
-      topic: string;
-      title: string;
-      summary: string | null;
-      url: string;
-      source: string;
-      publishedAt: Date;
-      contentHash: string;
-      language: string;
-    }> = [];
-
-    if (source.type === "rss") {
-      const locale = source.locale === "en-US" ? GOOGLE_NEWS_EN_US : GOOGLE_NEWS_ZH_CN;
-      items = await fetchGoogleNewsRssWithLocales(source.topic, [source.query], [locale]);
-    } else {
-      items = await fetchGdeltDocs({
-        topic: source.topic,
-        query: source.query,
-        windowStartIso: windowStart,
-        windowEndIso: windowEnd,
-        maxRecords: source.maxRecords ?? 200,
-      });
-    }
-
-    const windowStartMs = DateTime.fromISO(windowStart, { zone: "utc" }).toMillis();
-    const windowEndMs = DateTime.fromISO(windowEnd, { zone: "utc" }).toMillis();
-
-    const filtered = items.filter((it) => {
-      const t = it.publishedAt.getTime();
-      return t > windowStartMs && t <= windowEndMs;
+    const { items: filtered, feeds, feedStates } = await fetchSourceItems(source, { windowStart, windowEnd }, {
+      incremental: body.incremental === true,
     });
 
-    const rows: NewNewsItem[] = filtered.map((it) => ({
-      topic: source.topic,
-      title: it.title,
-      title_zh: null,
-      url: it.url,
-      source: it.source,
-      published_at: new Date(it.publishedAt).toISOString(),
-      content_hash: it.contentHash,
-      language: it.language ?? "und",
-      summary: it.summary ?? null,
-      summary_zh: null,
-    }));
+    const rows: NewNewsItem[] = filtered.map((it) => toNewsRow(it));
 
     let newCount = 0;
     if (rows.length) {
       const supabase = createSupabaseAdmin();
-      const hashes = rows.map((r) => r.content_hash);
-      const { data: existing } = await supabase
-        .from("news_item")
-        .select("content_hash")
-        .in("content_hash", hashes);
-      const existingSet = new Set((existing ?? []).map((e) => e.content_hash));
-      newCount = rows.filter((r) => !existingSet.has(r.content_hash)).length;
-
-      const { error: upsertErr } = await supabase.from("news_item").upsert(rows, { onConflict: "content_hash" });
-      if (upsertErr) throw upsertErr;
+      const written = await writeNewsItems(supabase, rows);
+      newCount = written.inserted;
     }
+    await saveFeedStates(feedStates);
 
     return Response.json({
       ok: true,
       sourceName: source.label,
       count: newCount,
       fetchedCount: rows.length,
+      feeds,
     });
   } catch (e) {
     const msg = e instanceof Error ? e.message : "抓取失败";
@@ -1,12 +1,11 @@
 import { getOptionalEnv } from "../../../lib/env";
-import { createSupabaseAdmin } from "../../../lib/supabaseAdmin";
-import { translateItemsToZh } from "../../../server/translate";
+import { translatePendingNews } from "../../../server/translationBackfill";
 
 export const dynamic = "force-dynamic";
 export const runtime = "nodejs";
 export const maxDuration = 300;
 
-type Body = { secret?: string };
+type Body = { secret?: string; limit?: number };
 
 function verify(req: Request, body: Body): boolean {
   const expected = getOptionalEnv("CRON_SECRET");
@@ -22,46 +21,13 @@ export async function POST(req: Request) {
     return new Response("Unauthorized", { status: 401 });
   }
 
-  const supabase = createSupabaseAdmin();
-
-  const { data: items, error: queryErr } = await supabase
-    .from("news_item")
-    .select("id,title,summary,language")
-    .is("title_zh", null)
-    .not("language", "in", '("zh","zh-cn","zh-hans")')
-    .order("published_at", { ascending: false })
-    .limit(1);
-
-  if (queryErr) {
-    return Response.json({ ok: false, error: queryErr.message }, { status: 500 });
-  }
-
-  if (!items || items.length === 0) {
-    return Response.json({ ok: true, translated: 0, remaining: 0 });
-  }
+  const limit = typeof body.limit === "number" && Number.isFinite(body.limit) ? body.limit : 50;
 
   try {
-    const translated = await translateItemsToZh(
-      items.map((it) => ({ title: it.title, summary: it.summary })),
-    );
-
-    for (let i = 0; i < items.length; i++) {
-      const tr = translated[i];
-      if (!tr) continue;
-      await supabase
-        .from("news_item")
-        .update({ title_zh: tr.titleZh, summary_zh: tr.summaryZh })
-        .eq("id", items[i].id);
-    }
-  } catch {
-    // best-effort: some may have been translated
+    const { translated, remaining } = await translatePendingNews({ limit });
+    return Response.json({ ok: true, translated, remaining });
+  } catch (e) {
+    const msg = e instanceof Error ? e.message : "翻译失败";
+    return Response.json({ ok: false, error: msg }, { status: 500 });
   }
-
-  const { count } = await supabase
-    .from("news_item")
-    .select("id", { count: "exact", head: true })
-    .is("title_zh", null)
-    .not("language", "in", '("zh","zh-cn","zh-hans")');
-
-  return Response.json({ ok: true, translated: items.length, remaining: count ?? 0 });
 }
@@ -45,6 +45,7 @@ export function AiDigestPanel(props: {
   topic: TopicKey;
   days: "1" | "7" | "30" | "ALL";
   q: string;
+  archive: boolean;
 }) {
   const [loading, setLoading] = useState(false);
   const [digest, setDigest] = useState<AiDigest | null>(null);
@@ -121,7 +122,7 @@ export function AiDigestPanel(props: {
       const res = await fetch(`/api/ai/digest/jobs`, {
         method: "POST",
         headers: { "content-type": "application/json" },
-        body: JSON.stringify({ topic: props.topic, days: props.days, q: props.q }),
+        body: JSON.stringify({ topic: props.topic, days: props.days, q: props.q, archive: props.archive }),
       });
       const json = (await res.json()) as { ok?: boolean; job?: Job; message?: string };
       const j = json?.job;
@@ -1,11 +1,33 @@
 "use client";
 
 import { useState } from "react";
-import { SOURCE_LIST, SOURCE_COUNT } from "../../config/sources";
-import { TOPIC_KEYS, topicDisplayName } from "../../config/topics";
+import { groupSources, type SourceDef } from "../../config/sources";
 
 type SourceStatus = "pending" | "fetching" | "success" | "failed";
 
+type SyncJobPoll = {
+  ok?: boolean;
+  job?: {
+    status: "QUEUED" | "RUNNING" | "TRANSLATING" | "SUCCESS" | "FAILED";
+    inserted_count: number;
+    translated_count: number;
+    translate_remaining: number | null;
+    error_message: string | null;
+  };
+  sources?: Array<{
+    source_index: number;
+    status: SourceStatus;
+    fetched_count: number;
+    inserted_count: number;
+    error_message: string | null;
+  }>;
+};
+
+const POLL_INTERVAL_MS = 1500;
+// the job runs for at most 300 s server-side; stale jobs are marked FAILED on the next poll
+const POLL_TIMEOUT_MS = 360_000;
+const POLL_MAX_FAILURES = 5;
+
 type SourceState = {
   status: SourceStatus;
   count: number;
@@ -13,7 +35,7 @@ type SourceState = {
   error?: string;
 };
 
-export function SyncPanel({ className = "mt-4" }: { className?: string } = {}) {
+export function SyncPanel({ sources: sourceList, className = "mt-4" }: { sources: SourceDef[]; className?: string }) {
   const [loading, setLoading] = useState(false);
   const [secret, setSecret] = useState("");
   const [msg, setMsg] = useState<string | null>(null);
@@ -26,21 +48,13 @@ export function SyncPanel({ className = "mt-4" }: { className?: string } = {}) {
   const [translateDone, setTranslateDone] = useState(false);
 
   function resetSources() {
-    return Array.from({ length: SOURCE_COUNT }, (): SourceState => ({
+    return Array.from({ length: sourceList.length }, (): SourceState => ({
       status: "pending",
       count: 0,
       fetchedCount: 0,
     }));
   }
 
-  function updateSource(index: number, patch: Partial<SourceState>) {
-    setSourceStates((prev) => {
-      const next = [...prev];
-      next[index] = { ...next[index], ...patch };
-      return next;
-    });
-  }
-
   async function run() {
     if (loading) return;
     if (!secret) {
@@ -57,77 +71,95 @@ export function SyncPanel({ className = "mt-4" }: { className?: string } = {}) {
     setSourceStates(states);
     setShowSources(true);
 
-    const now = new Date();
-    const windowEnd = now.toISOString();
-    const windowStart = new Date(now.getTime() - 168 * 60 * 60 * 1000).toISOString();
-
-    const sourceResults: Array<{ index: number; ok: boolean; count: number; error?: string }> = [];
-
-    for (const source of SOURCE_LIST) {
-      const i = source.index;
-      updateSource(i, { status: "fetching" });
-
-      try {
-        const res = await fetch("/api/sync/source", {
-          method: "POST",
-          headers: { "content-type": "application/json" },
-          body: JSON.stringify({
-            secret,
-            sourceIndex: i,
-            windowStart,
-            windowEnd,
-          }),
-        });
-
-        const json = (await res.json().catch(() => null)) as {
-          ok?: boolean;
-          count?: number;
-          fetchedCount?: number;
-          errorMessage?: string;
-        } | null;
-
-        if (!res.ok && res.status === 401) {
-          setMsg("同步失败（口令错误）");
-          setLoading(false);
-          return;
-        }
-
-        if (json?.ok) {
-          const count = json.count ?? 0;
-          const fetchedCount = json.fetchedCount ?? count;
-          updateSource(i, { status: "success", count, fetchedCount });
-          sourceResults.push({ index: i, ok: true, count });
-        } else {
-          const err = json?.errorMessage ?? `HTTP ${res.status}`;
-          updateSource(i, { status: "failed", error: err });
-          sourceResults.push({ index: i, ok: false, count: 0, error: err });
-        }
-      } catch (e) {
-        const err = e instanceof Error ? e.message : "网络错误";
-        updateSource(i, { status: "failed", error: err });
-        sourceResults.push({ index: i, ok: false, count: 0, error: err });
-      }
-    }
-
+    let jobId = "";
     try {
-      await fetch("/api/sync", {
+      const res = await fetch("/api/sync/jobs", {
         method: "POST",
         headers: { "content-type": "application/json" },
-        body: JSON.stringify({ secret, windowStart, windowEnd, sourceResults }),
+        body: JSON.stringify({ secret }),
       });
-    } catch {
-      // best-effort
+      if (res.status === 401) {
+        setMsg("同步失败（口令错误）");
+        setLoading(false);
+        return;
+      }
+      const json = (await res.json().catch(() => null)) as { ok?: boolean; job?: { id?: string } } | null;
+      jobId = json?.job?.id ?? "";
+      if (!res.ok || !jobId) {
+        setMsg(`同步失败：HTTP ${res.status}`);
+        setLoading(false);
+        return;
+      }
+    } catch (e) {
+      setMsg(`同步失败：${e instanceof Error ? e.message : "网络错误"}`);
+      setLoading(false);
+      return;
     }
 
-    const totalCount = sourceResults.reduce((s, r) => s + r.count, 0);
-    const successSources = sourceResults.filter((r) => r.ok).length;
-    const failedSources = sourceResults.filter((r) => !r.ok).length;
+    const pollDeadline = Date.now() + POLL_TIMEOUT_MS;
+    let failures = 0;
+    for (;;) {
+      if (Date.now() > pollDeadline) {
+        setMsg("同步状态查询超时，请稍后刷新页面查看结果");
+        break;
+      }
+      await new Promise((r) => setTimeout(r, POLL_INTERVAL_MS));
+      const res = await fetch(`/api/sync/jobs/${jobId}`).catch(() => null);
+      if (res?.status === 404) {
+        setMsg("同步失败：任务不存在");
+        break;
+      }
+      const json = (res?.ok ? await res.json().catch(() => null) : null) as SyncJobPoll | null;
+      if (!json?.ok || !json.job) {
+        failures += 1;
+        if (failures >= POLL_MAX_FAILURES) {
+          setMsg(`同步状态查询失败：${res ? `HTTP ${res.status}` : "网络错误"}`);
+          break;
+        }
+        continue;
+      }
+      failures = 0;
+
+      const { job, sources = [] } = json;
+      setSourceStates(() => {
+        const next = resetSources();
+        for (const src of sources) {
+          next[src.source_index] = {
+            status: src.status,
+            count: src.inserted_count,
+            fetchedCount: src.fetched_count,
+            error: src.error_message ?? undefined,
+          };
+        }
+        return next;
+      });
+
+      if (job.status === "TRANSLATING") {
+        setMsg(
+          job.translate_remaining === null
+            ? `抓取完成，共新增 ${job.inserted_count} 条，翻译中...`
+            : `抓取完成，共新增 ${job.inserted_count} 条，翻译中... 已翻译 ${job.translated_count} 条，剩余 ${job.translate_remaining} 条`,
+        );
+      }
 
-    if (successSources > 0) {
-      setMsg(`同步完成：${successSources} 个源成功，${failedSources} 个源失败，共 ${totalCount} 条`);
-      setSyncDone(true);
-    } else {
-      setMsg("同步失败：所有源均失败");
+      if (job.status === "SUCCESS" || job.status === "FAILED") {
+        const successSources = sources.filter((r) => r.status === "success").length;
+        const failedSources = sources.filter((r) => r.status === "failed").length;
+        if (job.status === "SUCCESS") {
+          setMsg(`同步完成：${successSources} 个源成功，${failedSources} 个源失败，共 ${job.inserted_count} 条`);
+          const remaining = job.translate_remaining ?? 0;
+          setTranslateMsg(
+            remaining > 0
+              ? `已自动翻译 ${job.translated_count} 条，剩余 ${remaining} 条`
+              : `翻译完成，共翻译 ${job.translated_count} 条`,
+          );
+          setTranslateDone(remaining === 0);
+          setSyncDone(true);
+        } else {
+          setMsg(`同步失败：${job.error_message ?? "所有源均失败"}`);
+        }
+        break;
+      }
     }
 
     setLoading(false);
@@ -144,7 +176,7 @@ export function SyncPanel({ className = "mt-4" }: { className?: string } = {}) {
         const res = await fetch("/api/translate", {
           method: "POST",
           headers: { "content-type": "application/json" },
-          body: JSON.stringify({ secret }),
+          body: JSON.stringify({ secret, limit: 50 }),
         });
         const json = (await res.json().catch(() => null)) as {
           ok?: boolean;
@@ -188,11 +220,7 @@ export function SyncPanel({ className = "mt-4" }: { className?: string } = {}) {
     return "text-red-500";
   };
 
-  const grouped = TOPIC_KEYS.map((topic) => ({
-    topic,
-    displayName: topicDisplayName(topic),
-    sources: SOURCE_LIST.filter((s) => s.topic === topic),
-  }));
+  const grouped = groupSources(sourceList);
 
   return (
     <div className={`${className} rounded-2xl border border-zinc-200 bg-white p-4`}>
@@ -200,7 +228,7 @@ export function SyncPanel({ className = "mt-4" }: { className?: string } = {}) {
         <div>
           <div className="text-sm font-semibold">同步</div>
           <div className="mt-1 text-xs text-zinc-500">
-            逐源串行抓取 {SOURCE_COUNT} 个数据源，每个最多等待 15 秒
+            服务端并行抓取 {sourceList.length} 个数据源并自动翻译，关闭页面不影响同步
           </div>
         </div>
         <div className="flex flex-col gap-2 sm:flex-row sm:items-center">
@@ -228,8 +256,8 @@ export function SyncPanel({ className = "mt-4" }: { className?: string } = {}) {
       {showSources ? (
         <div className="mt-4 space-y-3">
           {grouped.map((g) => (
-            <div key={g.topic}>
-              <div className="text-xs font-semibold text-zinc-500 mb-1">{g.displayName}</div>
+            <div key={g.group}>
+              <div className="text-xs font-semibold text-zinc-500 mb-1">{g.group}</div>
               <div className="space-y-1">
                 {g.sources.map((source) => {
                   const st = sourceStates[source.index] ?? { status: "pending", count: 0, fetchedCount: 0 };
@@ -1,10 +1,19 @@
 import Link from "next/link";
 import { ExternalLink } from "lucide-react";
 import { getOptionalEnv } from "../../lib/env";
-import { createSupabaseAdmin } from "../../lib/supabaseAdmin";
 import type { NewsItemRow } from "../../lib/types";
+import { sanitizeQuery } from "../../server/newsQuery";
+import { readNewsCount, readNewsPage, readNewsRanked } from "../../server/readCache";
+import { loadTopics } from "../../server/topicRegistry";
 import { AiDigestPanel } from "./AiDigestPanel";
-import { TOPIC_KEYS, DEFAULT_TOPIC, topicDisplayName, isValidTopic, allTopicDisplayNames } from "../../config/topics";
+import {
+  defaultTopic,
+  topicDisplayName,
+  isValidTopic,
+  allTopicDisplayNames,
+  type TopicDef,
+  type TopicKey,
+} from "../../config/topics";
 
 type SearchParams = Record<string, string | string[] | undefined>;
 
@@ -26,10 +35,6 @@ function safeInt(v: string, fallback: number, min: number, max: number): number
   return Math.max(min, Math.min(max, n));
 }
 
-function sanitizeQuery(q: string): string {
-  return q.replaceAll("%", " ").replaceAll("_", " ").trim().slice(0, 80);
-}
-
 function buildHref(base: string, params: Record<string, string | number | undefined>): string {
   const sp = new URLSearchParams();
   Object.entries(params).forEach(([k, v]) => {
@@ -42,84 +47,92 @@ function buildHref(base: string, params: Record<string, string | number | undefi
   return qs ? `${base}?${qs}` : base;
 }
 
-async function loadNews(params: SearchParams): Promise<{
+async function loadNews(params: SearchParams, topics: TopicDef[]): Promise<{
   envReady: boolean;
   items: NewsItemRow[];
   count: number | null;
+  nextCursor: string | null;
+  prevCursor: string | null;
   filters: {
-    topic: "CATL" | "XIAOMI";
+    topic: TopicKey;
     q: string;
     days: "1" | "7" | "30" | "ALL";
+    collapse: boolean;
+    archive: boolean;
+    sort: "time" | "relevance";
     page: number;
     pageSize: number;
   };
 }> {
   const envReady = Boolean(getOptionalEnv("SUPABASE_URL") && getOptionalEnv("SUPABASE_SERVICE_ROLE_KEY"));
   const topicRaw = pickFirst(params.topic).toUpperCase();
-  const topic = isValidTopic(topicRaw) ? topicRaw : DEFAULT_TOPIC;
+  const topic = isValidTopic(topicRaw, topics) ? topicRaw : defaultTopic(topics);
   const q = sanitizeQuery(pickFirst(params.q));
   const daysRaw = pickFirst(params.days).toUpperCase();
   const days = (daysRaw === "1" || daysRaw === "7" || daysRaw === "30" ? daysRaw : "ALL") as "1" | "7" | "30" | "ALL";
   const pageSize = safeInt(pickFirst(params.pageSize), 50, 10, 200);
   const page = safeInt(pickFirst(params.page), 1, 1, 1000000);
+  const collapse = pickFirst(params.collapse) !== "0";
+  const archive = pickFirst(params.archive) === "1";
+  const sort = pickFirst(params.sort) === "relevance" && q ? "relevance" : "time";
+  const cursor = pickFirst(params.cursor) || null;
+  const direction = pickFirst(params.dir) === "prev" ? "prev" : "next";
+  const filters = { topic, q, days, collapse, archive, sort, page, pageSize };
 
   if (!envReady) {
-    return {
-      envReady: false,
-      items: [],
-      count: null,
-      filters: { topic, q, days, page, pageSize },
-    };
+    return { envReady: false, items: [], count: null, nextCursor: null, prevCursor: null, filters };
   }
 
-  const supabase = createSupabaseAdmin();
-
-  let query = supabase.from("news_item").select("*", { count: "estimated" }).order("published_at", { ascending: false });
-  query = query.eq("topic", topic);
+  const newsFilters = { topic, q, days, collapse, archive };
+  const count = await readNewsCount(newsFilters);
 
-  if (days !== "ALL") {
-    const n = Number.parseInt(days, 10);
-    const since = new Date(Date.now() - n * 24 * 60 * 60 * 1000).toISOString();
-    query = query.gte("published_at", since);
+  if (sort === "relevance") {
+    const from = (page - 1) * pageSize;
+    const ranked = await readNewsRanked(newsFilters, { limit: pageSize, offset: from });
+    if (ranked) {
+      return { envReady: true, items: ranked, count, nextCursor: null, prevCursor: null, filters };
+    }
   }
 
-  if (q) {
-    const like = `%${q}%`;
-    query = query.or(
-      [
-        `title.ilike.${like}`,
-        `title_zh.ilike.${like}`,
-        `summary.ilike.${like}`,
-        `summary_zh.ilike.${like}`,
-        `source.ilike.${like}`,
-      ].join(","),
-    );
-  }
-
-  const from = (page - 1) * pageSize;
-  const to = from + pageSize - 1;
-  const { data, count } = await query.range(from, to);
-
+  const result = await readNewsPage(newsFilters, { pageSize, cursor, direction });
   return {
     envReady: true,
-    items: (data ?? []) as NewsItemRow[],
-    count: typeof count === "number" ? count : null,
-    filters: { topic, q, days, page, pageSize },
+    items: result.items,
+    count,
+    nextCursor: result.nextCursor,
+    prevCursor: result.prevCursor,
+    filters: { ...filters, sort: "time" },
   };
 }
 
 export default async function NewsPage({ searchParams }: { searchParams: Promise<SearchParams> }) {
   const params = await searchParams;
-  const data = await loadNews(params);
+  const topics = await loadTopics();
+  const data = await loadNews(params, topics);
   const f = data.filters;
 
+  const base = {
+    topic: f.topic,
+    q: f.q,
+    days: f.days,
+    collapse: f.collapse ? undefined : "0",
+    archive: f.archive ? "1" : undefined,
+    sort: f.sort === "relevance" ? f.sort : undefined,
+    pageSize: f.pageSize,
+  };
+  const relevance = f.sort === "relevance";
   const prevHref =
-    f.page > 1
-      ? buildHref("/news", { topic: f.topic, q: f.q, days: f.days, pageSize: f.pageSize, page: f.page - 1 })
-      : null;
-  const nextHref =
-    data.items.length === f.pageSize
-      ? buildHref("/news", { topic: f.topic, q: f.q, days: f.days, pageSize: f.pageSize, page: f.page + 1 })
+    f.page <= 1
+      ? null
+      : relevance || !data.prevCursor
+        ? buildHref("/news", { ...base, page: relevance ? f.page - 1 : 1 })
+        : buildHref("/news", { ...base, cursor: data.prevCursor, dir: "prev", page: f.page - 1 });
+  const nextHref = relevance
+    ? data.items.length === f.pageSize
+      ? buildHref("/news", { ...base, page: f.page + 1 })
+      : null
+    : data.nextCursor
+      ? buildHref("/news", { ...base, cursor: data.nextCursor, page: f.page + 1 })
       : null;
   const statusHref = buildHref("/status", {
     topic: f.topic,
@@ -139,7 +152,7 @@ export default async function NewsPage({ searchParams }: { searchParams: Promise
             </div>
             <div>
               <div className="text-sm font-semibold leading-5">资讯日报机器人</div>
-              <div className="text-xs text-zinc-500">{allTopicDisplayNames()}</div>
+              <div className="text-xs text-zinc-500">{allTopicDisplayNames(topics)}</div>
             </div>
           </div>
           <div className="flex items-center gap-2 text-xs text-zinc-600">
@@ -169,7 +182,7 @@ export default async function NewsPage({ searchParams }: { searchParams: Promise
             <div className="text-xs text-zinc-500">
               {data.count === null ? null : (
                 <span>
-                  约 {data.count} 条 · 第 {f.page} 页
+                  共 {data.count} 条 · 第 {f.page} 页
                 </span>
               )}
             </div>
@@ -183,8 +196,8 @@ export default async function NewsPage({ searchParams }: { searchParams: Promise
                 defaultValue={f.topic}
                 className="mt-1 w-full rounded-xl border border-zinc-200 bg-white px-3 py-2 text-sm"
               >
-                {TOPIC_KEYS.map((k) => (
-                  <option key={k} value={k}>{topicDisplayName(k)}</option>
+                {topics.map((t) => (
+                  <option key={t.key} value={t.key}>{t.displayName}</option>
                 ))}
               </select>
             </div>
@@ -201,7 +214,7 @@ export default async function NewsPage({ searchParams }: { searchParams: Promise
                 <option value="30">最近 30 天</option>
               </select>
             </div>
-            <div className="md:col-span-6">
+            <div className="md:col-span-3">
               <label className="block text-xs text-zinc-500">搜索</label>
               <input
                 name="q"
@@ -210,6 +223,28 @@ export default async function NewsPage({ searchParams }: { searchParams: Promise
                 className="mt-1 w-full rounded-xl border border-zinc-200 bg-white px-3 py-2 text-sm"
               />
             </div>
+            <div className="md:col-span-1">
+              <label className="block text-xs text-zinc-500">排序</label>
+              <select
+                name="sort"
+                defaultValue={f.sort}
+                className="mt-1 w-full rounded-xl border border-zinc-200 bg-white px-2 py-2 text-sm"
+              >
+                <option value="time">时间</option>
+                <option value="relevance">相关度</option>
+              </select>
+            </div>
+            <div className="md:col-span-2">
+              <label className="block text-xs text-zinc-500">相似报道</label>
+              <select
+                name="collapse"
+                defaultValue={f.collapse ? "1" : "0"}
+                className="mt-1 w-full rounded-xl border border-zinc-200 bg-white px-3 py-2 text-sm"
+              >
+                <option value="1">合并</option>
+                <option value="0">全部展示</option>
+              </select>
+            </div>
             <div className="md:col-span-2">
               <label className="block text-xs text-zinc-500">每页</label>
               <select
@@ -226,6 +261,10 @@ export default async function NewsPage({ searchParams }: { searchParams: Promise
             <input type="hidden" name="page" value="1" />
 
             <div className="md:col-span-12 flex items-center gap-2">
+              <label className="mr-2 flex items-center gap-1.5 text-xs text-zinc-600">
+                <input type="checkbox" name="archive" value="1" defaultChecked={f.archive} />
+                包含归档资讯
+              </label>
               <button
                 type="submit"
                 className="rounded-xl border border-zinc-200 bg-zinc-900 px-4 py-2 text-sm font-medium text-white hover:bg-zinc-800"
@@ -233,7 +272,7 @@ export default async function NewsPage({ searchParams }: { searchParams: Promise
                 应用筛选
               </button>
               <Link
-                href={`/news?topic=${DEFAULT_TOPIC}`}
+                href={`/news?topic=${defaultTopic(topics)}`}
                 className="rounded-xl border border-zinc-200 bg-white px-4 py-2 text-sm font-medium text-zinc-800 hover:bg-zinc-50"
               >
                 重置
@@ -241,11 +280,17 @@ export default async function NewsPage({ searchParams }: { searchParams: Promise
             </div>
           </form>
         </div>
-        <AiDigestPanel key={`${f.topic}|${f.days}|${f.q}`} topic={f.topic} days={f.days} q={f.q} />
+        <AiDigestPanel
+          key={`${f.topic}|${f.days}|${f.q}|${f.archive}`}
+          topic={f.topic}
+          days={f.days}
+          q={f.q}
+          archive={f.archive}
+        />
 
         <div className="mt-4 rounded-2xl border border-zinc-200 bg-white">
           <div className="flex items-center justify-between gap-3 border-b border-zinc-200 px-4 py-3">
-            <div className="text-xs text-zinc-500">当前：{topicDisplayName(f.topic)}</div>
+            <div className="text-xs text-zinc-500">当前：{topicDisplayName(f.topic, topics)}</div>
             <div className="flex items-center gap-2">
               <Link
                 href={prevHref ?? "#"}
@@ -279,11 +324,13 @@ export default async function NewsPage({ searchParams }: { searchParams: Promise
                   <li key={it.id} className="px-4 py-4 hover:bg-zinc-50">
                     <div className="flex flex-col gap-2 sm:flex-row sm:items-start sm:justify-between">
                       <div className="min-w-0">
-                        <div className="text-xs text-zinc-500">{topicDisplayName(it.topic)}</div>
+                        <div className="text-xs text-zinc-500">{topicDisplayName(it.topic, topics)}</div>
                         <div className="mt-1 line-clamp-2 text-sm font-semibold text-zinc-900">{title}</div>
                         {showOriginal ? <div className="mt-1 line-clamp-1 text-xs text-zinc-400">{it.title}</div> : null}
                         <div className="mt-2 text-xs text-zinc-600">
                           {it.source} · {fmt(it.published_at)}
+                          {f.collapse && it.cluster_size > 1 ? ` · ${it.cluster_size} 家媒体报道` : null}
+                          {it.archived ? " · 已归档" : null}
                         </div>
                         {summary ? (
                           <div className="mt-2">
@@ -1,6 +1,7 @@
 import { redirect } from "next/navigation";
-import { DEFAULT_TOPIC } from "../config/topics";
+import { defaultTopic } from "../config/topics";
+import { loadTopics } from "../server/topicRegistry";
 
-export default function Home() {
-  redirect(`/news?topic=${DEFAULT_TOPIC}`);
+export default async function Home() {
+  redirect(`/news?topic=${defaultTopic(await loadTopics())}`);
 }
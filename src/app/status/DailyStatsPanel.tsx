@@ -0,0 +1,115 @@
+import type { RunKind } from "../../lib/types";
+import type { StatsSummary } from "../../server/stats";
+import type { TopicDef } from "../../config/topics";
+
+function fmtMs(ms: number | null): string {
+  if (ms === null) return "-";
+  if (ms >= 60_000) return `${(ms / 60_000).toFixed(1)} 分`;
+  return `${(ms / 1000).toFixed(1)} 秒`;
+}
+
+const RUN_KINDS: Array<{ kind: RunKind; label: string }> = [
+  { kind: "daily", label: "日常" },
+  { kind: "micro", label: "微批" },
+  { kind: "sync", label: "同步" },
+];
+
+function fmtPct(v: number | null): string {
+  return v === null ? "-" : `${Math.round(v * 100)}%`;
+}
+
+export function DailyStatsPanel({ stats, topics }: { stats: StatsSummary; topics: TopicDef[] }) {
+  const maxItems = Math.max(1, ...stats.days.map((d) => d.items));
+
+  return (
+    <div className="mt-4 grid grid-cols-1 gap-4 lg:grid-cols-3">
+      <div className="rounded-2xl border border-zinc-200 bg-white p-4 lg:col-span-2">
+        <div className="text-sm font-semibold">近 {stats.days.length} 天趋势</div>
+        <div className="mt-1 text-xs text-zinc-500">按发布时间（北京时间）统计的入库条数、翻译覆盖率，以及按任务类型（日常 / 微批 / 同步）统计的运行次数与耗时</div>
+        <div className="mt-3 overflow-x-auto">
+          <table className="w-full border-collapse text-left text-xs">
+            <thead className="bg-zinc-50 text-zinc-500">
+              <tr>
+                <th className="px-3 py-2 font-medium">日期</th>
+                <th className="px-3 py-2 font-medium">入库</th>
+                {topics.map((t) => (
+                  <th key={t.key} className="px-3 py-2 font-medium">
+                    {t.displayName}
+                  </th>
+                ))}
+                <th className="px-3 py-2 font-medium">翻译覆盖</th>
+                <th className="px-3 py-2 font-medium">运行（成功/失败）</th>
+                <th className="px-3 py-2 font-medium">平均 / 最长耗时</th>
+              </tr>
+            </thead>
+            <tbody>
+              {stats.days.map((d) => (
+                <tr key={d.day} className="border-t border-zinc-200">
+                  <td className="px-3 py-2 text-zinc-600">{d.day.slice(5)}</td>
+                  <td className="px-3 py-2">
+                    <div className="flex items-center gap-2">
+                      <div className="h-2 w-20 rounded bg-zinc-100">
+                        <div className="h-2 rounded bg-sky-400" style={{ width: `${(d.items / maxItems) * 100}%` }} />
+                      </div>
+                      <span className="text-zinc-700">{d.items}</span>
+                    </div>
+                  </td>
+                  {topics.map((t) => (
+                    <td key={t.key} className="px-3 py-2 text-zinc-600">
+                      {d.byTopic[t.key] ?? 0}
+                    </td>
+                  ))}
+                  <td className="px-3 py-2 text-zinc-600">{fmtPct(d.translationCoverage)}</td>
+                  <td className="px-3 py-2 text-zinc-600">
+                    {d.runs
+                      ? RUN_KINDS.map(({ kind, label }) => {
+                          const k = d.byKind[kind];
+                          if (!k) return null;
+                          return (
+                            <div key={kind} className="whitespace-nowrap">
+                              {label} {k.runs}（{k.succeeded}/
+                              <span className={k.failed ? "text-red-600" : undefined}>{k.failed}</span>）
+                            </div>
+                          );
+                        })
+                      : "-"}
+                  </td>
+                  <td className="px-3 py-2 text-zinc-600">
+                    {d.runs
+                      ? RUN_KINDS.map(({ kind, label }) => {
+                          const k = d.byKind[kind];
+                          if (!k) return null;
+                          return (
+                            <div key={kind} className="whitespace-nowrap">
+                              {label} {fmtMs(k.avgRunMs)} / {fmtMs(k.maxRunMs)}
+                            </div>
+                          );
+                        })
+                      : "-"}
+                  </td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      </div>
+
+      <div className="rounded-2xl border border-zinc-200 bg-white p-4">
+        <div className="text-sm font-semibold">来源排行</div>
+        <div className="mt-1 text-xs text-zinc-500">近 {stats.days.length} 天入库条数前 20</div>
+        {stats.topSources.length === 0 ? (
+          <div className="mt-3 text-xs text-zinc-500">暂无数据</div>
+        ) : (
+          <div className="mt-3 space-y-1">
+            {stats.topSources.map((s) => (
+              <div key={s.source} className="flex items-baseline justify-between gap-2 text-xs">
+                <span className="truncate text-zinc-600">{s.source}</span>
+                <span className="text-zinc-500">{s.items}</span>
+              </div>
+            ))}
+          </div>
+        )}
+      </div>
+    </div>
+  );
+}
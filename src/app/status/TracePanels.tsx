@@ -0,0 +1,131 @@
+import type { RunSpanPercentileRow, RunSpanRow } from "../../lib/types";
+
+const MAX_WATERFALL_ROWS = 80;
+
+function fmtMs(ms: number): string {
+  if (ms >= 60_000) return `${(ms / 60_000).toFixed(1)} 分`;
+  if (ms >= 1000) return `${(ms / 1000).toFixed(1)} 秒`;
+  return `${ms} ms`;
+}
+
+function spanLabel(s: RunSpanRow): string {
+  const detail = s.attrs.source ?? s.attrs.topic ?? s.attrs.provider ?? null;
+  return detail === null ? s.name : `${s.name} · ${detail}`;
+}
+
+function withDepth(spans: RunSpanRow[]): Array<RunSpanRow & { depth: number }> {
+  const depthById = new Map<number, number>();
+  return spans
+    .slice()
+    .sort((a, b) => a.span_id - b.span_id)
+    .map((s) => {
+      const depth = s.parent_id === null ? 0 : (depthById.get(s.parent_id) ?? 0) + 1;
+      depthById.set(s.span_id, depth);
+      return { ...s, depth };
+    });
+}
+
+export function RunWaterfall({ spans }: { spans: RunSpanRow[] }) {
+  const rows = withDepth(spans);
+  const totalMs = Math.max(1, ...rows.map((s) => s.start_ms + s.duration_ms));
+  const errorCount = rows.filter((s) => s.status === "error").length;
+  const tokens = rows
+    .filter((s) => s.name.startsWith("llm."))
+    .reduce((sum, s) => sum + (typeof s.attrs.tokens === "number" ? s.attrs.tokens : 0), 0);
+  const visible = rows.slice(0, MAX_WATERFALL_ROWS);
+
+  return (
+    <div className="mt-4 rounded-2xl border border-zinc-200 bg-white p-4">
+      <div className="flex items-start justify-between gap-3">
+        <div>
+          <div className="text-sm font-semibold">最近一次运行耗时</div>
+          <div className="mt-1 text-xs text-zinc-500">
+            共 {rows.length} 个环节，总耗时 {fmtMs(totalMs)}，失败 {errorCount} 个，模型 tokens {tokens}
+          </div>
+        </div>
+      </div>
+      {rows.length === 0 ? (
+        <div className="mt-3 text-xs text-zinc-500">暂无耗时记录</div>
+      ) : (
+        <div className="mt-3 space-y-1">
+          {visible.map((s) => (
+            <div key={s.span_id} className="flex items-center gap-2 text-xs">
+              <div
+                className={`w-56 shrink-0 truncate ${s.status === "error" ? "text-red-600" : "text-zinc-600"}`}
+                style={{ paddingLeft: `${Math.min(s.depth, 4) * 12}px` }}
+                title={s.error_message ?? spanLabel(s)}
+              >
+                {spanLabel(s)}
+              </div>
+              <div className="relative h-3 flex-1 rounded bg-zinc-100">
+                <div
+                  className={`absolute h-3 rounded ${s.status === "error" ? "bg-red-400" : "bg-sky-400"}`}
+                  style={{
+                    left: `${(s.start_ms / totalMs) * 100}%`,
+                    width: `${Math.max(0.3, (s.duration_ms / totalMs) * 100)}%`,
+                  }}
+                />
+              </div>
+              <div className="w-16 shrink-0 text-right text-zinc-500">{fmtMs(s.duration_ms)}</div>
+            </div>
+          ))}
+          {rows.length > visible.length ? (
+            <div className="pt-1 text-xs text-zinc-400">仅显示前 {visible.length} 个环节</div>
+          ) : null}
+        </div>
+      )}
+    </div>
+  );
+}
+
+export function SpanTrends({ rows }: { rows: RunSpanPercentileRow[] }) {
+  const days = Array.from(new Set(rows.map((r) => r.day))).sort();
+  const names = Array.from(new Set(rows.map((r) => r.name))).sort();
+  const byKey = new Map(rows.map((r) => [`${r.name}|${r.day}`, r] as const));
+
+  return (
+    <div className="mt-4 rounded-2xl border border-zinc-200 bg-white p-4">
+      <div className="text-sm font-semibold">各环节耗时趋势</div>
+      <div className="mt-1 text-xs text-zinc-500">近 {days.length || 7} 天每日 p50 / p95</div>
+      {names.length === 0 ? (
+        <div className="mt-3 text-xs text-zinc-500">暂无耗时记录</div>
+      ) : (
+        <div className="mt-3 overflow-x-auto">
+          <table className="w-full border-collapse text-left text-xs">
+            <thead className="bg-zinc-50 text-zinc-500">
+              <tr>
+                <th className="px-3 py-2 font-medium">环节</th>
+                {days.map((d) => (
+                  <th key={d} className="px-3 py-2 font-medium">
+                    {d.slice(5)}
+                  </th>
+                ))}
+              </tr>
+            </thead>
+            <tbody>
+              {names.map((name) => (
+                <tr key={name} className="border-t border-zinc-200">
+                  <td className="px-3 py-2 font-medium text-zinc-700">{name}</td>
+                  {days.map((d) => {
+                    const r = byKey.get(`${name}|${d}`);
+                    return (
+                      <td key={d} className="px-3 py-2 text-zinc-600" title={r ? `${r.calls} 次，失败 ${r.errors} 次` : undefined}>
+                        {r ? (
+                          <span className={r.errors ? "text-red-600" : undefined}>
+                            {fmtMs(r.p50_ms)} / {fmtMs(r.p95_ms)}
+                          </span>
+                        ) : (
+                          "-"
+                        )}
+                      </td>
+                    );
+                  })}
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      )}
+    </div>
+  );
+}
@@ -2,10 +2,15 @@ import Link from "next/link";
 import { ExternalLink } from "lucide-react";
 import { getOptionalEnv } from "../../lib/env";
 import { createSupabaseAdmin } from "../../lib/supabaseAdmin";
-import type { NewsItemRow, RunLogRow } from "../../lib/types";
+import type { NewsItemRow, RunLogRow, RunSpanPercentileRow, RunSpanRow } from "../../lib/types";
 import { SyncPanel } from "../news/SyncPanel";
-import { DEFAULT_TOPIC, topicDisplayName, allTopicDisplayNames } from "../../config/topics";
-import { sourcesByTopic, SOURCE_COUNT } from "../../config/sources";
+import { RunWaterfall, SpanTrends } from "./TracePanels";
+import { DailyStatsPanel } from "./DailyStatsPanel";
+import { loadDailyStats, type StatsSummary } from "../../server/stats";
+import { loadTopics } from "../../server/topicRegistry";
+import { readStatus } from "../../server/readCache";
+import { safeTopic, topicDisplayName, allTopicDisplayNames } from "../../config/topics";
+import { buildSourceList, groupSources } from "../../config/sources";
 
 export const dynamic = "force-dynamic";
 
@@ -16,6 +21,9 @@ type PageData = {
   jobLastSuccessAt: string | null;
   latestRun: RunLogRow | null;
   latestItems: NewsItemRow[];
+  latestSpans: RunSpanRow[];
+  spanTrends: RunSpanPercentileRow[];
+  dailyStats: StatsSummary | null;
 };
 
 function pickFirst(v: string | string[] | undefined): string {
@@ -78,9 +86,16 @@ async function loadPageData(): Promise<PageData> {
       jobLastSuccessAt: null,
       latestRun: null,
       latestItems: [],
+      latestSpans: [],
+      spanTrends: [],
+      dailyStats: null,
     };
   }
+  return readStatus(loadStatusData);
+}
 
+// Cached under the "status" tag; writes and finished runs invalidate it.
+async function loadStatusData(): Promise<PageData> {
   const supabase = createSupabaseAdmin();
 
   const { data: jobRow } = await supabase
@@ -112,18 +127,36 @@ async function loadPageData(): Promise<PageData> {
     latestItems = (items ?? []) as NewsItemRow[];
   }
 
+  let latestSpans: RunSpanRow[] = [];
+  if (latestRun) {
+    const { data: spans } = await supabase
+      .from("run_span")
+      .select("span_id,parent_id,name,start_ms,duration_ms,status,error_message,attrs")
+      .eq("run_id", latestRun.id)
+      .order("span_id", { ascending: true })
+      .limit(2000);
+    latestSpans = (spans ?? []) as RunSpanRow[];
+  }
+
+  const { data: trends } = await supabase.rpc("run_span_percentiles", { p_days: 7 });
+  const dailyStats = await loadDailyStats(supabase, { days: 14 }).catch(() => null);
+
   return {
     envReady: true,
     jobLastSuccessAt: jobRow?.last_success_at ?? null,
     latestRun,
     latestItems,
+    latestSpans,
+    spanTrends: (trends ?? []) as RunSpanPercentileRow[],
+    dailyStats,
   };
 }
 
 export default async function Home({ searchParams }: { searchParams: Promise<SearchParams> }) {
   const params = await searchParams;
-  const topicRaw = pickFirst(params.topic).toUpperCase();
-  const topic = topicRaw === "CATL" || topicRaw === "XIAOMI" ? topicRaw : DEFAULT_TOPIC;
+  const topics = await loadTopics();
+  const sources = buildSourceList(topics);
+  const topic = safeTopic(pickFirst(params.topic), topics);
   const daysRaw = pickFirst(params.days).toUpperCase();
   const days = daysRaw === "1" || daysRaw === "7" || daysRaw === "30" ? daysRaw : "ALL";
   const q = sanitizeQuery(pickFirst(params.q));
@@ -148,7 +181,7 @@ export default async function Home({ searchParams }: { searchParams: Promise<Sea
             </div>
             <div>
               <div className="text-sm font-semibold leading-5">资讯日报机器人</div>
-              <div className="text-xs text-zinc-500">{allTopicDisplayNames()}</div>
+              <div className="text-xs text-zinc-500">{allTopicDisplayNames(topics)}</div>
             </div>
           </div>
           <div className="flex items-center gap-3 text-xs text-zinc-600">
@@ -164,7 +197,7 @@ export default async function Home({ searchParams }: { searchParams: Promise<Sea
       </header>
 
       <main className="mx-auto w-full max-w-6xl px-4 py-6 md:px-6">
-        <SyncPanel className="mt-0" />
+        <SyncPanel sources={sources} className="mt-0" />
 
         {!data.envReady ? (
           <div className="mt-4 rounded-2xl border border-amber-200 bg-amber-50 px-4 py-3 text-sm text-amber-800">
@@ -226,13 +259,24 @@ export default async function Home({ searchParams }: { searchParams: Promise<Sea
           </div>
         </div>
 
+        {data.dailyStats ? <DailyStatsPanel stats={data.dailyStats} topics={topics} /> : null}
+
+        {data.envReady ? (
+          <>
+            <RunWaterfall spans={data.latestSpans} />
+            <SpanTrends rows={data.spanTrends} />
+          </>
+        ) : null}
+
         <div className="mt-4 rounded-2xl border border-zinc-200 bg-white p-4">
-          <div className="text-sm font-semibold">数据源（{SOURCE_COUNT} 个）</div>
-          <div className="mt-1 text-xs text-zinc-500">每次同步时逐个抓取以下数据源</div>
+          <div className="text-sm font-semibold">数据源（{sources.length} 个）</div>
+          <div className="mt-1 text-xs text-zinc-500">
+            {topics.length} 个主题合并为以下查询，每次同步各抓取一次，再按别名归入各主题
+          </div>
           <div className="mt-3 space-y-3">
-            {sourcesByTopic().map((g) => (
-              <div key={g.topic}>
-                <div className="text-xs font-semibold text-zinc-600 mb-1">{g.displayName}</div>
+            {groupSources(sources).map((g) => (
+              <div key={g.group}>
+                <div className="text-xs font-semibold text-zinc-600 mb-1">{g.group}</div>
                 <div className="space-y-0.5">
                   {g.sources.map((s) => (
                     <div key={s.index} className="flex items-baseline gap-2 text-xs">
@@ -279,7 +323,7 @@ export default async function Home({ searchParams }: { searchParams: Promise<Sea
                   {data.latestItems.map((it) => (
                     <tr key={it.id} className="border-t border-zinc-200 hover:bg-zinc-50">
                       <td className="px-4 py-3 text-xs text-zinc-600">
-                        {topicDisplayName(it.topic)}
+                        {topicDisplayName(it.topic, topics)}
                       </td>
                       <td className="px-4 py-3">
                         <div className="line-clamp-2 font-medium text-zinc-900">{it.title_zh ?? it.title}</div>
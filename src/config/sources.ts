@@ -1,11 +1,13 @@
-import { TOPIC_CONFIG, TOPIC_KEYS, type TopicKey, topicDisplayName } from "./topics";
+import type { TopicDef, TopicKey } from "./topics";
 
 export type SourceType = "rss" | "gdelt";
 
 export type SourceDef = {
   index: number;
   type: SourceType;
-  topic: TopicKey;
+  topics: TopicKey[];
+  // display names of `topics`, e.g. "宁德时代 / 小米"
+  group: string;
   label: string;
   query: string;
   locale?: "zh-CN" | "en-US";
@@ -14,48 +16,116 @@ export type SourceDef = {
 
 const LOCALES = ["zh-CN", "en-US"] as const;
 
-function buildSourceList(): SourceDef[] {
+// A Google News search feed returns at most ~100 items, so fewer topics share an RSS query;
+// GDELT splits its time window whenever a query hits maxrecords, so it can take more.
+const RSS_QUERY_MAX_CHARS = 200;
+const RSS_TOPICS_PER_QUERY = 4;
+const GDELT_QUERY_MAX_CHARS = 250;
+const GDELT_TOPICS_PER_QUERY = 10;
+const GDELT_MAX_RECORDS = 250;
+
+function queryTerm(alias: string): string {
+  const s = alias.trim().replaceAll('"', "");
+  return /\s/.test(s) ? `"${s}"` : s;
+}
+
+function topicTerms(topic: TopicDef): string[] {
+  const terms = topic.aliases.map(queryTerm).filter(Boolean);
+  return terms.length ? terms : [queryTerm(topic.displayName)];
+}
+
+// First-fit in registry order: a group closes when the OR'd query would exceed maxChars or
+// maxTopics. A topic whose aliases alone are over the limit gets a query of its own.
+function packTopics(topics: TopicDef[], maxChars: number, maxTopics: number): Array<{ topics: TopicDef[]; terms: string[] }> {
+  const groups: Array<{ topics: TopicDef[]; terms: string[] }> = [];
+  let cur: { topics: TopicDef[]; terms: string[] } | null = null;
+  for (const topic of topics) {
+    const terms = topicTerms(topic);
+    if (cur) {
+      const merged = [...cur.terms, ...terms];
+      if (cur.topics.length < maxTopics && merged.join(" OR ").length + 2 <= maxChars) {
+        cur.topics.push(topic);
+        cur.terms = merged;
+        continue;
+      }
+      groups.push(cur);
+    }
+    cur = { topics: [topic], terms };
+  }
+  if (cur) groups.push(cur);
+  return groups;
+}
+
+function groupName(topics: TopicDef[]): string {
+  return topics.map((t) => t.displayName).join(" / ");
+}
+
+// Outbound requests scale with the number of merged queries rather than with topics: each
+// query is fetched once and its items are routed back to topics by alias match
+// (server/topicRegistry).
+export function buildSourceList(topics: TopicDef[]): SourceDef[] {
   const sources: SourceDef[] = [];
   let index = 0;
 
-  for (const topic of TOPIC_KEYS) {
-    const cfg = TOPIC_CONFIG[topic];
-    const name = cfg.displayName;
+  for (const group of packTopics(topics, RSS_QUERY_MAX_CHARS, RSS_TOPICS_PER_QUERY)) {
+    const query = group.terms.join(" OR ");
+    for (const locale of LOCALES) {
+      sources.push({
+        index: index++,
+        type: "rss",
+        topics: group.topics.map((t) => t.key),
+        group: groupName(group.topics),
+        label: `${groupName(group.topics)} RSS ${locale}`,
+        query,
+        locale,
+      });
+    }
+  }
 
-    for (const query of cfg.googleNewsQueries) {
+  // A topic's hand-tuned queries stay single-topic sources, so their items are kept even
+  // when the title names none of the aliases (as before the registry).
+  for (const topic of topics) {
+    for (const query of topic.queries) {
+      const short = query.length > 25 ? `${query.slice(0, 25)}...` : query;
       for (const locale of LOCALES) {
-        const short = query.length > 25 ? `${query.slice(0, 25)}...` : query;
         sources.push({
           index: index++,
           type: "rss",
-          topic,
-          label: `${name} RSS ${locale} "${short}"`,
+          topics: [topic.key],
+          group: groupName([topic]),
+          label: `${topic.displayName} RSS ${locale} "${short}"`,
           query,
           locale,
         });
       }
     }
+  }
 
+  for (const group of packTopics(topics, GDELT_QUERY_MAX_CHARS, GDELT_TOPICS_PER_QUERY)) {
+    // GDELT only accepts parentheses around OR'd terms
+    const query = group.terms.length > 1 ? `(${group.terms.join(" OR ")})` : group.terms[0];
     sources.push({
       index: index++,
       type: "gdelt",
-      topic,
-      label: `${name} GDELT`,
-      query: cfg.gdeltQuery,
-      maxRecords: 200,
+      topics: group.topics.map((t) => t.key),
+      group: groupName(group.topics),
+      label: `${groupName(group.topics)} GDELT`,
+      query,
+      maxRecords: GDELT_MAX_RECORDS,
     });
   }
 
   return sources;
 }
 
-export const SOURCE_LIST = buildSourceList();
-export const SOURCE_COUNT = SOURCE_LIST.length;
+export function groupSources(sources: SourceDef[]): Array<{ group: string; sources: SourceDef[] }> {
+  const groups = new Map<string, SourceDef[]>();
+  for (const s of sources) groups.set(s.group, [...(groups.get(s.group) ?? []), s]);
+  return Array.from(groups, ([group, list]) => ({ group, sources: list }));
+}
 
-export function sourcesByTopic(): Array<{ topic: TopicKey; displayName: string; sources: SourceDef[] }> {
-  return TOPIC_KEYS.map((topic) => ({
-    topic,
-    displayName: topicDisplayName(topic),
-    sources: SOURCE_LIST.filter((s) => s.topic === topic),
-  }));
+// Stable across deploys as long as the merged query is; a registry change that reshapes the
+// groups starts the new sources from job_state.last_success_at.
+export function sourceKey(source: SourceDef): string {
+  return `${source.type}|${source.locale ?? ""}|${source.query}`;
 }
@@ -1,58 +1,92 @@
-export const TOPIC_CONFIG = {
-  CATL: {
-    key: "CATL" as const,
+// Topics live in the topic_registry table (migration 021, loaded by server/topicRegistry);
+// these built-ins seed it and are the fallback when Supabase is not configured.
+
+export type TopicKey = string;
+
+export type TopicDef = {
+  key: TopicKey;
+  displayName: string;
+  // Names that identify the topic: OR'd into the merged source queries and matched
+  // against fetched titles to route items back to topics.
+  aliases: string[];
+  // Hand-tuned Google News queries fetched on their own for this topic, in addition to the
+  // merged alias queries (e.g. "宁德时代 动力电池 OR 储能", which an alias OR can't express).
+  queries: string[];
+  salienceKeywords: Record<string, number>;
+};
+
+export const BUILTIN_TOPICS: TopicDef[] = [
+  {
+    key: "CATL",
     displayName: "宁德时代",
-    googleNewsQueries: [
-      "宁德时代 OR CATL OR Contemporary Amperex",
-      "CATL battery OR CATL energy storage",
-      "宁德时代 动力电池 OR 储能",
-    ],
-    gdeltQuery: '(CATL OR "Contemporary Amperex" OR 宁德时代)',
+    aliases: ["宁德时代", "CATL", "Contemporary Amperex"],
+    queries: ["CATL battery OR CATL energy storage", "宁德时代 动力电池 OR 储能"],
+    salienceKeywords: {
+      宁德时代: 2,
+      CATL: 2,
+      "Contemporary Amperex": 2,
+      动力电池: 1,
+      储能: 1,
+      battery: 1,
+      "energy storage": 1,
+      钠离子: 1.5,
+      "sodium-ion": 1.5,
+      麒麟电池: 1.5,
+      神行: 1.5,
+      固态电池: 1.5,
+      "solid-state": 1.5,
+      曾毓群: 1.5,
+      特斯拉: 0.5,
+      Tesla: 0.5,
+    },
   },
-  XIAOMI: {
-    key: "XIAOMI" as const,
+  {
+    key: "XIAOMI",
     displayName: "小米",
-    googleNewsQueries: [
-      "小米 OR 小米集团 OR Xiaomi",
-      "小米 汽车 OR SU7 OR Xiaomi EV",
-      "Xiaomi smartphone OR Xiaomi Auto",
-    ],
-    gdeltQuery: '(Xiaomi OR 小米 OR "Xiaomi Auto" OR SU7)',
+    aliases: ["小米", "小米集团", "Xiaomi", "SU7", "YU7"],
+    queries: ["小米 汽车 OR SU7 OR Xiaomi EV", "Xiaomi smartphone OR Xiaomi Auto"],
+    salienceKeywords: {
+      小米: 2,
+      Xiaomi: 2,
+      小米汽车: 1.5,
+      "Xiaomi Auto": 1.5,
+      SU7: 1.5,
+      YU7: 1.5,
+      雷军: 1.5,
+      "Lei Jun": 1.5,
+      澎湃: 1,
+      HyperOS: 1,
+      手机: 0.5,
+      smartphone: 0.5,
+      交付: 1,
+      deliveries: 1,
+    },
   },
-} as const;
+];
 
-export type TopicKey = keyof typeof TOPIC_CONFIG;
-export const TOPIC_KEYS = Object.keys(TOPIC_CONFIG) as TopicKey[];
 export const DEFAULT_TOPIC: TopicKey = "CATL";
 
-export function topicDisplayName(key: string): string {
-  const cfg = TOPIC_CONFIG[key as TopicKey];
-  return cfg?.displayName ?? key;
+export function topicDisplayName(key: string, topics: TopicDef[] = BUILTIN_TOPICS): string {
+  return topics.find((t) => t.key === key)?.displayName ?? key;
 }
 
-export function isValidTopic(v: string): v is TopicKey {
-  return v in TOPIC_CONFIG;
+export function isValidTopic(v: string, topics: TopicDef[] = BUILTIN_TOPICS): boolean {
+  return topics.some((t) => t.key === v);
 }
 
-export function safeTopic(v: unknown): TopicKey {
-  const s = typeof v === "string" ? v.toUpperCase() : "";
-  return isValidTopic(s) ? s : DEFAULT_TOPIC;
+export function defaultTopic(topics: TopicDef[] = BUILTIN_TOPICS): TopicKey {
+  return isValidTopic(DEFAULT_TOPIC, topics) ? DEFAULT_TOPIC : (topics[0]?.key ?? DEFAULT_TOPIC);
 }
 
-export function getTopicQueries(topic: TopicKey): string[] {
-  return [...TOPIC_CONFIG[topic].googleNewsQueries];
-}
-
-export function getGdeltQuery(topic: TopicKey): string {
-  return TOPIC_CONFIG[topic].gdeltQuery;
+export function safeTopic(v: unknown, topics: TopicDef[] = BUILTIN_TOPICS): TopicKey {
+  const s = typeof v === "string" ? v.toUpperCase() : "";
+  return isValidTopic(s, topics) ? s : defaultTopic(topics);
 }
 
-export function emptyTopicRecord<T>(): Record<TopicKey, T[]> {
-  const rec = {} as Record<TopicKey, T[]>;
-  for (const k of TOPIC_KEYS) rec[k] = [];
-  return rec;
+export function getSalienceKeywords(topic: TopicKey, topics: TopicDef[] = BUILTIN_TOPICS): Record<string, number> {
+  return topics.find((t) => t.key === topic)?.salienceKeywords ?? {};
 }
 
-export function allTopicDisplayNames(): string {
-  return TOPIC_KEYS.map((k) => topicDisplayName(k)).join(" / ");
+export function allTopicDisplayNames(topics: TopicDef[] = BUILTIN_TOPICS): string {
+  return topics.map((t) => t.displayName).join(" / ");
 }
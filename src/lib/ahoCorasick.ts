@@ -0,0 +1,88 @@
+export type MultiMatcher<V> = {
+  // Values of every pattern found in text (case-insensitive).
+  match(text: string): Set<V>;
+  readonly size: number;
+};
+
+type Node = {
+  next: Map<string, number>;
+  fail: number;
+  // indices into `outputs`, including those inherited through fail links
+  out: number[];
+};
+
+type Output<V> = { length: number; value: V; wordStart: boolean; wordEnd: boolean };
+
+const WORD_CHAR = /[a-z0-9]/;
+
+function isWordChar(ch: string | undefined): boolean {
+  return ch !== undefined && WORD_CHAR.test(ch);
+}
+
+// Aho-Corasick automaton over UTF-16 code units: one pass over the text finds every
+// pattern regardless of how many there are. Latin patterns only match on word boundaries
+// ("CATL" does not hit "CATLOG"); CJK patterns match anywhere, since CJK text has no spaces.
+export function compileMatcher<V>(patterns: Array<[pattern: string, value: V]>): MultiMatcher<V> {
+  const nodes: Node[] = [{ next: new Map(), fail: 0, out: [] }];
+  const outputs: Output<V>[] = [];
+
+  for (const [raw, value] of patterns) {
+    const pattern = raw.trim().toLowerCase();
+    if (!pattern) continue;
+    let cur = 0;
+    for (let i = 0; i < pattern.length; i++) {
+      let nextIdx = nodes[cur].next.get(pattern[i]);
+      if (nextIdx === undefined) {
+        nextIdx = nodes.length;
+        nodes.push({ next: new Map(), fail: 0, out: [] });
+        nodes[cur].next.set(pattern[i], nextIdx);
+      }
+      cur = nextIdx;
+    }
+    nodes[cur].out.push(outputs.length);
+    outputs.push({
+      length: pattern.length,
+      value,
+      wordStart: isWordChar(pattern[0]),
+      wordEnd: isWordChar(pattern[pattern.length - 1]),
+    });
+  }
+
+  const queue: number[] = [];
+  for (const child of nodes[0].next.values()) queue.push(child);
+  for (let qi = 0; qi < queue.length; qi++) {
+    const idx = queue[qi];
+    for (const [unit, child] of nodes[idx].next) {
+      let f = nodes[idx].fail;
+      while (f && !nodes[f].next.has(unit)) f = nodes[f].fail;
+      const target = nodes[f].next.get(unit);
+      nodes[child].fail = target !== undefined && target !== child ? target : 0;
+      nodes[child].out.push(...nodes[nodes[child].fail].out);
+      queue.push(child);
+    }
+  }
+
+  return {
+    size: outputs.length,
+    match(text) {
+      const found = new Set<V>();
+      if (!outputs.length) return found;
+      const s = text.toLowerCase();
+      let cur = 0;
+      for (let i = 0; i < s.length; i++) {
+        const unit = s[i];
+        while (cur && !nodes[cur].next.has(unit)) cur = nodes[cur].fail;
+        cur = nodes[cur].next.get(unit) ?? 0;
+        for (const o of nodes[cur].out) {
+          const out = outputs[o];
+          if (found.has(out.value)) continue;
+          const start = i - out.length + 1;
+          if (out.wordStart && isWordChar(s[start - 1])) continue;
+          if (out.wordEnd && isWordChar(s[i + 1])) continue;
+          found.add(out.value);
+        }
+      }
+      return found;
+    },
+  };
+}
@@ -0,0 +1,111 @@
+export function sleep(ms: number): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+export async function mapWithConcurrency<T, R>(
+  items: T[],
+  limit: number,
+  fn: (item: T, index: number) => Promise<R>,
+): Promise<R[]> {
+  const results = new Array<R>(items.length);
+  const workers = Math.max(1, Math.min(Math.trunc(limit) || 1, items.length));
+  let next = 0;
+
+  async function worker() {
+    for (;;) {
+      const i = next++;
+      if (i >= items.length) return;
+      results[i] = await fn(items[i], i);
+    }
+  }
+
+  await Promise.all(Array.from({ length: workers }, () => worker()));
+  return results;
+}
+
+export function createSemaphore(limit: number): <R>(fn: () => Promise<R>) => Promise<R> {
+  const max = Math.max(1, Math.trunc(limit) || 1);
+  const waiters: Array<() => void> = [];
+  let active = 0;
+
+  return async (fn) => {
+    while (active >= max) {
+      await new Promise<void>((resolve) => waiters.push(resolve));
+    }
+    active += 1;
+    try {
+      return await fn();
+    } finally {
+      active -= 1;
+      waiters.shift()?.();
+    }
+  };
+}
+
+export function createRateLimiter(perMinute: number): () => Promise<void> {
+  const interval = perMinute > 0 ? 60000 / perMinute : 0;
+  let nextAt = 0;
+  return async () => {
+    if (!interval) return;
+    const now = Date.now();
+    const at = Math.max(now, nextAt);
+    nextAt = at + interval;
+    if (at > now) await sleep(at - now);
+  };
+}
+
+export type TokenBucket = {
+  take(): Promise<void>;
+  pauseFor(ms: number): void;
+};
+
+export function createTokenBucket(params: { ratePerSec: number; burst: number }): TokenBucket {
+  const rate = Math.max(params.ratePerSec, 0.001);
+  const burst = Math.max(1, params.burst);
+  let tokens = burst;
+  let last = Date.now();
+  let pausedUntil = 0;
+  let chain: Promise<void> = Promise.resolve();
+
+  function refill() {
+    const now = Date.now();
+    tokens = Math.min(burst, tokens + ((now - last) / 1000) * rate);
+    last = now;
+  }
+
+  async function acquire() {
+    for (;;) {
+      const now = Date.now();
+      if (pausedUntil > now) {
+        await sleep(pausedUntil - now);
+        continue;
+      }
+      refill();
+      if (tokens >= 1) {
+        tokens -= 1;
+        return;
+      }
+      await sleep(Math.ceil(((1 - tokens) / rate) * 1000));
+    }
+  }
+
+  return {
+    take() {
+      const next = chain.then(acquire);
+      chain = next.catch(() => undefined);
+      return next;
+    },
+    pauseFor(ms: number) {
+      pausedUntil = Math.max(pausedUntil, Date.now() + Math.max(0, ms));
+      tokens = 0;
+    },
+  };
+}
+
+export function parseRetryAfter(value: string | null): number | null {
+  if (!value) return null;
+  const seconds = Number(value);
+  if (Number.isFinite(seconds)) return Math.max(0, seconds * 1000);
+  const at = Date.parse(value);
+  return Number.isNaN(at) ? null : Math.max(0, at - Date.now());
+}
@@ -0,0 +1,79 @@
+import { createHash } from "crypto";
+
+const NUM_HASHES = 16;
+const ROWS_PER_BAND = 2;
+export const SIMILARITY_THRESHOLD = 0.5;
+
+const SEEDS = Array.from({ length: NUM_HASHES }, (_, i) => Math.imul(i + 1, 0x9e3779b1) >>> 0);
+
+function fmix32(h: number): number {
+  let x = h >>> 0;
+  x ^= x >>> 16;
+  x = Math.imul(x, 0x85ebca6b);
+  x ^= x >>> 13;
+  x = Math.imul(x, 0xc2b2ae35);
+  x ^= x >>> 16;
+  return x >>> 0;
+}
+
+function normalize(text: string): string {
+  return text.normalize("NFKC").toLowerCase().replace(/\s+/g, " ").trim();
+}
+
+function tokenize(text: string): string[] {
+  const tokens: string[] = [];
+  for (const m of text.matchAll(/[a-z0-9]{2,}/g)) tokens.push(m[0]);
+  for (const m of text.matchAll(/[\u3400-\u9FFF]+/g)) {
+    const run = m[0];
+    if (run.length === 1) {
+      tokens.push(run);
+      continue;
+    }
+    for (let i = 0; i < run.length - 1; i++) tokens.push(run.slice(i, i + 2));
+  }
+  return tokens;
+}
+
+function shingles(title: string, summary: string | null): Set<string> {
+  const t = normalize(title);
+  const s = normalize(summary ?? "");
+  const out = new Set(tokenize(t));
+  // Google News snippets usually repeat the headline; only count a summary that adds text
+  if (s && !s.startsWith(t)) {
+    for (const tok of tokenize(s)) out.add(tok);
+  }
+  return out;
+}
+
+export type StoryFingerprint = {
+  signature: string;
+  bands: string[];
+};
+
+export function storyFingerprint(title: string, summary: string | null): StoryFingerprint {
+  const mins = new Array<number>(NUM_HASHES).fill(0xffffffff);
+  for (const tok of shingles(title, summary)) {
+    const base = createHash("md5").update(tok).digest().readUInt32BE(0);
+    for (let i = 0; i < NUM_HASHES; i++) {
+      const h = fmix32(base ^ SEEDS[i]);
+      if (h < mins[i]) mins[i] = h;
+    }
+  }
+
+  const signature = mins.map((v) => v.toString(16).padStart(8, "0")).join("");
+  const bands: string[] = [];
+  for (let b = 0; b < NUM_HASHES / ROWS_PER_BAND; b++) {
+    const rows = signature.slice(b * ROWS_PER_BAND * 8, (b + 1) * ROWS_PER_BAND * 8);
+    bands.push(`${b}:${fmix32(Number.parseInt(rows.slice(0, 8), 16) ^ Number.parseInt(rows.slice(8), 16)).toString(16)}`);
+  }
+  return { signature, bands };
+}
+
+export function fingerprintSimilarity(a: string, b: string): number {
+  if (a.length !== b.length || !a.length) return 0;
+  let same = 0;
+  for (let i = 0; i < NUM_HASHES; i++) {
+    if (a.slice(i * 8, i * 8 + 8) === b.slice(i * 8, i * 8 + 8)) same++;
+  }
+  return same / NUM_HASHES;
+}
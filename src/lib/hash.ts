@@ -31,3 +31,11 @@ export function normalizeTitle(title: string): string {
   return title.replace(/\s+/g, " ").trim();
 }
 
+
+function normalizeForKey(text: string): string {
+  return text.normalize("NFKC").toLowerCase().replace(/\s+/g, " ").trim();
+}
+
+export function translationCacheKey(title: string, summary: string | null): string {
+  return sha256(`${normalizeForKey(title)}\n${normalizeForKey(summary ?? "")}`);
+}
@@ -0,0 +1,34 @@
+export type LruCache<K, V> = {
+  get(key: K): V | undefined;
+  has(key: K): boolean;
+  set(key: K, value: V): void;
+  readonly size: number;
+};
+
+// Map iterates in insertion order, so re-inserting on every hit keeps the least recently
+// used key first and eviction is a single delete.
+export function createLru<K, V>(maxEntries: number): LruCache<K, V> {
+  const max = Math.max(1, Math.trunc(maxEntries) || 1);
+  const map = new Map<K, V>();
+
+  return {
+    get(key) {
+      if (!map.has(key)) return undefined;
+      const value = map.get(key) as V;
+      map.delete(key);
+      map.set(key, value);
+      return value;
+    },
+    has(key) {
+      return map.has(key);
+    },
+    set(key, value) {
+      map.delete(key);
+      map.set(key, value);
+      if (map.size > max) map.delete(map.keys().next().value as K);
+    },
+    get size() {
+      return map.size;
+    },
+  };
+}
@@ -0,0 +1,132 @@
+import { sleep } from "./concurrency";
+
+export type AsyncQueue<T> = AsyncIterable<T> & {
+  push(item: T): Promise<void>;
+  close(): void;
+  abort(error: unknown): void;
+};
+
+export function createQueue<T>(capacity: number): AsyncQueue<T> {
+  let items: T[] = [];
+  let closed = false;
+  let failure: { error: unknown } | null = null;
+  const takers: Array<() => void> = [];
+  const pushers: Array<() => void> = [];
+
+  function wake(list: Array<() => void>) {
+    for (const resolve of list.splice(0)) resolve();
+  }
+
+  return {
+    async push(item: T) {
+      while (!closed && items.length >= capacity) {
+        await new Promise<void>((resolve) => pushers.push(resolve));
+      }
+      if (closed) return;
+      items.push(item);
+      wake(takers);
+    },
+    close() {
+      closed = true;
+      wake(takers);
+      wake(pushers);
+    },
+    abort(error: unknown) {
+      failure = failure ?? { error };
+      items = [];
+      this.close();
+    },
+    async *[Symbol.asyncIterator]() {
+      for (;;) {
+        if (failure) throw failure.error;
+        if (items.length) {
+          const next = items.shift() as T;
+          wake(pushers);
+          yield next;
+          continue;
+        }
+        if (closed) return;
+        await new Promise<void>((resolve) => takers.push(resolve));
+      }
+    },
+  };
+}
+
+export async function* chunked<T>(source: AsyncIterable<T>, size: number, maxWaitMs: number): AsyncGenerator<T[]> {
+  const it = source[Symbol.asyncIterator]();
+  let buf: T[] = [];
+  let pending: Promise<IteratorResult<T>> | null = null;
+  for (;;) {
+    pending = pending ?? it.next();
+    const r = buf.length ? await Promise.race([pending, sleep(maxWaitMs).then(() => null)]) : await pending;
+    if (r === null) {
+      yield buf;
+      buf = [];
+      continue;
+    }
+    pending = null;
+    if (r.done) {
+      if (buf.length) yield buf;
+      return;
+    }
+    buf.push(r.value);
+    if (buf.length >= size) {
+      yield buf;
+      buf = [];
+    }
+  }
+}
+
+export type StageTiming = {
+  startedMs: number;
+  endedMs: number;
+  busyMs: number;
+  items: number;
+};
+
+export type StageClock = {
+  track<R>(stage: string, items: number, fn: () => Promise<R>): Promise<R>;
+  count(stage: string, items: number): void;
+  finish(stage: string): void;
+  snapshot(): { totalMs: number; stages: Record<string, StageTiming> };
+};
+
+export function createStageClock(): StageClock {
+  const t0 = Date.now();
+  const stages = new Map<string, StageTiming>();
+
+  function get(stage: string): StageTiming {
+    const now = Date.now() - t0;
+    let s = stages.get(stage);
+    if (!s) {
+      s = { startedMs: now, endedMs: now, busyMs: 0, items: 0 };
+      stages.set(stage, s);
+    }
+    return s;
+  }
+
+  return {
+    async track(stage, items, fn) {
+      const s = get(stage);
+      const started = Date.now();
+      try {
+        return await fn();
+      } finally {
+        s.busyMs += Date.now() - started;
+        s.items += items;
+        s.endedMs = Date.now() - t0;
+      }
+    },
+    count(stage, items) {
+      const s = get(stage);
+      s.items += items;
+      s.endedMs = Date.now() - t0;
+    },
+    finish(stage) {
+      get(stage).endedMs = Date.now() - t0;
+    },
+    snapshot() {
+      return { totalMs: Date.now() - t0, stages: Object.fromEntries(stages) };
+    },
+  };
+}
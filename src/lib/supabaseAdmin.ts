@@ -9,3 +9,4 @@ export function createSupabaseAdmin() {
   });
 }
 
+export type SupabaseAdmin = ReturnType<typeof createSupabaseAdmin>;
@@ -8,17 +8,42 @@ export type JobStateRow = {
   updated_at: string;
 };
 
+export type RunKind = "daily" | "micro" | "sync";
+
 export type RunLogRow = {
   id: string;
   started_at: string;
   ended_at: string | null;
   status: "SUCCESS" | "FAILED" | "RUNNING";
+  kind?: RunKind;
   window_start: string | null;
   window_end: string | null;
   fetched_count: number;
   deduped_count: number;
   output_count: number;
   error_message: string | null;
+  stage_timings?: Record<string, unknown> | null;
+};
+
+export type RunSpanRow = {
+  span_id: number;
+  parent_id: number | null;
+  name: string;
+  start_ms: number;
+  duration_ms: number;
+  status: "ok" | "error";
+  error_message: string | null;
+  attrs: Record<string, string | number | boolean | null>;
+};
+
+export type RunSpanPercentileRow = {
+  day: string;
+  name: string;
+  calls: number;
+  errors: number;
+  p50_ms: number;
+  p95_ms: number;
+  tokens: number;
 };
 
 export type NewsItemRow = {
@@ -33,7 +58,16 @@ export type NewsItemRow = {
   language: string;
   summary: string | null;
   summary_zh: string | null;
+  fingerprint: string | null;
+  fingerprint_bands: string[] | null;
+  cluster_id: string | null;
+  is_cluster_head: boolean;
+  cluster_size: number;
   created_at: string;
+  archived?: boolean;
 };
 
-export type NewNewsItem = Omit<NewsItemRow, "id" | "created_at">;
+type ClusterFields = "fingerprint" | "fingerprint_bands" | "cluster_id" | "is_cluster_head" | "cluster_size";
+
+export type NewNewsItem = Omit<NewsItemRow, "id" | "created_at" | "archived" | ClusterFields> &
+  Partial<Pick<NewsItemRow, Exclude<ClusterFields, "cluster_size">>>;
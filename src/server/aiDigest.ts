@@ -1,24 +1,11 @@
 import { getOptionalEnv } from "../lib/env";
 import type { NewsItemRow } from "../lib/types";
-import type { TopicKey } from "../config/topics";
-import { isValidTopic, TOPIC_KEYS, allTopicDisplayNames } from "../config/topics";
+import type { TopicDef, TopicKey } from "../config/topics";
+import { isValidTopic, allTopicDisplayNames } from "../config/topics";
 import { translateItemsToZh } from "./translate";
-
-type OpenAIChatResponse = {
-  choices?: Array<{
-    message?: {
-      content?: string;
-    };
-  }>;
-};
-
-type ZhipuChatResponse = {
-  choices?: Array<{
-    message?: {
-      content?: string;
-    };
-  }>;
-};
+import { chatCompletion, type LlmProvider } from "./llm";
+import { withSpan } from "./tracing";
+import { loadTopics } from "./topicRegistry";
 
 export type AiDigest = {
   overall: string;
@@ -28,7 +15,9 @@ export type AiDigest = {
   watch: Array<{ title: string; topic: TopicKey | "BOTH"; reason: string; urls: string[] }>;
 };
 
-type Provider = "zhipu" | "openai";
+type Provider = LlmProvider;
+
+export type TokenUsage = { tokens: number };
 
 function hasEnglish(text: string): boolean {
   return /[A-Za-z]/.test(text);
@@ -60,7 +49,7 @@ function extractJsonArray(text: string): unknown {
   return JSON.parse(slice);
 }
 
-function pickProvider(): Provider | null {
+export function pickDigestProvider(): Provider | null {
   const forced = (getOptionalEnv("AI_PROVIDER") ?? "").toLowerCase();
   const hasZhipu = Boolean(getOptionalEnv("ZHIPU_API_KEY") ?? getOptionalEnv("GLM"));
   const hasOpenAi = Boolean(getOptionalEnv("OPENAI_API_KEY"));
@@ -71,13 +60,16 @@ function pickProvider(): Provider | null {
   return null;
 }
 
-function normalizeTopic(v: unknown): TopicKey | "BOTH" {
-  if (typeof v === "string" && isValidTopic(v)) return v;
+function normalizeTopic(v: unknown, topics: TopicDef[]): TopicKey | "BOTH" {
+  if (typeof v === "string" && isValidTopic(v, topics)) return v;
   if (v === "BOTH") return "BOTH";
   return "BOTH";
 }
 
-function normalizeItem(v: unknown): { title: string; topic: TopicKey | "BOTH"; reason: string; urls: string[] } | null {
+function normalizeItem(
+  v: unknown,
+  topics: TopicDef[],
+): { title: string; topic: TopicKey | "BOTH"; reason: string; urls: string[] } | null {
   if (!v || typeof v !== "object") return null;
   const obj = v as Record<string, unknown>;
   const title = typeof obj.title === "string" ? obj.title.trim() : "";
@@ -88,10 +80,10 @@ function normalizeItem(v: unknown): { title: string; topic: TopicKey | "BOTH"; r
       ? urlsRaw.filter((u) => typeof u === "string").map((u) => u.trim()).filter(Boolean).slice(0, 3)
       : [];
   if (!title || !reason) return null;
-  return { title, topic: normalizeTopic(obj.topic), reason, urls };
+  return { title, topic: normalizeTopic(obj.topic, topics), reason, urls };
 }
 
-function normalizeDigest(v: unknown): AiDigest | null {
+function normalizeDigest(v: unknown, topics: TopicDef[]): AiDigest | null {
   if (!v || typeof v !== "object") return null;
   const obj = v as Record<string, unknown>;
   const overall = typeof obj.overall === "string" ? obj.overall.trim() : "";
@@ -100,10 +92,10 @@ function normalizeDigest(v: unknown): AiDigest | null {
   const bearishRaw = Array.isArray(obj.bearish) ? obj.bearish : [];
   const watchRaw = Array.isArray(obj.watch) ? obj.watch : [];
 
-  const majorChanges = majorChangesRaw.map(normalizeItem).filter(Boolean).slice(0, 5) as AiDigest["majorChanges"];
-  const bullish = bullishRaw.map(normalizeItem).filter(Boolean).slice(0, 6) as AiDigest["bullish"];
-  const bearish = bearishRaw.map(normalizeItem).filter(Boolean).slice(0, 6) as AiDigest["bearish"];
-  const watch = watchRaw.map(normalizeItem).filter(Boolean).slice(0, 5) as AiDigest["watch"];
+  const majorChanges = majorChangesRaw.map((it) => normalizeItem(it, topics)).filter(Boolean).slice(0, 5) as AiDigest["majorChanges"];
+  const bullish = bullishRaw.map((it) => normalizeItem(it, topics)).filter(Boolean).slice(0, 6) as AiDigest["bullish"];
+  const bearish = bearishRaw.map((it) => normalizeItem(it, topics)).filter(Boolean).slice(0, 6) as AiDigest["bearish"];
+  const watch = watchRaw.map((it) => normalizeItem(it, topics)).filter(Boolean).slice(0, 5) as AiDigest["watch"];
 
   if (!overall) return null;
   return { overall, majorChanges, bullish, bearish, watch };
@@ -207,86 +199,50 @@ function buildPickInput(items: AiDigestCandidate[]): PickInputItem[] {
   }));
 }
 
-async function callOpenAiPick(payload: { items: PickInputItem[] }): Promise<number[]> {
-  const apiKey = getOptionalEnv("OPENAI_API_KEY");
-  if (!apiKey) throw new Error("OpenAI API key missing");
-
-  const model =
-    getOptionalEnv("OPENAI_PICK_MODEL") ??
-    getOptionalEnv("OPENAI_DIGEST_MODEL") ??
-    getOptionalEnv("OPENAI_TRANSLATE_MODEL") ??
-    "gpt-4o-mini";
-  const body = {
-    model,
-    temperature: 0.2,
-    messages: [
-      {
-        role: "system",
-        content:
-          "你是新闻编辑。输入是一组候选新闻（包含 i、标题、来源、时间、URL）。请选出最重要的最多 30 条，优先保留对公司影响大、可信来源、重大事件（财报/监管/事故/召回/订单/量产/诉讼/合作/政策/裁员/融资/产品发布等）。输出必须是严格 JSON 数组，仅包含整数 i，按重要性降序排列，不要输出任何其他文字。",
-      },
-      { role: "user", content: JSON.stringify(payload) },
-    ],
-  };
-
-  const res = await fetch("https://api.openai.com/v1/chat/completions", {
-    method: "POST",
-    headers: { "content-type": "application/json", authorization: `Bearer ${apiKey}` },
-    body: JSON.stringify(body),
-  });
-
-  if (!res.ok) throw new Error(`OpenAI pick HTTP ${res.status}`);
-  const json = (await res.json()) as OpenAIChatResponse;
-  const content = json.choices?.[0]?.message?.content ?? "";
-  const parsed = extractJsonArray(content) as unknown[];
-  return parsed.filter((n) => typeof n === "number" && Number.isFinite(n)) as number[];
-}
-
-async function callZhipuPick(payload: { items: PickInputItem[] }): Promise<number[]> {
-  const apiKey = getOptionalEnv("ZHIPU_API_KEY") ?? getOptionalEnv("GLM");
-  if (!apiKey) throw new Error("Zhipu API key missing");
-
-  const model =
-    getOptionalEnv("ZHIPU_PICK_MODEL") ??
-    getOptionalEnv("ZHIPU_DIGEST_MODEL") ??
-    getOptionalEnv("ZHIPU_MODEL") ??
-    getOptionalEnv("GLM_MODEL") ??
-    "glm-4.6v";
-  const body = {
-    model,
-    temperature: 0.2,
-    stream: false,
+const PICK_SYSTEM_PROMPT =
+  "你是新闻编辑。输入是一组候选新闻（包含 i、标题、来源、时间、URL）。请选出最重要的最多 30 条，优先保留对公司影响大、可信来源、重大事件（财报/监管/事故/召回/订单/量产/诉讼/合作/政策/裁员/融资/产品发布等）。输出必须是严格 JSON 数组，仅包含整数 i，按重要性降序排列，不要输出任何其他文字。";
+
+async function callPick(preferred: Provider, payload: { items: PickInputItem[] }, usage?: TokenUsage): Promise<number[]> {
+  const { content, tokens } = await chatCompletion({
+    preferred,
+    label: "pick",
+    models: {
+      openai:
+        getOptionalEnv("OPENAI_PICK_MODEL") ??
+        getOptionalEnv("OPENAI_DIGEST_MODEL") ??
+        getOptionalEnv("OPENAI_TRANSLATE_MODEL") ??
+        "gpt-4o-mini",
+      zhipu:
+        getOptionalEnv("ZHIPU_PICK_MODEL") ??
+        getOptionalEnv("ZHIPU_DIGEST_MODEL") ??
+        getOptionalEnv("ZHIPU_MODEL") ??
+        getOptionalEnv("GLM_MODEL") ??
+        "glm-4.6v",
+    },
     messages: [
-      {
-        role: "system",
-        content:
-          "你是新闻编辑。输入是一组候选新闻（包含 i、标题、来源、时间、URL）。请选出最重要的最多 30 条，优先保留对公司影响大、可信来源、重大事件（财报/监管/事故/召回/订单/量产/诉讼/合作/政策/裁员/融资/产品发布等）。输出必须是严格 JSON 数组，仅包含整数 i，按重要性降序排列，不要输出任何其他文字。",
-      },
+      { role: "system", content: PICK_SYSTEM_PROMPT },
       { role: "user", content: JSON.stringify(payload) },
     ],
-  };
-
-  const res = await fetch("https://open.bigmodel.cn/api/paas/v4/chat/completions", {
-    method: "POST",
-    headers: { "content-type": "application/json", authorization: `Bearer ${apiKey}` },
-    body: JSON.stringify(body),
   });
-
-  if (!res.ok) throw new Error(`Zhipu pick HTTP ${res.status}`);
-  const json = (await res.json()) as ZhipuChatResponse;
-  const content = json.choices?.[0]?.message?.content ?? "";
+  if (usage) usage.tokens += tokens;
   const parsed = extractJsonArray(content) as unknown[];
   return parsed.filter((n) => typeof n === "number" && Number.isFinite(n)) as number[];
 }
 
-export async function pickTopNewsIndices(params: { candidates: AiDigestCandidate[]; maxItems: number }): Promise<number[]> {
+export async function pickTopNewsIndices(params: {
+  candidates: AiDigestCandidate[];
+  maxItems: number;
+  usage?: TokenUsage;
+}): Promise<number[]> {
   const enabled = (getOptionalEnv("AI_DIGEST") ?? "1") !== "0";
-  const provider = pickProvider();
+  const provider = pickDigestProvider();
   if (!enabled || !provider) return [];
 
   const maxItems = Number.isFinite(params.maxItems) ? Math.max(1, Math.min(60, params.maxItems)) : 30;
   const payload = { items: buildPickInput(params.candidates) };
-  const picked = provider === "zhipu" ? await callZhipuPick(payload) : await callOpenAiPick(payload);
+  const picked = await withSpan("ai.pick", () => callPick(provider, payload, params.usage), {
+    candidates: params.candidates.length,
+  });
 
   const n = params.candidates.length;
   const seen = new Set<number>();
@@ -302,74 +258,34 @@ export async function pickTopNewsIndices(params: { candidates: AiDigestCandidate
   return out;
 }
 
-function digestSystemPrompt(): string {
-  const names = allTopicDisplayNames();
-  const keys = TOPIC_KEYS.join("/");
+function digestSystemPrompt(topics: TopicDef[]): string {
+  const names = allTopicDisplayNames(topics);
+  const keys = topics.map((t) => t.key).join("/");
   return `你是新闻解读助手。根据输入新闻，输出简体中文摘要，帮助判断对"${names}"的潜在影响。只根据新闻内容推断，不要编造。输出必须是严格 JSON 对象：{overall:string, majorChanges:[{title,topic,reason,urls}], bullish:[...], bearish:[...], watch:[...]}. topic 只能是 ${keys}/BOTH。每个 reason 一句话，最多 40 字。每项 urls 最多 3 个。`;
 }
 
-async function callOpenAiDigest(payload: { items: ReturnType<typeof buildInput> }): Promise<AiDigest> {
-  const apiKey = getOptionalEnv("OPENAI_API_KEY");
-  if (!apiKey) throw new Error("OpenAI API key missing");
-
-  const model = getOptionalEnv("OPENAI_DIGEST_MODEL") ?? getOptionalEnv("OPENAI_TRANSLATE_MODEL") ?? "gpt-4o-mini";
-  const body = {
-    model,
-    temperature: 0.2,
-    messages: [
-      { role: "system", content: digestSystemPrompt() },
-      { role: "user", content: JSON.stringify(payload) },
-    ],
-  };
-
-  const res = await fetch("https://api.openai.com/v1/chat/completions", {
-    method: "POST",
-    headers: {
-      "content-type": "application/json",
-      authorization: `Bearer ${apiKey}`,
+async function callDigest(
+  preferred: Provider,
+  payload: unknown,
+  systemPrompt: string,
+  topics: TopicDef[],
+  usage?: TokenUsage,
+): Promise<AiDigest> {
+  const { content, provider, tokens } = await chatCompletion({
+    preferred,
+    label: "digest",
+    models: {
+      openai: getOptionalEnv("OPENAI_DIGEST_MODEL") ?? getOptionalEnv("OPENAI_TRANSLATE_MODEL") ?? "gpt-4o-mini",
+      zhipu: getOptionalEnv("ZHIPU_DIGEST_MODEL") ?? getOptionalEnv("ZHIPU_MODEL") ?? getOptionalEnv("GLM_MODEL") ?? "glm-4.6v",
     },
-    body: JSON.stringify(body),
-  });
-
-  if (!res.ok) throw new Error(`OpenAI digest HTTP ${res.status}`);
-  const json = (await res.json()) as OpenAIChatResponse;
-  const content = json.choices?.[0]?.message?.content ?? "";
-  const parsed = extractJsonObject(content);
-  const digest = normalizeDigest(parsed);
-  if (!digest) throw new Error("OpenAI digest parse failed");
-  return digest;
-}
-
-async function callZhipuDigest(payload: { items: ReturnType<typeof buildInput> }): Promise<AiDigest> {
-  const apiKey = getOptionalEnv("ZHIPU_API_KEY") ?? getOptionalEnv("GLM");
-  if (!apiKey) throw new Error("Zhipu API key missing");
-
-  const model = getOptionalEnv("ZHIPU_DIGEST_MODEL") ?? getOptionalEnv("ZHIPU_MODEL") ?? getOptionalEnv("GLM_MODEL") ?? "glm-4.6v";
-  const body = {
-    model,
-    temperature: 0.2,
-    stream: false,
     messages: [
-      { role: "system", content: digestSystemPrompt() },
+      { role: "system", content: systemPrompt },
       { role: "user", content: JSON.stringify(payload) },
     ],
-  };
-
-  const res = await fetch("https://open.bigmodel.cn/api/paas/v4/chat/completions", {
-    method: "POST",
-    headers: {
-      "content-type": "application/json",
-      authorization: `Bearer ${apiKey}`,
-    },
-    body: JSON.stringify(body),
   });
-
-  if (!res.ok) throw new Error(`Zhipu digest HTTP ${res.status}`);
-  const json = (await res.json()) as ZhipuChatResponse;
-  const content = json.choices?.[0]?.message?.content ?? "";
-  const parsed = extractJsonObject(content);
-  const digest = normalizeDigest(parsed);
-  if (!digest) throw new Error("Zhipu digest parse failed");
+  if (usage) usage.tokens += tokens;
+  const digest = normalizeDigest(extractJsonObject(content), topics);
+  if (!digest) throw new Error(`${provider === "zhipu" ? "Zhipu" : "OpenAI"} digest parse failed`);
   return digest;
 }
 
@@ -380,9 +296,10 @@ export async function buildAiDigest(params: {
   topic: TopicKey;
   q: string;
   days: string;
+  usage?: TokenUsage;
 }): Promise<AiDigest | null> {
   const enabled = (getOptionalEnv("AI_DIGEST") ?? "1") !== "0";
-  const provider = pickProvider();
+  const provider = pickDigestProvider();
   if (!enabled || !provider) return null;
 
   const maxItems = Number.parseInt(getOptionalEnv("AI_DIGEST_MAX_ITEMS") ?? "30", 10);
@@ -396,12 +313,43 @@ export async function buildAiDigest(params: {
     provider,
   });
   const now = Date.now();
-  const cached = cache.get(key);
+  // Callers that account tokens (digest jobs) skip the in-process cache: a hit would record
+  // a run that cost nothing, and the job has its own fingerprint cache with the real cost.
+  const cached = params.usage ? undefined : cache.get(key);
   if (cached && now - cached.at < 10 * 60 * 1000) return cached.value;
 
+  const topics = await loadTopics();
   const payload = { items: buildInput(slice) };
-  const digestRaw = provider === "zhipu" ? await callZhipuDigest(payload) : await callOpenAiDigest(payload);
-  const digest = await translateDigestToZh(digestRaw);
+  const systemPrompt = digestSystemPrompt(topics);
+  const digest = await withSpan(
+    "ai.digest",
+    async () => translateDigestToZh(await callDigest(provider, payload, systemPrompt, topics, params.usage)),
+    { items: slice.length },
+  );
   cache.set(key, { at: now, value: digest });
   return digest;
 }
+
+function refreshSystemPrompt(topics: TopicDef[]): string {
+  return `${digestSystemPrompt(topics)} 输入包含 previous（上一版解读）、added（新增新闻）和 removedUrls（已移出候选集的新闻链接）。请在 previous 基础上更新：删除只依赖 removedUrls 的条目，结合 added 补充或调整结论，输出完整的新版 JSON。`;
+}
+
+export async function refreshAiDigest(params: {
+  previous: AiDigest;
+  added: AiDigestCandidate[];
+  removedUrls: string[];
+  usage?: TokenUsage;
+}): Promise<AiDigest | null> {
+  const enabled = (getOptionalEnv("AI_DIGEST") ?? "1") !== "0";
+  const provider = pickDigestProvider();
+  if (!enabled || !provider) return null;
+
+  const topics = await loadTopics();
+  const payload = { previous: params.previous, added: buildInput(params.added), removedUrls: params.removedUrls };
+  const systemPrompt = refreshSystemPrompt(topics);
+  return withSpan(
+    "ai.refresh",
+    async () => translateDigestToZh(await callDigest(provider, payload, systemPrompt, topics, params.usage)),
+    { added: params.added.length, removed: params.removedUrls.length },
+  );
+}
@@ -1,12 +1,21 @@
 import { getOptionalEnv } from "../lib/env";
 import { createSupabaseAdmin } from "../lib/supabaseAdmin";
-import type { NewsItemRow } from "../lib/types";
-import type { AiDigest } from "./aiDigest";
-import { buildAiDigest, pickTopNewsIndices } from "./aiDigest";
+import { sha256 } from "../lib/hash";
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+import type { AiDigest, AiDigestCandidate, TokenUsage } from "./aiDigest";
+import { buildAiDigest, pickDigestProvider, pickTopNewsIndices, refreshAiDigest } from "./aiDigest";
+import type { LlmProvider } from "./llm";
+import { mapWithConcurrency } from "../lib/concurrency";
 import type { TopicKey } from "../config/topics";
+import { sanitizeQuery, selectNews } from "./newsQuery";
+import { rankCandidates, safeRankMode, type RankMode } from "./ranker";
+import { loadTopics } from "./topicRegistry";
+import { createTrace, runInTrace, saveTrace, setSpanAttrs, withSpan } from "./tracing";
 
 export type AiDigestJobStatus = "QUEUED" | "RUNNING" | "SUCCESS" | "FAILED";
 
+export type AiDigestCacheHit = "miss" | "exact" | "incremental";
+
 export type AiDigestJobRow = {
   id: string;
   created_at: string;
@@ -26,6 +35,13 @@ export type AiDigestJobRow = {
   error_message: string | null;
   picked: unknown | null;
   digest: unknown | null;
+  candidate_fingerprint?: string | null;
+  candidate_hashes?: string[] | null;
+  cache_hit?: AiDigestCacheHit | null;
+  tokens_used?: number;
+  tokens_saved?: number;
+  rank_mode?: RankMode;
+  include_archive?: boolean;
 };
 
 export type AiDigestJobResponse = {
@@ -39,24 +55,23 @@ export type AiDigestJobResponse = {
   nextRunAt: string | null;
   errorMessage: string | null;
   digest: AiDigest | null;
-  picked: Array<{ i: number; title: string; source: string; published_at: string; url: string }> | null;
+  picked: PickedItem[] | null;
+  cacheHit: AiDigestCacheHit | null;
+  tokensUsed: number;
+  tokensSaved: number;
+  rankMode: RankMode;
 };
 
-function sanitizeQuery(q: string): string {
-  return q.replaceAll("%", " ").replaceAll("_", " ").trim().slice(0, 80);
-}
+type PickedItem = { i: number; title: string; source: string; published_at: string; url: string };
+
+type Candidate = AiDigestCandidate & { content_hash: string; cluster_size: number | null };
+
+const CANDIDATE_LIMIT = 200;
 
 function nowIso(): string {
   return new Date().toISOString();
 }
 
-function computeSince(days: "1" | "7" | "30" | "ALL"): string | null {
-  if (days === "ALL") return null;
-  const n = Number.parseInt(days, 10);
-  const since = new Date(Date.now() - n * 24 * 60 * 60 * 1000);
-  return since.toISOString();
-}
-
 function parseDigest(v: unknown): AiDigest | null {
   if (!v || typeof v !== "object") return null;
   const obj = v as Record<string, unknown>;
@@ -65,9 +80,9 @@ function parseDigest(v: unknown): AiDigest | null {
   return obj as unknown as AiDigest;
 }
 
-function parsePicked(v: unknown): Array<{ i: number; title: string; source: string; published_at: string; url: string }> | null {
+function parsePicked(v: unknown): PickedItem[] | null {
   if (!Array.isArray(v)) return null;
-  const out: Array<{ i: number; title: string; source: string; published_at: string; url: string }> = [];
+  const out: PickedItem[] = [];
   for (const row of v) {
     if (!row || typeof row !== "object") continue;
     const r = row as Record<string, unknown>;
@@ -82,11 +97,7 @@ function parsePicked(v: unknown): Array<{ i: number; title: string; source: stri
   return out.length ? out : [];
 }
 
-export async function getJob(jobId: string): Promise<AiDigestJobResponse | null> {
-  const supabase = createSupabaseAdmin();
-  const { data } = await supabase.from("ai_digest_job").select("*").eq("id", jobId).maybeSingle();
-  if (!data) return null;
-  const row = data as AiDigestJobRow;
+function toResponse(row: AiDigestJobRow): AiDigestJobResponse {
   return {
     id: row.id,
     status: row.status,
@@ -99,46 +110,138 @@ export async function getJob(jobId: string): Promise<AiDigestJobResponse | null>
     errorMessage: row.error_message,
     digest: parseDigest(row.digest),
     picked: parsePicked(row.picked),
+    cacheHit: row.cache_hit ?? null,
+    tokensUsed: row.tokens_used ?? 0,
+    tokensSaved: row.tokens_saved ?? 0,
+    rankMode: row.rank_mode ?? "llm",
   };
 }
 
-export async function findRecentSuccess(params: { topic: TopicKey; days: "1" | "7" | "30" | "ALL"; q: string }) {
+export async function getJob(jobId: string): Promise<AiDigestJobResponse | null> {
   const supabase = createSupabaseAdmin();
-  const since = new Date(Date.now() - 30 * 60 * 1000).toISOString();
-  const { data } = await supabase
+  const { data } = await supabase.from("ai_digest_job").select("*").eq("id", jobId).maybeSingle();
+  if (!data) return null;
+  return toResponse(data as AiDigestJobRow);
+}
+
+function envInt(name: string, fallback: number, min: number, max: number): number {
+  const n = Number.parseInt(getOptionalEnv(name) ?? "", 10);
+  return Number.isFinite(n) ? Math.max(min, Math.min(max, n)) : fallback;
+}
+
+function resolveMaxItems(): number {
+  return envInt("AI_DIGEST_MAX_ITEMS", 30, 5, 60);
+}
+
+function resolveRankMode(v?: unknown): RankMode {
+  return safeRankMode(v, safeRankMode(getOptionalEnv("AI_DIGEST_RANK_MODE")));
+}
+
+function candidateFingerprint(hashes: string[], maxItems: number, rankMode: RankMode): string {
+  return sha256(`${maxItems}\n${rankMode}\n${hashes.join("\n")}`);
+}
+
+// Cost of producing this digest from scratch, so a hit built on it can report what it saved.
+function fullCost(row: AiDigestJobRow): number {
+  return (row.tokens_used ?? 0) + (row.tokens_saved ?? 0);
+}
+
+async function findCachedSuccess(
+  supabase: SupabaseAdmin,
+  params: {
+    topic: TopicKey;
+    days: "1" | "7" | "30" | "ALL";
+    q: string;
+    rankMode: RankMode;
+    archive: boolean;
+    fingerprint?: string;
+  },
+): Promise<AiDigestJobRow | null> {
+  const ttlHours = envInt("AI_DIGEST_CACHE_TTL_HOURS", 24, 1, 24 * 30);
+  const since = new Date(Date.now() - ttlHours * 60 * 60 * 1000).toISOString();
+  let query = supabase
     .from("ai_digest_job")
     .select("*")
     .eq("topic", params.topic)
     .eq("days", params.days)
     .eq("q", sanitizeQuery(params.q))
+    .eq("rank_mode", params.rankMode)
+    .eq("include_archive", params.archive)
     .eq("status", "SUCCESS")
-    .gte("created_at", since)
-    .order("created_at", { ascending: false })
-    .limit(1);
+    .not("candidate_hashes", "is", null)
+    .gte("created_at", since);
+  if (params.fingerprint) query = query.eq("candidate_fingerprint", params.fingerprint);
+  const { data } = await query.order("created_at", { ascending: false }).limit(1);
   const row = (data?.[0] ?? null) as AiDigestJobRow | null;
-  if (!row) return null;
-  return {
-    id: row.id,
-    status: row.status,
-    createdAt: row.created_at,
-    updatedAt: row.updated_at,
-    startedAt: row.started_at,
-    endedAt: row.ended_at,
-    attempt: row.attempt,
-    nextRunAt: row.next_run_at,
-    errorMessage: row.error_message,
-    digest: parseDigest(row.digest),
-    picked: parsePicked(row.picked),
-  } satisfies AiDigestJobResponse;
+  return row && parseDigest(row.digest) ? row : null;
+}
+
+// Serves a digest instantly when the candidate set is unchanged since a previous
+// successful job. The hit is recorded as its own SUCCESS row so hit rate and tokens
+// saved show up in ai_digest_cache_stats.
+export async function findCachedDigest(params: {
+  topic: TopicKey;
+  days: "1" | "7" | "30" | "ALL";
+  q: string;
+  rankMode?: RankMode;
+  archive?: boolean;
+}): Promise<AiDigestJobResponse | null> {
+  const supabase = createSupabaseAdmin();
+  const q = sanitizeQuery(params.q);
+  const maxItems = resolveMaxItems();
+  const rankMode = resolveRankMode(params.rankMode);
+  const archive = params.archive === true;
+  const candidates = await loadCandidates({ topic: params.topic, days: params.days, q, archive, limit: CANDIDATE_LIMIT });
+  if (!candidates.length) return null;
+  const hashes = candidates.map((c) => c.content_hash);
+  const fingerprint = candidateFingerprint(hashes, maxItems, rankMode);
+  const hit = await findCachedSuccess(supabase, { topic: params.topic, days: params.days, q, rankMode, archive, fingerprint });
+  if (!hit) return null;
+
+  const now = nowIso();
+  const { data, error } = await supabase
+    .from("ai_digest_job")
+    .insert({
+      status: "SUCCESS",
+      topic: params.topic,
+      days: params.days,
+      q,
+      candidate_limit: CANDIDATE_LIMIT,
+      max_items: maxItems,
+      attempt: 0,
+      started_at: now,
+      ended_at: now,
+      candidate_count: candidates.length,
+      picked: hit.picked,
+      digest: hit.digest,
+      candidate_fingerprint: fingerprint,
+      candidate_hashes: hashes,
+      cache_hit: "exact",
+      tokens_used: 0,
+      tokens_saved: fullCost(hit),
+      rank_mode: rankMode,
+      include_archive: archive,
+      created_at: now,
+      updated_at: now,
+    })
+    .select("*")
+    .single();
+  if (error) throw error;
+  return toResponse(data as AiDigestJobRow);
 }
 
-export async function createJob(params: { topic: TopicKey; days: "1" | "7" | "30" | "ALL"; q: string }) {
+export async function createJob(params: {
+  topic: TopicKey;
+  days: "1" | "7" | "30" | "ALL";
+  q: string;
+  rankMode?: RankMode;
+  archive?: boolean;
+}) {
   const supabase = createSupabaseAdmin();
   const now = nowIso();
   const q = sanitizeQuery(params.q);
-  const candidateLimit = 200;
-  const maxItems = Number.parseInt(getOptionalEnv("AI_DIGEST_MAX_ITEMS") ?? "30", 10);
-  const max = Number.isFinite(maxItems) ? Math.max(5, Math.min(60, maxItems)) : 30;
+  const candidateLimit = CANDIDATE_LIMIT;
+  const max = resolveMaxItems();
   const { data, error } = await supabase
     .from("ai_digest_job")
     .insert({
@@ -156,6 +259,8 @@ export async function createJob(params: { topic: TopicKey; days: "1" | "7" | "30
       error_message: null,
       picked: null,
       digest: null,
+      rank_mode: resolveRankMode(params.rankMode),
+      include_archive: params.archive === true,
       created_at: now,
       updated_at: now,
     })
@@ -166,157 +271,323 @@ export async function createJob(params: { topic: TopicKey; days: "1" | "7" | "30
   return { id: row.id, runToken: row.run_token ?? "" };
 }
 
-async function loadCandidates(params: { topic: TopicKey; days: "1" | "7" | "30" | "ALL"; q: string; limit: number }) {
+async function loadCandidates(params: {
+  topic: TopicKey;
+  days: "1" | "7" | "30" | "ALL";
+  q: string;
+  archive: boolean;
+  limit: number;
+}): Promise<Candidate[]> {
   const supabase = createSupabaseAdmin();
-  const since = computeSince(params.days);
-  const q = sanitizeQuery(params.q);
-
-  let query = supabase
-    .from("news_item")
-    .select("topic,title,title_zh,summary,summary_zh,source,published_at,url")
+  const to = Math.max(0, Math.min(500, params.limit) - 1);
+  const { data } = await selectNews(
+    supabase,
+    "topic,title,title_zh,summary,summary_zh,source,published_at,url,content_hash,cluster_size",
+    { topic: params.topic, days: params.days, q: params.q, archive: params.archive },
+  )
     .order("published_at", { ascending: false })
-    .eq("topic", params.topic);
+    .order("id", { ascending: false })
+    .range(0, to);
+  return (data ?? []) as Candidate[];
+}
 
-  if (since) {
-    query = query.gte("published_at", since);
-  }
+function toPicked(candidates: Candidate[], indices: number[], maxItems: number): PickedItem[] {
+  return indices
+    .map((i) => {
+      const it = candidates[i];
+      if (!it) return null;
+      const title = (it.title_zh ?? "").trim() || it.title;
+      return { i, title, source: it.source, published_at: it.published_at, url: it.url };
+    })
+    .filter((it): it is PickedItem => Boolean(it))
+    .slice(0, maxItems);
+}
 
-  if (q) {
-    const like = `%${q}%`;
-    query = query.or(
-      [
-        `title.ilike.${like}`,
-        `title_zh.ilike.${like}`,
-        `summary.ilike.${like}`,
-        `summary_zh.ilike.${like}`,
-        `source.ilike.${like}`,
-      ].join(","),
-    );
-  }
+// When the candidate set moved by only a few items, refresh the previous digest with
+// the delta instead of re-picking and re-summarising the whole set.
+function planIncremental(previous: AiDigestJobRow, candidates: Candidate[], maxItems: number) {
+  const prevDigest = parseDigest(previous.digest);
+  const prevHashes = new Set(previous.candidate_hashes ?? []);
+  if (!prevDigest || !prevHashes.size) return null;
 
-  const to = Math.max(0, Math.min(500, params.limit) - 1);
-  const { data } = await query.range(0, to);
-  return (data ?? []) as Array<
-    Pick<NewsItemRow, "topic" | "title" | "title_zh" | "summary" | "summary_zh" | "source" | "published_at" | "url">
-  >;
+  const maxDelta = envInt("AI_DIGEST_INCREMENTAL_MAX", 8, 0, 30);
+  const added = candidates.map((c, i) => ({ c, i })).filter(({ c }) => !prevHashes.has(c.content_hash));
+  const indexByUrl = new Map(candidates.map((c, i) => [c.url, i] as const));
+  const prevPicked = parsePicked(previous.picked) ?? [];
+  const kept = prevPicked.filter((p) => indexByUrl.has(p.url));
+  const removedUrls = prevPicked.filter((p) => !indexByUrl.has(p.url)).map((p) => p.url);
+  if (added.length + removedUrls.length > maxDelta) return null;
+
+  const indices = [
+    ...kept.map((p) => indexByUrl.get(p.url) as number).slice(0, Math.max(0, maxItems - added.length)),
+    ...added.map(({ i }) => i),
+  ];
+  return { previous: prevDigest, added: added.map(({ c }) => c), removedUrls, indices };
 }
 
 function isRetryable429(message: string): boolean {
   return message.includes("HTTP 429") || message.includes("限流") || message.includes("Too Many Requests");
 }
 
-function computeNextRun(attempt: number): string {
-  const seconds = Math.min(600, 30 + attempt * 45);
+const RETRY_BACKOFF: Record<LlmProvider, { baseSeconds: number; stepSeconds: number }> = {
+  zhipu: { baseSeconds: 30, stepSeconds: 45 },
+  openai: { baseSeconds: 20, stepSeconds: 30 },
+};
+
+// Jobs throttled by the same provider would otherwise all come back at the same
+// instant and trip the limit again, so each retry lands somewhere in [cap/2, cap].
+function computeNextRun(attempt: number, provider: LlmProvider | null): string {
+  const { baseSeconds, stepSeconds } = RETRY_BACKOFF[provider ?? "zhipu"];
+  const cap = Math.min(600, baseSeconds + attempt * stepSeconds);
+  const seconds = cap / 2 + Math.random() * (cap / 2);
   return new Date(Date.now() + seconds * 1000).toISOString();
 }
 
-async function tryClaimJob(jobId: string): Promise<boolean> {
-  const supabase = createSupabaseAdmin();
+async function claimJob(supabase: SupabaseAdmin, jobId: string): Promise<AiDigestJobRow | null> {
   const now = nowIso();
   const { data } = await supabase
     .from("ai_digest_job")
     .update({ status: "RUNNING", started_at: now, updated_at: now, error_message: null })
     .eq("id", jobId)
-    .in("status", ["QUEUED"])
-    .select("id");
-  return Boolean(data?.length);
+    .eq("status", "QUEUED")
+    .select("*");
+  return ((data ?? [])[0] ?? null) as AiDigestJobRow | null;
 }
 
-export async function processJob(jobId: string): Promise<void> {
-  const supabase = createSupabaseAdmin();
-  const rowRes = await supabase.from("ai_digest_job").select("*").eq("id", jobId).maybeSingle();
-  const row = (rowRes.data ?? null) as AiDigestJobRow | null;
-  if (!row) return;
-  if (row.status === "SUCCESS" || row.status === "RUNNING") return;
+// Longer than the routes' maxDuration (300 s): a RUNNING job started before this was
+// stranded by a killed invocation and is claimed again (migration 028).
+const STALE_RUNNING_SECONDS = 330;
 
-  const claimed = await tryClaimJob(jobId);
-  if (!claimed) return;
+async function claimJobs(supabase: SupabaseAdmin, limit: number): Promise<AiDigestJobRow[]> {
+  const { data, error } = await supabase.rpc("claim_ai_digest_jobs", {
+    p_limit: limit,
+    p_stale_seconds: STALE_RUNNING_SECONDS,
+  });
+  if (error) throw error;
+  return (data ?? []) as AiDigestJobRow[];
+}
 
-  try {
-    const candidates = await loadCandidates({
-      topic: row.topic,
-      days: row.days,
-      q: row.q,
-      limit: row.candidate_limit || 200,
-    });
-
-    const maxItems = row.max_items || 30;
-    const pickedIdx = candidates.length > maxItems ? await pickTopNewsIndices({ candidates, maxItems }) : candidates.map((_, i) => i);
-    const pickedFallback = pickedIdx.length ? pickedIdx : candidates.slice(0, maxItems).map((_, i) => i);
+// local: the ranker alone chooses max_items. hybrid: the ranker narrows the set to a
+// shortlist and the LLM picks from that. llm: the LLM sees every candidate.
+async function pickCandidates(
+  candidates: Candidate[],
+  row: AiDigestJobRow,
+  rankMode: RankMode,
+  usage: TokenUsage,
+): Promise<number[]> {
+  const maxItems = row.max_items || 30;
+  if (rankMode === "llm") return pickTopNewsIndices({ candidates, maxItems, usage });
+
+  const ranked = rankCandidates(candidates, { topic: row.topic, days: row.days, topics: await loadTopics() }).map((r) => r.index);
+  if (rankMode === "local") return ranked.slice(0, maxItems);
+
+  const shortlistSize = envInt("AI_DIGEST_SHORTLIST", Math.max(maxItems + 10, maxItems * 2), maxItems, 200);
+  const shortlist = ranked.slice(0, shortlistSize);
+  if (shortlist.length <= maxItems) return shortlist;
+  const picked = await pickTopNewsIndices({ candidates: shortlist.map((i) => candidates[i]), maxItems, usage });
+  return picked.length ? picked.map((i) => shortlist[i]) : shortlist.slice(0, maxItems);
+}
+
+type JobResult = {
+  digest: AiDigest;
+  picked: PickedItem[];
+  candidateCount: number;
+  fingerprint: string;
+  hashes: string[];
+  cacheHit: AiDigestCacheHit;
+  tokensUsed: number;
+  tokensSaved: number;
+};
 
+async function executeJob(supabase: SupabaseAdmin, row: AiDigestJobRow): Promise<JobResult> {
+  const candidates = await withSpan(
+    "db.candidates",
+    () =>
+      loadCandidates({
+        topic: row.topic,
+        days: row.days,
+        q: row.q,
+        archive: row.include_archive === true,
+        limit: row.candidate_limit || CANDIDATE_LIMIT,
+      }),
+    { topic: row.topic, days: row.days },
+  );
+
+  const maxItems = row.max_items || 30;
+  const hashes = candidates.map((c) => c.content_hash);
+  const rankMode = row.rank_mode ?? "llm";
+  const fingerprint = candidateFingerprint(hashes, maxItems, rankMode);
+  const usage: TokenUsage = { tokens: 0 };
+  const cacheKey = { topic: row.topic, days: row.days, q: row.q, rankMode, archive: row.include_archive === true };
+
+  let digest: AiDigest | null = null;
+  let picked: PickedItem[] = [];
+  let cacheHit: AiDigestCacheHit = "miss";
+  let tokensSaved = 0;
+
+  const exact = await findCachedSuccess(supabase, { ...cacheKey, fingerprint });
+  const previous = exact ? null : await findCachedSuccess(supabase, cacheKey);
+  const plan = previous ? planIncremental(previous, candidates, maxItems) : null;
+
+  if (exact) {
+    digest = parseDigest(exact.digest);
+    picked = parsePicked(exact.picked) ?? [];
+    cacheHit = "exact";
+    tokensSaved = fullCost(exact);
+  } else if (previous && plan) {
+    digest = await refreshAiDigest({ previous: plan.previous, added: plan.added, removedUrls: plan.removedUrls, usage });
+    picked = toPicked(candidates, plan.indices, maxItems);
+    cacheHit = "incremental";
+    tokensSaved = Math.max(0, fullCost(previous) - usage.tokens);
+  } else {
+    const pickedIdx =
+      candidates.length > maxItems ? await pickCandidates(candidates, row, rankMode, usage) : candidates.map((_, i) => i);
+    const pickedFallback = pickedIdx.length ? pickedIdx : candidates.slice(0, maxItems).map((_, i) => i);
     const selected = pickedFallback.map((i) => candidates[i]).filter(Boolean).slice(0, maxItems);
-    const digest = await buildAiDigest({ items: selected, topic: row.topic, q: row.q, days: row.days });
-    if (!digest) throw new Error("AI 解读未启用或未配置 Key");
-
-    const picked = pickedFallback
-      .map((i) => {
-        const it = candidates[i];
-        if (!it) return null;
-        const title = (it.title_zh ?? "").trim() || it.title;
-        return { i, title, source: it.source, published_at: it.published_at, url: it.url };
-      })
-      .filter(Boolean)
-      .slice(0, maxItems);
-
-    const now = nowIso();
-    await supabase
-      .from("ai_digest_job")
-      .update({
-        status: "SUCCESS",
-        updated_at: now,
-        ended_at: now,
-        candidate_count: candidates.length,
-        attempt: row.attempt,
-        next_run_at: null,
-        error_message: null,
-        picked,
-        digest,
-      })
-      .eq("id", jobId);
-  } catch (e) {
-    const message = e instanceof Error ? e.message : "AI 解读失败";
-    const now = nowIso();
-    if (isRetryable429(message)) {
-      const next = computeNextRun((row.attempt ?? 0) + 1);
-      await supabase
+    digest = await buildAiDigest({ items: selected, topic: row.topic, q: row.q, days: row.days, usage });
+    picked = toPicked(candidates, pickedFallback, maxItems);
+  }
+  if (!digest) throw new Error("AI 解读未启用或未配置 Key");
+
+  return {
+    digest,
+    picked,
+    candidateCount: candidates.length,
+    fingerprint,
+    hashes,
+    cacheHit,
+    tokensUsed: usage.tokens,
+    tokensSaved,
+  };
+}
+
+// rows[0] is the job that actually ran; the rest were identical queued jobs collapsed
+// into it and are recorded as exact cache hits of its result.
+async function recordSuccess(supabase: SupabaseAdmin, rows: AiDigestJobRow[], result: JobResult) {
+  const now = nowIso();
+  await Promise.all(
+    rows.map((row, idx) =>
+      supabase
         .from("ai_digest_job")
         .update({
-          status: "QUEUED",
+          status: "SUCCESS",
           updated_at: now,
-          ended_at: null,
-          attempt: (row.attempt ?? 0) + 1,
-          next_run_at: next,
-          error_message: message,
+          ended_at: now,
+          candidate_count: result.candidateCount,
+          attempt: row.attempt,
+          next_run_at: null,
+          error_message: null,
+          picked: result.picked,
+          digest: result.digest,
+          candidate_fingerprint: result.fingerprint,
+          candidate_hashes: result.hashes,
+          cache_hit: idx === 0 ? result.cacheHit : "exact",
+          tokens_used: idx === 0 ? result.tokensUsed : 0,
+          tokens_saved: idx === 0 ? result.tokensSaved : result.tokensUsed + result.tokensSaved,
         })
-        .eq("id", jobId);
-      return;
-    }
-    await supabase
-      .from("ai_digest_job")
-      .update({
-        status: "FAILED",
-        updated_at: now,
-        ended_at: now,
-        attempt: (row.attempt ?? 0) + 1,
-        next_run_at: null,
-        error_message: message,
-      })
-      .eq("id", jobId);
+        .eq("id", row.id),
+    ),
+  );
+}
+
+async function recordFailure(supabase: SupabaseAdmin, rows: AiDigestJobRow[], message: string) {
+  const now = nowIso();
+  const retry = isRetryable429(message);
+  const provider = pickDigestProvider();
+  await Promise.all(
+    rows.map((row) =>
+      supabase
+        .from("ai_digest_job")
+        .update(
+          retry
+            ? {
+                status: "QUEUED",
+                updated_at: now,
+                ended_at: null,
+                attempt: (row.attempt ?? 0) + 1,
+                next_run_at: computeNextRun((row.attempt ?? 0) + 1, provider),
+                error_message: message,
+              }
+            : {
+                status: "FAILED",
+                updated_at: now,
+                ended_at: now,
+                attempt: (row.attempt ?? 0) + 1,
+                next_run_at: null,
+                error_message: message,
+              },
+        )
+        .eq("id", row.id),
+    ),
+  );
+}
+
+async function runJobGroup(supabase: SupabaseAdmin, rows: AiDigestJobRow[]): Promise<void> {
+  const trace = createTrace("ai_digest");
+  try {
+    const result = await runInTrace(trace, () =>
+      withSpan(
+        "job",
+        async () => {
+          const r = await executeJob(supabase, rows[0]);
+          setSpanAttrs({ cache_hit: r.cacheHit, candidates: r.candidateCount, tokens: r.tokensUsed });
+          return r;
+        },
+        { collapsed: rows.length, rank_mode: rows[0].rank_mode ?? "llm" },
+      ),
+    );
+    await recordSuccess(supabase, rows, result);
+  } catch (e) {
+    const message = e instanceof Error ? e.message : "AI 解读失败";
+    await recordFailure(supabase, rows, message);
   }
+  await saveTrace(supabase, trace, { jobId: rows[0].id });
 }
 
-export async function processNextJob(): Promise<string | null> {
+export async function processJob(jobId: string): Promise<void> {
   const supabase = createSupabaseAdmin();
-  const now = nowIso();
-  const { data } = await supabase
-    .from("ai_digest_job")
-    .select("id")
-    .eq("status", "QUEUED")
-    .or(`next_run_at.is.null,next_run_at.lte.${now}`)
-    .order("created_at", { ascending: true })
-    .limit(1);
-  const id = (data?.[0]?.id as string | undefined) ?? null;
-  if (!id) return null;
-  await processJob(id);
-  return id;
+  const row = await claimJob(supabase, jobId);
+  if (!row) return;
+  await runJobGroup(supabase, [row]);
+}
+
+function providerConcurrency(provider: LlmProvider | null): number {
+  if (provider === "openai") return envInt("AI_DIGEST_CONCURRENCY_OPENAI", 4, 1, 32);
+  return envInt("AI_DIGEST_CONCURRENCY_ZHIPU", 2, 1, 32);
+}
+
+// Claims up to `limit` due jobs in one statement, collapses identical requests
+// (same topic/days/q/max_items) into a single execution and runs the groups under the
+// active provider's concurrency limit.
+export async function processJobBatch(limit?: number): Promise<string[]> {
+  const supabase = createSupabaseAdmin();
+  const n = limit ?? envInt("AI_DIGEST_WORKER_BATCH", 8, 1, 50);
+  const rows = await claimJobs(supabase, Math.max(1, Math.min(50, n)));
+  if (!rows.length) return [];
+
+  const groups = new Map<string, AiDigestJobRow[]>();
+  for (const row of rows) {
+    const key = JSON.stringify([
+      row.topic,
+      row.days,
+      row.q,
+      row.max_items,
+      row.candidate_limit,
+      row.rank_mode,
+      row.include_archive === true,
+    ]);
+    const group = groups.get(key);
+    if (group) group.push(row);
+    else groups.set(key, [row]);
+  }
+
+  await mapWithConcurrency(Array.from(groups.values()), providerConcurrency(pickDigestProvider()), (group) =>
+    runJobGroup(supabase, group),
+  );
+  return rows.map((r) => r.id);
+}
+
+export async function processNextJob(): Promise<string | null> {
+  const ids = await processJobBatch(1);
+  return ids[0] ?? null;
 }
@@ -0,0 +1,149 @@
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+import type { NewNewsItem } from "../lib/types";
+import { mapWithConcurrency } from "../lib/concurrency";
+import { fingerprintSimilarity, SIMILARITY_THRESHOLD, storyFingerprint } from "../lib/fingerprint";
+
+const LOOKBACK_DAYS = 14;
+const BAND_CHUNK_SIZE = 300;
+
+type ClusterRef = { fingerprint: string; clusterId: string };
+
+// Carries the band index across calls so a streaming ingest can cluster chunk by
+// chunk without re-reading bands it has already loaded or missing rows from
+// earlier chunks that are not yet written.
+export type ClusterContext = {
+  indexes: Map<string, Map<string, ClusterRef[]>>;
+  loadedBands: Map<string, Set<string>>;
+};
+
+export function createClusterContext(): ClusterContext {
+  return { indexes: new Map(), loadedBands: new Map() };
+}
+
+function indexRef(index: Map<string, ClusterRef[]>, bands: string[], ref: ClusterRef) {
+  for (const band of bands) {
+    const list = index.get(band);
+    if (list) list.push(ref);
+    else index.set(band, [ref]);
+  }
+}
+
+async function loadBandIndex(
+  supabase: SupabaseAdmin,
+  topic: string,
+  since: string,
+  bands: string[],
+  index: Map<string, ClusterRef[]> = new Map(),
+): Promise<Map<string, ClusterRef[]>> {
+  const wanted = new Set(bands);
+  for (let offset = 0; offset < bands.length; offset += BAND_CHUNK_SIZE) {
+    const { data, error } = await supabase
+      .from("news_item")
+      .select("content_hash,cluster_id,fingerprint,fingerprint_bands")
+      .eq("topic", topic)
+      .gte("published_at", since)
+      .overlaps("fingerprint_bands", bands.slice(offset, offset + BAND_CHUNK_SIZE));
+    if (error) throw error;
+    const rows = (data ?? []) as Array<{
+      content_hash: string;
+      cluster_id: string | null;
+      fingerprint: string | null;
+      fingerprint_bands: string[] | null;
+    }>;
+    for (const row of rows) {
+      if (!row.fingerprint) continue;
+      const ref = { fingerprint: row.fingerprint, clusterId: row.cluster_id ?? row.content_hash };
+      indexRef(index, (row.fingerprint_bands ?? []).filter((b) => wanted.has(b)), ref);
+    }
+  }
+  return index;
+}
+
+function bestMatch(index: Map<string, ClusterRef[]>, fingerprint: string, bands: string[]): ClusterRef | null {
+  let best: ClusterRef | null = null;
+  let bestScore = 0;
+  for (const band of bands) {
+    for (const ref of index.get(band) ?? []) {
+      const score = fingerprintSimilarity(fingerprint, ref.fingerprint);
+      if (score >= SIMILARITY_THRESHOLD && score > bestScore) {
+        best = ref;
+        bestScore = score;
+      }
+    }
+  }
+  return best;
+}
+
+export async function assignClusters(
+  supabase: SupabaseAdmin,
+  rows: NewNewsItem[],
+  ctx: ClusterContext = createClusterContext(),
+): Promise<NewNewsItem[]> {
+  const pending = rows.filter((r) => !r.cluster_id);
+  if (!pending.length) return rows;
+
+  const assigned = new Map<string, Pick<NewNewsItem, "fingerprint" | "fingerprint_bands" | "cluster_id" | "is_cluster_head">>();
+  const topics = Array.from(new Set(pending.map((r) => r.topic)));
+
+  for (const topic of topics) {
+    const group = pending
+      .filter((r) => r.topic === topic)
+      .sort((a, b) => new Date(a.published_at).getTime() - new Date(b.published_at).getTime());
+    const fps = group.map((r) => storyFingerprint(r.title, r.summary));
+    const earliest = new Date(group[0].published_at).getTime();
+    const since = new Date(earliest - LOOKBACK_DAYS * 24 * 60 * 60 * 1000).toISOString();
+    const loaded = ctx.loadedBands.get(topic) ?? new Set<string>();
+    const bands = Array.from(new Set(fps.flatMap((fp) => fp.bands))).filter((b) => !loaded.has(b));
+    const index = await loadBandIndex(supabase, topic, since, bands, ctx.indexes.get(topic));
+    for (const b of bands) loaded.add(b);
+    ctx.loadedBands.set(topic, loaded);
+    ctx.indexes.set(topic, index);
+
+    group.forEach((row, i) => {
+      const fp = fps[i];
+      const match = bestMatch(index, fp.signature, fp.bands);
+      const clusterId = match?.clusterId ?? row.content_hash;
+      assigned.set(row.content_hash, {
+        fingerprint: fp.signature,
+        fingerprint_bands: fp.bands,
+        cluster_id: clusterId,
+        is_cluster_head: !match,
+      });
+      indexRef(index, fp.bands, { fingerprint: fp.signature, clusterId });
+    });
+  }
+
+  return rows.map((r) => {
+    const a = assigned.get(r.content_hash);
+    return a && !r.cluster_id ? { ...r, ...a } : r;
+  });
+}
+
+const BACKFILL_CONCURRENCY = 4;
+
+// Rows written before fingerprints existed never match as cluster candidates. Fills in up
+// to `limit` of them from the last LOOKBACK_DAYS, the only rows ever compared against; the
+// rows keep their own clusters.
+export async function backfillFingerprints(supabase: SupabaseAdmin, opts: { limit?: number } = {}): Promise<number> {
+  const since = new Date(Date.now() - LOOKBACK_DAYS * 24 * 60 * 60 * 1000).toISOString();
+  const { data, error } = await supabase
+    .from("news_item")
+    .select("id,published_at,title,summary")
+    .is("fingerprint", null)
+    .gte("published_at", since)
+    .order("published_at", { ascending: false })
+    .limit(Math.max(1, opts.limit ?? 500));
+  if (error) throw error;
+  const rows = (data ?? []) as Array<{ id: string; published_at: string; title: string; summary: string | null }>;
+
+  await mapWithConcurrency(rows, BACKFILL_CONCURRENCY, async (row) => {
+    const fp = storyFingerprint(row.title, row.summary);
+    const { error: updErr } = await supabase
+      .from("news_item")
+      .update({ fingerprint: fp.signature, fingerprint_bands: fp.bands })
+      .eq("id", row.id)
+      .eq("published_at", row.published_at);
+    if (updErr) throw updErr;
+  });
+  return rows.length;
+}
@@ -1,19 +1,17 @@
 import { DateTime } from "luxon";
 import { createSupabaseAdmin } from "../lib/supabaseAdmin";
-import type { NewNewsItem } from "../lib/types";
 import { computeWindowEndShanghai, toIso } from "../lib/time";
-import { fetchGoogleNewsRss } from "./googleNewsRss";
-import { fetchGdeltDocs } from "./gdelt";
-import { translateItemsToZh } from "./translate";
-import { TOPIC_KEYS, getTopicQueries, getGdeltQuery } from "../config/topics";
-
-function parseIsoOrNull(v: string | null | undefined): DateTime | null {
-  if (!v) return null;
-  const dt = DateTime.fromISO(v, { zone: "utc" });
-  return dt.isValid ? dt : null;
-}
-
-export async function runDailyCron(): Promise<{
+import { buildSourceList } from "../config/sources";
+import { runIngestPipeline } from "./ingestPipeline";
+import { acquireJobLease, INGEST_LEASE_KEY, INGEST_LEASE_TTL_MS, releaseJobLease } from "./jobLease";
+import { backfillFingerprints } from "./clustering";
+import { archiveOldNews, pruneRunSpans } from "./retention";
+import { advanceSourceWatermarks, loadSourceWatermarks, planSourceStarts } from "./sourceWatermark";
+import { invalidateStatusRead } from "./readCache";
+import { loadTopics } from "./topicRegistry";
+import { createTrace, runInTrace, saveTrace } from "./tracing";
+
+export type ScheduledIngestResult = {
   status: "SUCCESS" | "FAILED" | "SKIPPED";
   windowStart: string;
   windowEnd: string;
@@ -21,187 +19,181 @@ export async function runDailyCron(): Promise<{
   dedupedCount: number;
   outputCount: number;
   errorMessage?: string | null;
-}> {
-  const supabase = createSupabaseAdmin();
-  const now = DateTime.now();
-  const windowEndDt = computeWindowEndShanghai(now);
-  const windowEnd = toIso(windowEndDt);
-
-  const { data: running } = await supabase
-    .from("run_log")
-    .select("id,started_at,status")
-    .eq("status", "RUNNING")
-    .order("started_at", { ascending: false })
-    .limit(1);
-
-  if (running?.[0]) {
-    const started = DateTime.fromISO(running[0].started_at);
-    if (started.isValid && now.diff(started, "minutes").minutes < 45) {
-      return {
-        status: "SKIPPED",
-        windowStart: windowEnd,
-        windowEnd,
-        fetchedCount: 0,
-        dedupedCount: 0,
-        outputCount: 0,
-        errorMessage: null,
-      };
-    }
-  }
+};
 
-  const { data: jobStateRow, error: jobErr } = await supabase
-    .from("job_state")
-    .select("key,last_success_at")
-    .eq("key", "daily_news")
-    .maybeSingle();
-
-  if (jobErr) throw jobErr;
-
-  const lastSuccess = parseIsoOrNull(jobStateRow?.last_success_at ?? null);
-  const windowStartDt = lastSuccess ?? windowEndDt.minus({ days: 1 });
-  const windowStart = toIso(windowStartDt);
-
-  const { data: runRow, error: runInsertErr } = await supabase
-    .from("run_log")
-    .insert({
-      status: "RUNNING",
-      window_start: windowStart,
-      window_end: windowEnd,
-      fetched_count: 0,
-      deduped_count: 0,
-      output_count: 0,
-    })
-    .select("id")
-    .single();
-
-  if (runInsertErr) throw runInsertErr;
-  const runId = runRow.id;
-
-  try {
-    const rssPromises = TOPIC_KEYS.map((t) => fetchGoogleNewsRss(t, getTopicQueries(t)));
-    const gdeltPromises = TOPIC_KEYS.map((t) =>
-      fetchGdeltDocs({
-        topic: t,
-        query: getGdeltQuery(t),
-        windowStartIso: windowStart,
-        windowEndIso: windowEnd,
-        maxRecords: 80,
-      }),
-    );
-    const sourceResults = await Promise.allSettled([...rssPromises, ...gdeltPromises]);
-
-    const all = sourceResults
-      .filter((r): r is PromiseFulfilledResult<any[]> => r.status === "fulfilled")
-      .flatMap((r) => r.value);
-
-    const fetchedCount = all.length;
-    const windowStartMs = DateTime.fromISO(windowStart, { zone: "utc" }).toMillis();
-    const windowEndMs = DateTime.fromISO(windowEnd, { zone: "utc" }).toMillis();
-
-    const filtered = all.filter((it) => {
-      const t = it.publishedAt.getTime();
-      return t > windowStartMs && t <= windowEndMs;
-    });
-
-    const seen = new Set<string>();
-    const unique = [] as typeof filtered;
-    for (const it of filtered) {
-      if (seen.has(it.contentHash)) continue;
-      seen.add(it.contentHash);
-      unique.push(it);
-    }
+function parseIsoOrNull(v: string | null | undefined): DateTime | null {
+  if (!v) return null;
+  const dt = DateTime.fromISO(v, { zone: "utc" });
+  return dt.isValid ? dt : null;
+}
 
-    unique.sort((a, b) => b.publishedAt.getTime() - a.publishedAt.getTime());
-
-    const translateIdx = unique
-      .map((it, idx) => ({ idx, it }))
-      .filter(({ it }) => {
-        const lang = (it.language ?? "").toLowerCase();
-        return lang !== "zh" && lang !== "zh-cn" && lang !== "zh-hans";
-      });
-
-    const translatedTitles = new Map<number, { title_zh: string | null; summary_zh: string | null }>();
-    if (translateIdx.length) {
-      try {
-        const translated = await translateItemsToZh(
-          translateIdx.map(({ it }) => ({ title: it.title, summary: it.summary })),
-        );
-        translated.forEach((tr, i) => {
-          const idx = translateIdx[i]?.idx;
-          if (typeof idx === "number") {
-            translatedTitles.set(idx, { title_zh: tr.titleZh, summary_zh: tr.summaryZh });
-          }
-        });
-      } catch {
-        // best-effort translation
-      }
-    }
+export function skippedIngest(windowEnd: string): ScheduledIngestResult {
+  return {
+    status: "SKIPPED",
+    windowStart: windowEnd,
+    windowEnd,
+    fetchedCount: 0,
+    dedupedCount: 0,
+    outputCount: 0,
+    errorMessage: null,
+  };
+}
 
-    const outputCount = unique.length;
-    const dedupedCount = filtered.length - unique.length;
+// Shared by the daily cron and micro-batches. Runs under the job_state lease, and each
+// source is fetched from its own watermark (minus overlapMs) rather than one global start.
+export async function runScheduledIngest(params: {
+  mode: "daily" | "micro";
+  windowEnd: DateTime;
+  overlapMs: number;
+}): Promise<ScheduledIngestResult> {
+  const supabase = createSupabaseAdmin();
 
-    const rows: NewNewsItem[] = unique.map((it, idx) => {
-      const tr = translatedTitles.get(idx);
-      return {
-        topic: it.topic,
-        title: it.title,
-        title_zh: tr?.title_zh ?? null,
-        url: it.url,
-        source: it.source,
-        published_at: new Date(it.publishedAt).toISOString(),
-        content_hash: it.contentHash,
-        language: it.language ?? "und",
-        summary: it.summary ?? null,
-        summary_zh: tr?.summary_zh ?? null,
-      };
-    });
+  const owner = await acquireJobLease(supabase, INGEST_LEASE_KEY, INGEST_LEASE_TTL_MS);
+  if (!owner) return skippedIngest(toIso(params.windowEnd));
 
-    if (rows.length) {
-      const { error: upsertErr } = await supabase.from("news_item").upsert(rows, { onConflict: "content_hash" });
-      if (upsertErr) throw upsertErr;
-    }
+  try {
+    const { data: jobStateRow, error: jobErr } = await supabase
+      .from("job_state")
+      .select("key,last_success_at")
+      .eq("key", INGEST_LEASE_KEY)
+      .maybeSingle();
+
+    if (jobErr) throw jobErr;
+
+    const lastSuccess = parseIsoOrNull(jobStateRow?.last_success_at ?? null);
+    const fallbackStart = toIso(lastSuccess ?? params.windowEnd.minus({ days: 1 }));
+
+    const topics = await loadTopics();
+    const sources = buildSourceList(topics);
+    const watermarks = await loadSourceWatermarks(supabase, sources);
+    // Micro-batches can carry sources past the daily 08:00 end; never end a run before the
+    // furthest point already ingested, or its window would be inverted.
+    const windowEndDt = DateTime.fromMillis(
+      Math.max(
+        params.windowEnd.toMillis(),
+        lastSuccess?.toMillis() ?? 0,
+        ...Array.from(watermarks.values(), (v) => new Date(v).getTime()),
+      ),
+      { zone: "utc" },
+    );
+    const windowEnd = toIso(windowEndDt);
+    const sourceStarts = planSourceStarts(sources, watermarks, fallbackStart, params.overlapMs);
+    const windowStart = toIso(
+      DateTime.fromMillis(Math.min(...Array.from(sourceStarts.values(), (v) => new Date(v).getTime())), { zone: "utc" }),
+    );
 
-    await supabase
+    const { data: runRow, error: runInsertErr } = await supabase
       .from("run_log")
-      .update({
-        ended_at: now.toUTC().toISO(),
-        status: "SUCCESS",
+      .insert({
+        status: "RUNNING",
+        kind: params.mode,
         window_start: windowStart,
         window_end: windowEnd,
-        fetched_count: filtered.length,
-        deduped_count: dedupedCount,
-        output_count: outputCount,
-        error_message: null,
+        fetched_count: 0,
+        deduped_count: 0,
+        output_count: 0,
       })
-      .eq("id", runId);
-
-    await supabase
-      .from("job_state")
-      .update({ last_success_at: windowEnd, updated_at: now.toUTC().toISO() })
-      .eq("key", "daily_news");
+      .select("id")
+      .single();
+
+    if (runInsertErr) throw runInsertErr;
+    const runId = runRow.id;
+    const trace = createTrace(params.mode);
+
+    try {
+      const result = await runInTrace(trace, () =>
+        runIngestPipeline(supabase, {
+          windowStart,
+          windowEnd,
+          gdeltMaxRecords: 80,
+          translate: true,
+          topics,
+          sourceStarts,
+        }),
+      );
+
+      const fetchedCount = result.fetchedCount;
+      const outputCount = result.outputCount;
+      const dedupedCount = result.filteredCount - outputCount;
+
+      await supabase
+        .from("run_log")
+        .update({
+          ended_at: DateTime.now().toUTC().toISO(),
+          status: "SUCCESS",
+          window_start: windowStart,
+          window_end: windowEnd,
+          fetched_count: result.filteredCount,
+          deduped_count: dedupedCount,
+          output_count: outputCount,
+          error_message: null,
+          stage_timings: {
+            mode: params.mode,
+            total_ms: result.timings.totalMs,
+            stages: result.timings.stages,
+            source_errors: result.sourceErrors,
+          },
+        })
+        .eq("id", runId);
+
+      // failed sources keep their old watermark and are re-fetched from it next run
+      await advanceSourceWatermarks(supabase, result.completedSources, watermarks, windowEnd);
+      if (!lastSuccess || lastSuccess < windowEndDt) {
+        await supabase
+          .from("job_state")
+          .update({ last_success_at: windowEnd, updated_at: DateTime.now().toUTC().toISO() })
+          .eq("key", INGEST_LEASE_KEY);
+      }
 
-    return { status: "SUCCESS", windowStart, windowEnd, fetchedCount, dedupedCount, outputCount, errorMessage: null };
-  } catch (e) {
-    const msg = e instanceof Error ? e.message : "Unknown error";
-    await supabase
-      .from("run_log")
-      .update({
-        ended_at: now.toUTC().toISO(),
+      await saveTrace(supabase, trace, { runId });
+      return { status: "SUCCESS", windowStart, windowEnd, fetchedCount, dedupedCount, outputCount, errorMessage: null };
+    } catch (e) {
+      const msg = e instanceof Error ? e.message : "Unknown error";
+      await supabase
+        .from("run_log")
+        .update({
+          ended_at: DateTime.now().toUTC().toISO(),
+          status: "FAILED",
+          window_start: windowStart,
+          window_end: windowEnd,
+          error_message: msg,
+        })
+        .eq("id", runId);
+
+      await saveTrace(supabase, trace, { runId });
+      return {
         status: "FAILED",
-        window_start: windowStart,
-        window_end: windowEnd,
-        error_message: msg,
-      })
-      .eq("id", runId);
-
-    return {
-      status: "FAILED",
-      windowStart,
-      windowEnd,
-      fetchedCount: 0,
-      dedupedCount: 0,
-      outputCount: 0,
-      errorMessage: msg,
-    };
+        windowStart,
+        windowEnd,
+        fetchedCount: 0,
+        dedupedCount: 0,
+        outputCount: 0,
+        errorMessage: msg,
+      };
+    }
+  } finally {
+    invalidateStatusRead();
+    await releaseJobLease(supabase, INGEST_LEASE_KEY, owner).catch(() => null);
   }
 }
+
+// Retention and backfills don't touch the ingest window, so they run outside the lease and
+// still run on a day when a micro-batch holds it. Best-effort; the next cron retries.
+async function runRetention(): Promise<void> {
+  const supabase = createSupabaseAdmin();
+  const trace = createTrace("daily");
+  await runInTrace(trace, () => archiveOldNews(supabase)).catch(() => null);
+  await runInTrace(trace, () => pruneRunSpans(supabase)).catch(() => null);
+  await backfillFingerprints(supabase).catch(() => null);
+  if (trace.spans.length) await saveTrace(supabase, trace, {}).catch(() => null);
+}
+
+export async function runDailyCron(): Promise<ScheduledIngestResult> {
+  const result = await runScheduledIngest({
+    mode: "daily",
+    windowEnd: computeWindowEndShanghai(DateTime.now()),
+    overlapMs: 0,
+  });
+  await runRetention();
+  return result;
+}
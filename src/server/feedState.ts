@@ -0,0 +1,47 @@
+import { getOptionalEnv } from "../lib/env";
+import { createSupabaseAdmin } from "../lib/supabaseAdmin";
+
+export type FeedStateRow = {
+  feed_url: string;
+  etag: string | null;
+  last_modified: string | null;
+  high_water_at: string | null;
+  last_status: number | null;
+  last_bytes: number;
+  last_parse_ms: number;
+  last_item_count: number;
+  last_new_items: number;
+  fetched_at: string | null;
+  updated_at: string;
+};
+
+function stateEnabled(): boolean {
+  return Boolean(getOptionalEnv("SUPABASE_URL") && getOptionalEnv("SUPABASE_SERVICE_ROLE_KEY"));
+}
+
+export async function loadFeedStates(urls: string[]): Promise<Map<string, FeedStateRow>> {
+  const out = new Map<string, FeedStateRow>();
+  if (!urls.length || !stateEnabled()) return out;
+  try {
+    const supabase = createSupabaseAdmin();
+    const { data } = await supabase.from("rss_feed_state").select("*").in("feed_url", urls);
+    for (const row of (data ?? []) as FeedStateRow[]) out.set(row.feed_url, row);
+  } catch {
+    // state is an optimization; fall back to full fetches
+  }
+  return out;
+}
+
+export async function saveFeedStates(rows: Array<Omit<FeedStateRow, "updated_at">>): Promise<void> {
+  if (!rows.length || !stateEnabled()) return;
+  try {
+    const supabase = createSupabaseAdmin();
+    const now = new Date().toISOString();
+    await supabase.from("rss_feed_state").upsert(
+      rows.map((r) => ({ ...r, updated_at: now })),
+      { onConflict: "feed_url" },
+    );
+  } catch {
+    // best-effort
+  }
+}
@@ -1,6 +1,10 @@
 import { DateTime } from "luxon";
 import type { Topic } from "../lib/types";
 import { canonicalizeUrl, normalizeTitle, sha256 } from "../lib/hash";
+import { getOptionalEnv } from "../lib/env";
+import { httpRequest } from "./http";
+import { setSpanAttrs, withSpan } from "./tracing";
+import type { TopicRoute } from "./topicRegistry";
 
 export type GdeltFetchedItem = {
   topic: Topic;
@@ -28,6 +32,13 @@ function toGdeltDatetime(dt: DateTime): string {
   return dt.toUTC().toFormat("yyyyLLddHHmmss");
 }
 
+// ArtList returns seendate as "20250101T083000Z", which Date cannot parse.
+function parseSeenDate(v: string): Date | null {
+  const dt = DateTime.fromFormat(v, "yyyyLLdd'T'HHmmss'Z'", { zone: "utc" });
+  const d = dt.isValid ? dt.toJSDate() : new Date(v);
+  return Number.isNaN(d.getTime()) ? null : d;
+}
+
 type GdeltArticle = {
   url?: string;
   title?: string;
@@ -42,60 +53,44 @@ type GdeltResponse = {
   articles?: GdeltArticle[];
 };
 
-function sleep(ms: number): Promise<void> {
-  return new Promise((resolve) => setTimeout(resolve, ms));
+const MAX_RECORDS_CAP = 250;
+const MIN_SLICE_MS = 15 * 60 * 1000;
+
+function envNumber(name: string, fallback: number): number {
+  const n = Number(getOptionalEnv(name) ?? "");
+  return Number.isFinite(n) && n > 0 ? n : fallback;
 }
 
-async function fetchJsonOnce(url: string, timeoutMs: number): Promise<{ ok: true; data: unknown } | { ok: false; status: number; error?: string }> {
-  const ac = new AbortController();
-  const t = setTimeout(() => ac.abort(), timeoutMs);
+const GDELT_ATTEMPTS = 3;
+
+async function fetchJson(url: string, timeoutMs: number): Promise<unknown> {
+  let res;
   try {
-    const res = await fetch(url, { signal: ac.signal, headers: { "user-agent": "daily-news-bot" } });
-    if (res.status === 429) return { ok: false, status: 429 };
-    if (!res.ok) return { ok: false, status: res.status };
-    return { ok: true, data: await res.json() };
+    res = await httpRequest("gdelt", url, {
+      headers: { "user-agent": "daily-news-bot" },
+      timeoutMs,
+      attempts: GDELT_ATTEMPTS,
+    });
   } catch (e) {
-    const msg = e instanceof Error ? e.message : "fetch failed";
-    return { ok: false, status: 0, error: msg };
-  } finally {
-    clearTimeout(t);
+    throw new Error(`GDELT ${e instanceof Error ? e.message : "fetch failed"}（已重试 ${GDELT_ATTEMPTS} 次）`);
   }
-}
-
-async function fetchJson(url: string, timeoutMs: number): Promise<unknown> {
-  const maxRetries = 3;
-  let lastError = "";
-  for (let attempt = 0; attempt < maxRetries; attempt++) {
-    const result = await fetchJsonOnce(url, timeoutMs);
-    if (result.ok) return result.data;
-    lastError = result.error ?? `HTTP ${result.status}`;
-    if (attempt < maxRetries - 1) {
-      await sleep(3000 * (attempt + 1));
-      continue;
-    }
+  if (!res.ok) throw new Error(`GDELT HTTP ${res.status}`);
+  try {
+    return JSON.parse(res.text);
+  } catch {
+    throw new Error("GDELT returned non-JSON output");
   }
-  throw new Error(`GDELT ${lastError}（已重试 ${maxRetries} 次）`);
 }
 
-export async function fetchGdeltDocs(params: {
-  topic: Topic;
-  query: string;
-  windowStartIso: string;
-  windowEndIso: string;
-  maxRecords?: number;
-}): Promise<GdeltFetchedItem[]> {
-  const start = DateTime.fromISO(params.windowStartIso, { zone: "utc" });
-  const end = DateTime.fromISO(params.windowEndIso, { zone: "utc" });
-  if (!start.isValid || !end.isValid) return [];
-
-  const max = Math.min(Math.max(params.maxRecords ?? 50, 1), 250);
-  const q = encodeURIComponent(params.query);
-  const startDt = encodeURIComponent(toGdeltDatetime(start));
-  const endDt = encodeURIComponent(toGdeltDatetime(end));
-
-  const url = `https://api.gdeltproject.org/api/v2/doc/doc?query=${q}&mode=ArtList&format=json&sort=HybridRel&maxrecords=${max}&startdatetime=${startDt}&enddatetime=${endDt}`;
+function buildUrl(query: string, max: number, startMs: number, endMs: number): string {
+  const q = encodeURIComponent(query);
+  const startDt = encodeURIComponent(toGdeltDatetime(DateTime.fromMillis(startMs, { zone: "utc" })));
+  const endDt = encodeURIComponent(toGdeltDatetime(DateTime.fromMillis(endMs, { zone: "utc" })));
+  const base = (getOptionalEnv("GDELT_BASE_URL") ?? "https://api.gdeltproject.org").replace(/\/+$/, "");
+  return `${base}/api/v2/doc/doc?query=${q}&mode=ArtList&format=json&sort=HybridRel&maxrecords=${max}&startdatetime=${startDt}&enddatetime=${endDt}`;
+}
 
-  const raw = await fetchJson(url, 15000);
+function toItems(route: TopicRoute, raw: unknown): GdeltFetchedItem[] {
   const parsed = raw as GdeltResponse;
   const out: GdeltFetchedItem[] = [];
 
@@ -104,25 +99,145 @@ export async function fetchGdeltDocs(params: {
     const url = canonicalizeUrl(a.url ?? "");
     if (!title || !url) continue;
 
-    const publishedAt = a.seendate ? new Date(a.seendate) : null;
-    if (!publishedAt || Number.isNaN(publishedAt.getTime())) continue;
+    const publishedAt = a.seendate ? parseSeenDate(a.seendate) : null;
+    if (!publishedAt) continue;
 
     const summary = normalizeSummary(a.snippet);
     const language = a.language ? a.language : detectLanguage(`${title} ${summary ?? ""}`);
     const source = a.domain ? a.domain : a.sourceCountry ? `GDELT/${a.sourceCountry}` : "GDELT";
-    const contentHash = sha256(`${params.topic}|${url}`);
-
-    out.push({
-      topic: params.topic,
-      title,
-      summary,
-      url,
-      source,
-      publishedAt,
-      contentHash,
-      language,
+
+    for (const topic of route.classify(`${title} ${summary ?? ""}`)) {
+      out.push({
+        topic,
+        title,
+        summary,
+        url,
+        source,
+        publishedAt,
+        contentHash: sha256(`${topic}|${url}`),
+        language,
+      });
+    }
+  }
+
+  return out;
+}
+
+type SliceResult = {
+  id: number;
+  startMs: number;
+  endMs: number;
+  rawCount: number;
+  items: GdeltFetchedItem[];
+  error?: unknown;
+};
+
+// Thrown after the last batch when some slices failed and others yielded items: the caller
+// has those items but the window is incomplete, so it must not be treated as fetched.
+export class GdeltPartialError extends Error {
+  readonly failedSlices: number;
+
+  constructor(failedSlices: number, cause: unknown) {
+    super(`${failedSlices} GDELT slice(s) failed: ${cause instanceof Error ? cause.message : String(cause)}`);
+    this.name = "GdeltPartialError";
+    this.failedSlices = failedSlices;
+  }
+}
+
+export async function* streamGdeltDocs(params: {
+  route: TopicRoute;
+  query: string;
+  windowStartIso: string;
+  windowEndIso: string;
+  maxRecords?: number;
+  maxSlices?: number;
+}): AsyncGenerator<GdeltFetchedItem[]> {
+  const start = DateTime.fromISO(params.windowStartIso, { zone: "utc" });
+  const end = DateTime.fromISO(params.windowEndIso, { zone: "utc" });
+  if (!start.isValid || !end.isValid || end <= start) return;
+
+  const max = Math.min(Math.max(params.maxRecords ?? 50, 1), MAX_RECORDS_CAP);
+  const maxSlices = params.maxSlices ?? envNumber("GDELT_MAX_SLICES", 16);
+  const concurrency = envNumber("GDELT_CONCURRENCY", 3);
+
+  const queue: Array<[number, number]> = [[start.toMillis(), end.toMillis()]];
+  const inflight = new Map<number, Promise<SliceResult>>();
+  const seen = new Set<string>();
+  let issued = 0;
+  let emitted = 0;
+  let failedSlices = 0;
+  let firstError: unknown = null;
+
+  const launch = (startMs: number, endMs: number) => {
+    const id = issued++;
+    const p = withSpan(
+      "gdelt.slice",
+      async () => {
+        const raw = await fetchJson(buildUrl(params.query, max, startMs, endMs), 15000);
+        setSpanAttrs({ articles: (raw as GdeltResponse).articles?.length ?? 0 });
+        return raw;
+      },
+      { topic: params.route.topics.join(","), window_min: Math.round((endMs - startMs) / 60000) },
+    ).then(
+      (raw): SliceResult => {
+        const rawCount = (raw as GdeltResponse).articles?.length ?? 0;
+        return { id, startMs, endMs, rawCount, items: toItems(params.route, raw) };
+      },
+      (error): SliceResult => ({ id, startMs, endMs, rawCount: 0, items: [], error }),
+    );
+    inflight.set(id, p);
+  };
+
+  while (queue.length || inflight.size) {
+    while (queue.length && inflight.size < concurrency) {
+      const [s0, e0] = queue.shift() as [number, number];
+      launch(s0, e0);
+    }
+
+    const done = await Promise.race(inflight.values());
+    inflight.delete(done.id);
+
+    if (done.error) {
+      firstError = firstError ?? done.error;
+      failedSlices += 1;
+      continue;
+    }
+
+    // A slice that hit the record cap is missing articles: split it and fetch both halves.
+    const span = done.endMs - done.startMs;
+    if (done.rawCount >= max && span >= 2 * MIN_SLICE_MS && issued + queue.length + 2 <= maxSlices) {
+      const mid = done.startMs + Math.floor(span / 2);
+      queue.push([done.startMs, mid], [mid, done.endMs]);
+    }
+
+    const fresh = done.items.filter((it) => {
+      if (seen.has(it.contentHash)) return false;
+      seen.add(it.contentHash);
+      return true;
     });
+    if (fresh.length) {
+      emitted += fresh.length;
+      yield fresh;
+    }
   }
 
+  if (failedSlices) throw emitted ? new GdeltPartialError(failedSlices, firstError) : firstError;
+}
+
+export async function fetchGdeltDocs(params: {
+  route: TopicRoute;
+  query: string;
+  windowStartIso: string;
+  windowEndIso: string;
+  maxRecords?: number;
+  maxSlices?: number;
+}): Promise<GdeltFetchedItem[]> {
+  const out: GdeltFetchedItem[] = [];
+  try {
+    for await (const batch of streamGdeltDocs(params)) out.push(...batch);
+  } catch (e) {
+    // manual syncs keep no watermark, so a partial window is still worth writing
+    if (!(e instanceof GdeltPartialError)) throw e;
+  }
   return out;
 }
@@ -1,6 +1,12 @@
 import Parser from "rss-parser";
 import type { Topic } from "../lib/types";
 import { canonicalizeUrl, normalizeTitle, sha256 } from "../lib/hash";
+import { getOptionalEnv } from "../lib/env";
+import { httpRequest } from "./http";
+import { setSpanAttrs, withSpan } from "./tracing";
+import { loadFeedStates, type FeedStateRow } from "./feedState";
+import { resolveGoogleNewsUrls } from "./urlResolver";
+import type { TopicRoute } from "./topicRegistry";
 
 export type FetchedItem = {
   topic: Topic;
@@ -31,9 +37,10 @@ export const GOOGLE_NEWS_EN_US: GoogleNewsLocale = {
   ceid: "US:en",
 };
 
-function buildGoogleNewsRssUrl(query: string, locale: GoogleNewsLocale): string {
+export function buildGoogleNewsRssUrl(query: string, locale: GoogleNewsLocale): string {
   const q = encodeURIComponent(query);
-  return `https://news.google.com/rss/search?q=${q}&hl=${encodeURIComponent(locale.hl)}&gl=${encodeURIComponent(locale.gl)}&ceid=${encodeURIComponent(locale.ceid)}`;
+  const base = (getOptionalEnv("GOOGLE_NEWS_BASE_URL") ?? "https://news.google.com").replace(/\/+$/, "");
+  return `${base}/rss/search?q=${q}&hl=${encodeURIComponent(locale.hl)}&gl=${encodeURIComponent(locale.gl)}&ceid=${encodeURIComponent(locale.ceid)}`;
 }
 
 function splitGoogleTitle(raw: string | undefined): { title: string; source: string } {
@@ -57,45 +64,167 @@ function normalizeSummary(v: string | undefined): string | null {
   return s.length ? s : null;
 }
 
-export async function fetchGoogleNewsRss(topic: Topic, queries: string[]): Promise<FetchedItem[]> {
-  return fetchGoogleNewsRssWithLocales(topic, queries, [GOOGLE_NEWS_ZH_CN, GOOGLE_NEWS_EN_US]);
+export type FeedFetchStat = {
+  url: string;
+  status: number;
+  notModified: boolean;
+  bytes: number;
+  parseMs: number;
+  itemCount: number;
+  newItems: number;
+  error?: string;
+};
+
+const HIGH_WATER_OVERLAP_MS = 2 * 60 * 60 * 1000;
+const FEED_TIMEOUT_MS = 15000;
+
+const parser = new Parser();
+
+function envNumber(name: string, fallback: number): number {
+  const n = Number(getOptionalEnv(name) ?? "");
+  return Number.isFinite(n) && n >= 0 ? n : fallback;
+}
+
+async function fetchFeedXml(
+  url: string,
+  state: FeedStateRow | undefined,
+): Promise<{ status: number; xml: string | null; etag: string | null; lastModified: string | null }> {
+  const headers: Record<string, string> = { "user-agent": "daily-news-bot" };
+  if (state?.etag) headers["if-none-match"] = state.etag;
+  if (state?.last_modified) headers["if-modified-since"] = state.last_modified;
+
+  const res = await httpRequest("google_news", url, {
+    headers,
+    timeoutMs: FEED_TIMEOUT_MS,
+    hedgeAfterMs: envNumber("RSS_HEDGE_MS", 0),
+  });
+  const etag = res.headers.get("etag") ?? state?.etag ?? null;
+  const lastModified = res.headers.get("last-modified") ?? state?.last_modified ?? null;
+  if (res.status === 304) return { status: 304, xml: null, etag, lastModified };
+  if (!res.ok) throw new Error(`RSS HTTP ${res.status}`);
+  return { status: res.status, xml: res.text, etag, lastModified };
 }
 
-export async function fetchGoogleNewsRssWithLocales(
-  topic: Topic,
+// One item per topic of the route the entry mentions; none when it matches no topic.
+function toFetchedItems(route: TopicRoute, it: Parser.Item, publishedAt: Date): FetchedItem[] {
+  const { title, source } = splitGoogleTitle(it.title);
+  const url = canonicalizeUrl(it.link ?? "");
+  if (!title || !url) return [];
+  const normalizedTitle = normalizeTitle(title);
+  const summaryRaw = (it as unknown as { contentSnippet?: string; content?: string }).contentSnippet;
+  const summary = normalizeSummary(summaryRaw);
+  const language = detectLanguage(`${normalizedTitle} ${summary ?? ""}`);
+  return route.classify(`${normalizedTitle} ${summary ?? ""}`).map((topic) => ({
+    topic,
+    title: normalizedTitle,
+    summary,
+    url,
+    source,
+    publishedAt,
+    contentHash: sha256(`${topic}|${url}`),
+    language,
+  }));
+}
+
+export type FeedStateUpdate = Omit<FeedStateRow, "updated_at">;
+
+// Advanced feed states are returned rather than saved: callers save them once the items
+// are written, so a failed write is re-fetched next run instead of hidden behind a 304.
+// Non-incremental fetches neither read nor return state.
+export async function fetchGoogleNewsFeeds(
+  route: TopicRoute,
   queries: string[],
   locales: GoogleNewsLocale[],
-): Promise<FetchedItem[]> {
-  const parser = new Parser({ timeout: 15000 });
+  opts: { incremental?: boolean } = {},
+): Promise<{ items: FetchedItem[]; feeds: FeedFetchStat[]; feedStates: FeedStateUpdate[] }> {
+  const incremental = opts.incremental ?? true;
   const urls = locales.flatMap((loc) => queries.map((q) => buildGoogleNewsRssUrl(q, loc)));
-  const feeds = await Promise.allSettled(urls.map((u) => parser.parseURL(u)));
-
-  const items: FetchedItem[] = [];
-  for (const feed of feeds) {
-    if (feed.status !== "fulfilled") continue;
-    for (const it of feed.value.items ?? []) {
-      const { title, source } = splitGoogleTitle(it.title);
-      const url = canonicalizeUrl(it.link ?? "");
-      const isoDate = (it as unknown as { isoDate?: string }).isoDate;
-      const rawDate = isoDate ?? it.pubDate;
-      const publishedAt = rawDate ? new Date(rawDate) : null;
-      if (!title || !url || !publishedAt || Number.isNaN(publishedAt.getTime())) continue;
-      const contentHash = sha256(`${topic}|${url}`);
-      const normalizedTitle = normalizeTitle(title);
-      const summaryRaw = (it as unknown as { contentSnippet?: string; content?: string }).contentSnippet;
-      const summary = normalizeSummary(summaryRaw);
-      const language = detectLanguage(`${normalizedTitle} ${summary ?? ""}`);
-      items.push({
-        topic,
-        title: normalizedTitle,
-        summary,
-        url,
-        source,
-        publishedAt,
-        contentHash,
-        language,
-      });
-    }
-  }
-  return items;
+  const states = incremental ? await loadFeedStates(urls) : new Map<string, FeedStateRow>();
+
+  const results = await Promise.all(
+    urls.map(async (url) => {
+      const state = states.get(url);
+      const stat: FeedFetchStat = { url, status: 0, notModified: false, bytes: 0, parseMs: 0, itemCount: 0, newItems: 0 };
+      const items: FetchedItem[] = [];
+      const prevHigh = state?.high_water_at ? new Date(state.high_water_at).getTime() : Number.NaN;
+      const cutoff = Number.isFinite(prevHigh) ? prevHigh - HIGH_WATER_OVERLAP_MS : Number.NEGATIVE_INFINITY;
+      let high = Number.isFinite(prevHigh) ? prevHigh : 0;
+      let unmatched = 0;
+      let next: FeedStateUpdate | null = null;
+
+      try {
+        next = await withSpan(
+          "rss.feed",
+          async () => {
+            const res = await fetchFeedXml(url, state);
+            stat.status = res.status;
+            if (res.xml === null) {
+              stat.notModified = true;
+            } else {
+              stat.bytes = Buffer.byteLength(res.xml, "utf8");
+              const t0 = performance.now();
+              const feed = await parser.parseString(res.xml);
+              stat.parseMs = Math.round(performance.now() - t0);
+              stat.itemCount = feed.items?.length ?? 0;
+
+              // Google News search feeds are ordered by relevance, not date, so older items are
+              // skipped individually rather than ending the scan at the first one.
+              for (const it of feed.items ?? []) {
+                const isoDate = (it as unknown as { isoDate?: string }).isoDate;
+                const rawDate = isoDate ?? it.pubDate;
+                const publishedAt = rawDate ? new Date(rawDate) : null;
+                if (!publishedAt || Number.isNaN(publishedAt.getTime())) continue;
+                const ts = publishedAt.getTime();
+                if (ts <= cutoff) continue;
+                const routed = toFetchedItems(route, it, publishedAt);
+                if (!routed.length) {
+                  unmatched += 1;
+                  continue;
+                }
+                items.push(...routed);
+                if (ts > high) high = ts;
+              }
+              stat.newItems = items.length;
+            }
+            setSpanAttrs({
+              status: stat.status,
+              bytes: stat.bytes,
+              items: stat.itemCount,
+              new_items: stat.newItems,
+              unmatched,
+            });
+            return {
+              feed_url: url,
+              etag: res.etag,
+              last_modified: res.lastModified,
+              high_water_at: high > 0 ? new Date(high).toISOString() : null,
+              last_status: res.status,
+              last_bytes: stat.bytes,
+              last_parse_ms: stat.parseMs,
+              last_item_count: stat.itemCount,
+              last_new_items: stat.newItems,
+              fetched_at: new Date().toISOString(),
+            };
+          },
+          { topic: route.topics.join(",") },
+        );
+      } catch (e) {
+        stat.error = e instanceof Error ? e.message : "fetch failed";
+      }
+
+      return { items, stat, next };
+    }),
+  );
+
+  // Hash on the publisher URL so redirect tokens and GDELT copies of one article collapse.
+  const items = results.flatMap((r) => r.items);
+  const resolved = await resolveGoogleNewsUrls(items.map((it) => it.url));
+  return {
+    items: items.map((it) => {
+      const url = resolved.get(it.url);
+      return url ? { ...it, url, contentHash: sha256(`${it.topic}|${url}`) } : it;
+    }),
+    feeds: results.map((r) => r.stat),
+    feedStates: incremental ? results.map((r) => r.next).filter((r): r is FeedStateUpdate => Boolean(r)) : [],
+  };
 }
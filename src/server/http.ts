@@ -0,0 +1,312 @@
+import { getOptionalEnv } from "../lib/env";
+import { createSemaphore, createTokenBucket, parseRetryAfter, sleep, type TokenBucket } from "../lib/concurrency";
+
+// One outbound layer for GDELT, Google News and the LLM providers. Node's global fetch
+// already keeps a keep-alive connection pool per origin; routing every call through
+// here means they all share it, plus per-provider concurrency, token buckets,
+// Retry-After aware retries, a circuit breaker and latency/error histograms.
+
+export type HttpProvider = "gdelt" | "google_news" | "zhipu" | "openai";
+
+export const HTTP_PROVIDERS: HttpProvider[] = ["gdelt", "google_news", "zhipu", "openai"];
+
+export type HttpResult = {
+  status: number;
+  ok: boolean;
+  headers: Headers;
+  text: string;
+};
+
+export class CircuitOpenError extends Error {
+  constructor(provider: HttpProvider) {
+    super(`${provider} circuit open`);
+    this.name = "CircuitOpenError";
+  }
+}
+
+type Policy = {
+  concurrency: number;
+  ratePerSec: number;
+  burst: number;
+  timeoutMs: number;
+  attempts: number;
+};
+
+function envNumber(name: string, fallback: number): number {
+  const n = Number(getOptionalEnv(name) ?? "");
+  return Number.isFinite(n) && n > 0 ? n : fallback;
+}
+
+function policyFor(provider: HttpProvider): Policy {
+  const key = provider.toUpperCase();
+  const defaults: Record<HttpProvider, Policy> = {
+    gdelt: {
+      concurrency: 3,
+      ratePerSec: envNumber("GDELT_RPS", 0.5),
+      burst: envNumber("GDELT_BURST", 2),
+      timeoutMs: 15000,
+      attempts: 3,
+    },
+    google_news: { concurrency: 8, ratePerSec: 5, burst: 10, timeoutMs: 15000, attempts: 2 },
+    zhipu: { concurrency: 4, ratePerSec: 2, burst: 4, timeoutMs: 90000, attempts: 2 },
+    openai: { concurrency: 8, ratePerSec: 5, burst: 10, timeoutMs: 90000, attempts: 2 },
+  };
+  const d = defaults[provider];
+  return {
+    concurrency: envNumber(`HTTP_${key}_CONCURRENCY`, d.concurrency),
+    ratePerSec: envNumber(`HTTP_${key}_RPS`, d.ratePerSec),
+    burst: envNumber(`HTTP_${key}_BURST`, d.burst),
+    timeoutMs: d.timeoutMs,
+    attempts: d.attempts,
+  };
+}
+
+const LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000];
+
+type ProviderMetrics = {
+  requests: number;
+  latencyBuckets: number[];
+  latencySumMs: number;
+  errors: Record<string, number>;
+  retries: number;
+  hedges: number;
+  breakerTrips: number;
+  failovers: number;
+};
+
+type ProviderState = {
+  policy: Policy;
+  bucket: TokenBucket;
+  limit: <R>(fn: () => Promise<R>) => Promise<R>;
+  failures: number;
+  openUntil: number;
+  metrics: ProviderMetrics;
+};
+
+const states = new Map<HttpProvider, ProviderState>();
+
+function stateFor(provider: HttpProvider): ProviderState {
+  let st = states.get(provider);
+  if (!st) {
+    const policy = policyFor(provider);
+    st = {
+      policy,
+      bucket: createTokenBucket({ ratePerSec: policy.ratePerSec, burst: policy.burst }),
+      limit: createSemaphore(policy.concurrency),
+      failures: 0,
+      openUntil: 0,
+      metrics: {
+        requests: 0,
+        latencyBuckets: new Array(LATENCY_BUCKETS_MS.length + 1).fill(0),
+        latencySumMs: 0,
+        errors: {},
+        retries: 0,
+        hedges: 0,
+        breakerTrips: 0,
+        failovers: 0,
+      },
+    };
+    states.set(provider, st);
+  }
+  return st;
+}
+
+function observe(st: ProviderState, latencyMs: number, error: string | null) {
+  const m = st.metrics;
+  m.requests += 1;
+  m.latencySumMs += latencyMs;
+  const idx = LATENCY_BUCKETS_MS.findIndex((b) => latencyMs <= b);
+  m.latencyBuckets[idx < 0 ? LATENCY_BUCKETS_MS.length : idx] += 1;
+  if (error) m.errors[error] = (m.errors[error] ?? 0) + 1;
+}
+
+export function isCircuitOpen(provider: HttpProvider): boolean {
+  return stateFor(provider).openUntil > Date.now();
+}
+
+function recordOutcome(st: ProviderState, failed: boolean) {
+  if (!failed) {
+    st.failures = 0;
+    st.openUntil = 0;
+    return;
+  }
+  const threshold = envNumber("HTTP_BREAKER_THRESHOLD", 5);
+  st.failures += 1;
+  if (st.failures >= threshold) {
+    st.openUntil = Date.now() + envNumber("HTTP_BREAKER_COOLDOWN_MS", 30000);
+    // Half-open after the cooldown: one more failure re-opens immediately.
+    st.failures = threshold - 1;
+    st.metrics.breakerTrips += 1;
+  }
+}
+
+export function recordFailover(from: HttpProvider) {
+  stateFor(from).metrics.failovers += 1;
+}
+
+function errorKind(e: unknown): string {
+  if (e instanceof Error && (e.name === "TimeoutError" || e.name === "AbortError")) return "timeout";
+  return "network";
+}
+
+function isRetryableStatus(status: number): boolean {
+  return status === 429 || status >= 500;
+}
+
+async function attemptOnce(
+  st: ProviderState,
+  url: string,
+  init: RequestInit,
+  timeoutMs: number,
+  signal: AbortSignal,
+): Promise<HttpResult> {
+  await st.bucket.take();
+  return st.limit(async () => {
+    const started = performance.now();
+    try {
+      const res = await fetch(url, { ...init, signal: AbortSignal.any([signal, AbortSignal.timeout(timeoutMs)]) });
+      const text = await res.text();
+      observe(st, performance.now() - started, res.status < 400 ? null : String(res.status));
+      return { status: res.status, ok: res.ok, headers: res.headers, text };
+    } catch (e) {
+      observe(st, performance.now() - started, errorKind(e));
+      throw e;
+    }
+  });
+}
+
+// Starts a second identical request when the first has not answered within
+// hedgeAfterMs and keeps whichever finishes first. Only for idempotent GETs.
+async function hedged(
+  st: ProviderState,
+  run: (signal: AbortSignal) => Promise<HttpResult>,
+  hedgeAfterMs: number,
+): Promise<HttpResult> {
+  const controllers = [new AbortController()];
+  const first = run(controllers[0].signal);
+  const early = await Promise.race([
+    first.then(
+      (r) => ({ r }),
+      (e: unknown) => ({ e }),
+    ),
+    sleep(hedgeAfterMs).then(() => null),
+  ]);
+  if (early) {
+    if ("r" in early) return early.r;
+    throw early.e;
+  }
+
+  st.metrics.hedges += 1;
+  controllers.push(new AbortController());
+  const second = run(controllers[1].signal);
+  try {
+    return await Promise.any([first, second]);
+  } catch (e) {
+    throw e instanceof AggregateError ? e.errors[0] : e;
+  } finally {
+    for (const c of controllers) c.abort();
+  }
+}
+
+export async function httpRequest(
+  provider: HttpProvider,
+  url: string,
+  init: RequestInit & { timeoutMs?: number; attempts?: number; hedgeAfterMs?: number; deadline?: number } = {},
+): Promise<HttpResult> {
+  const st = stateFor(provider);
+  if (isCircuitOpen(provider)) {
+    st.metrics.errors.circuit_open = (st.metrics.errors.circuit_open ?? 0) + 1;
+    throw new CircuitOpenError(provider);
+  }
+
+  const { timeoutMs = st.policy.timeoutMs, attempts = st.policy.attempts, hedgeAfterMs = 0, deadline, ...fetchInit } = init;
+  // `deadline` (epoch ms) caps every attempt and stops retrying once it has passed.
+  const run = (signal: AbortSignal) =>
+    attemptOnce(st, url, fetchInit, deadline ? Math.max(1, Math.min(timeoutMs, deadline - Date.now())) : timeoutMs, signal);
+
+  let lastError: unknown = null;
+  for (let attempt = 0; attempt < attempts; attempt++) {
+    if (attempt > 0) st.metrics.retries += 1;
+    let result: HttpResult | null = null;
+    try {
+      result = hedgeAfterMs > 0 ? await hedged(st, run, hedgeAfterMs) : await run(new AbortController().signal);
+    } catch (e) {
+      lastError = e;
+    }
+
+    if (result && !isRetryableStatus(result.status)) {
+      recordOutcome(st, false);
+      return result;
+    }
+
+    let waitMs = 1000 * 2 ** attempt + Math.random() * 1000;
+    if (result?.status === 429) {
+      const retryAfterMs = parseRetryAfter(result.headers.get("retry-after"));
+      st.bucket.pauseFor(retryAfterMs ?? 5000);
+      waitMs = retryAfterMs ?? waitMs;
+    }
+    if (attempt === attempts - 1 || (deadline && Date.now() + waitMs >= deadline)) {
+      recordOutcome(st, true);
+      if (result) return result;
+      throw lastError;
+    }
+    await sleep(waitMs);
+  }
+  throw lastError ?? new Error(`${provider} request failed`);
+}
+
+export type HttpMetricsSnapshot = Record<
+  HttpProvider,
+  ProviderMetrics & { latencyBucketBoundsMs: number[]; circuitOpen: boolean }
+>;
+
+export function getHttpMetrics(): HttpMetricsSnapshot {
+  return Object.fromEntries(
+    HTTP_PROVIDERS.map((p) => {
+      const st = stateFor(p);
+      return [
+        p,
+        {
+          ...st.metrics,
+          errors: { ...st.metrics.errors },
+          latencyBuckets: st.metrics.latencyBuckets.slice(),
+          latencyBucketBoundsMs: LATENCY_BUCKETS_MS,
+          circuitOpen: isCircuitOpen(p),
+        },
+      ];
+    }),
+  ) as HttpMetricsSnapshot;
+}
+
+export function renderHttpMetrics(): string {
+  const lines: string[] = [
+    "# TYPE outbound_http_latency_ms histogram",
+    "# TYPE outbound_http_errors_total counter",
+    "# TYPE outbound_http_retries_total counter",
+    "# TYPE outbound_http_hedges_total counter",
+    "# TYPE outbound_http_breaker_trips_total counter",
+    "# TYPE outbound_http_failovers_total counter",
+    "# TYPE outbound_http_circuit_open gauge",
+  ];
+  const snapshot = getHttpMetrics();
+  for (const p of HTTP_PROVIDERS) {
+    const m = snapshot[p];
+    let cumulative = 0;
+    LATENCY_BUCKETS_MS.forEach((bound, i) => {
+      cumulative += m.latencyBuckets[i];
+      lines.push(`outbound_http_latency_ms_bucket{provider="${p}",le="${bound}"} ${cumulative}`);
+    });
+    lines.push(`outbound_http_latency_ms_bucket{provider="${p}",le="+Inf"} ${m.requests}`);
+    lines.push(`outbound_http_latency_ms_sum{provider="${p}"} ${Math.round(m.latencySumMs)}`);
+    lines.push(`outbound_http_latency_ms_count{provider="${p}"} ${m.requests}`);
+    for (const [kind, count] of Object.entries(m.errors)) {
+      lines.push(`outbound_http_errors_total{provider="${p}",kind="${kind}"} ${count}`);
+    }
+    lines.push(`outbound_http_retries_total{provider="${p}"} ${m.retries}`);
+    lines.push(`outbound_http_hedges_total{provider="${p}"} ${m.hedges}`);
+    lines.push(`outbound_http_breaker_trips_total{provider="${p}"} ${m.breakerTrips}`);
+    lines.push(`outbound_http_failovers_total{provider="${p}"} ${m.failovers}`);
+    lines.push(`outbound_http_circuit_open{provider="${p}"} ${m.circuitOpen ? 1 : 0}`);
+  }
+  return `${lines.join("\n")}\n`;
+}
@@ -0,0 +1,239 @@
+import { DateTime } from "luxon";
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+import type { NewNewsItem } from "../lib/types";
+import { chunked, createQueue, createStageClock, type AsyncQueue, type StageTiming } from "../lib/pipeline";
+import { fetchGoogleNewsFeeds, GOOGLE_NEWS_EN_US, GOOGLE_NEWS_ZH_CN, type FeedStateUpdate } from "./googleNewsRss";
+import { saveFeedStates } from "./feedState";
+import { streamGdeltDocs } from "./gdelt";
+import { translateItemsToZh } from "./translate";
+import { findExistingHashes, toNewsRow, writeNewsItems, type IngestItem } from "./newsWriter";
+import { assignClusters, createClusterContext } from "./clustering";
+import { withSpan } from "./tracing";
+import { createTopicRoute, loadTopics } from "./topicRegistry";
+import { buildSourceList, sourceKey, type SourceDef } from "../config/sources";
+import type { TopicDef } from "../config/topics";
+
+const QUEUE_CAPACITY = 200;
+const ENRICH_CHUNK = 40;
+const ENRICH_MAX_WAIT_MS = 1000;
+const WRITE_CHUNK = 200;
+const WRITE_MAX_WAIT_MS = 2000;
+
+export type IngestPipelineResult = {
+  fetchedCount: number;
+  filteredCount: number;
+  outputCount: number;
+  sourceErrors: string[];
+  // sources fetched without error; callers advance their watermarks
+  completedSources: SourceDef[];
+  timings: { totalMs: number; stages: Record<string, StageTiming> };
+};
+
+// startMs: the source's own window start; the filter stage drops its items at or before it.
+type Producer = { name: string; source: SourceDef; startMs: number; run: () => AsyncIterable<IngestItem[]> };
+
+type FetchedBatch = { startMs: number; items: IngestItem[] };
+
+function isChinese(language: string | null | undefined): boolean {
+  const lang = (language ?? "").toLowerCase();
+  return lang === "zh" || lang === "zh-cn" || lang === "zh-hans";
+}
+
+// One producer per merged query from the scheduler, not per topic; gdeltMaxRecords is a
+// per-topic budget, so a merged GDELT query asks for its topics' combined share.
+function buildProducers(
+  topics: TopicDef[],
+  windowStart: string,
+  windowEnd: string,
+  gdeltMaxRecords: number,
+  feedStates: FeedStateUpdate[],
+  sourceStarts?: Map<string, string>,
+): Producer[] {
+  return buildSourceList(topics).map((s): Producer => {
+    const route = createTopicRoute(topics, s.topics);
+    const name = `${s.type}#${s.index}:${s.topics.join("+")}${s.locale ? `:${s.locale}` : ""}`;
+    const start = sourceStarts?.get(sourceKey(s)) ?? windowStart;
+    const startMs = DateTime.fromISO(start, { zone: "utc" }).toMillis();
+    if (s.type === "rss") {
+      return {
+        name,
+        source: s,
+        startMs,
+        run: async function* () {
+          const locale = s.locale === "en-US" ? GOOGLE_NEWS_EN_US : GOOGLE_NEWS_ZH_CN;
+          const { items, feeds, feedStates: next } = await fetchGoogleNewsFeeds(route, [s.query], [locale]);
+          const failed = feeds.find((f) => f.error);
+          if (failed && feeds.every((f) => f.error)) throw new Error(failed.error);
+          yield items;
+          feedStates.push(...next);
+        },
+      };
+    }
+    return {
+      name,
+      source: s,
+      startMs,
+      run: () =>
+        streamGdeltDocs({
+          route,
+          query: s.query,
+          windowStartIso: start,
+          windowEndIso: windowEnd,
+          maxRecords: Math.min(s.maxRecords ?? gdeltMaxRecords, gdeltMaxRecords * s.topics.length),
+        }),
+    };
+  });
+}
+
+async function translateHeads(rows: NewNewsItem[]): Promise<NewNewsItem[]> {
+  const targets = rows.map((row, idx) => ({ row, idx })).filter(({ row }) => row.is_cluster_head && !isChinese(row.language));
+  if (!targets.length) return rows;
+  const out = rows.slice();
+  try {
+    const translated = await translateItemsToZh(targets.map(({ row }) => ({ title: row.title, summary: row.summary })));
+    translated.forEach((tr, i) => {
+      const idx = targets[i]?.idx;
+      if (typeof idx === "number") out[idx] = { ...out[idx], title_zh: tr.titleZh, summary_zh: tr.summaryZh };
+    });
+  } catch {
+    // best-effort translation; the failure is on the translate span
+  }
+  return out;
+}
+
+// fetch -> window filter/dedupe -> probe/cluster/translate -> chunked write, connected by
+// bounded queues so later stages start on the first items instead of waiting for every
+// source, and a slow stage applies backpressure upstream instead of growing memory.
+export async function runIngestPipeline(
+  supabase: SupabaseAdmin,
+  params: {
+    windowStart: string;
+    windowEnd: string;
+    gdeltMaxRecords: number;
+    translate: boolean;
+    topics?: TopicDef[];
+    // per-source window starts keyed by sourceKey(), applied to both the GDELT query and the
+    // filter stage; windowStart is the fallback for sources without one
+    sourceStarts?: Map<string, string>;
+  },
+): Promise<IngestPipelineResult> {
+  const clock = createStageClock();
+  const windowEndMs = DateTime.fromISO(params.windowEnd, { zone: "utc" }).toMillis();
+
+  const fetched = createQueue<FetchedBatch>(16);
+  const unique = createQueue<IngestItem>(QUEUE_CAPACITY);
+  const ready = createQueue<NewNewsItem>(QUEUE_CAPACITY);
+  const queues: AsyncQueue<unknown>[] = [fetched, unique, ready];
+
+  const sourceErrors: string[] = [];
+  const completedSources: SourceDef[] = [];
+  const feedStates: FeedStateUpdate[] = [];
+  let fetchedCount = 0;
+  let filteredCount = 0;
+  let outputCount = 0;
+
+  const stage = async (fn: () => Promise<void>, downstream: AsyncQueue<unknown> | null) => {
+    try {
+      await fn();
+      downstream?.close();
+    } catch (e) {
+      for (const q of queues) q.abort(e);
+      throw e;
+    }
+  };
+
+  const fetchStage = stage(async () => {
+    const topics = params.topics ?? (await loadTopics());
+    const producers = buildProducers(
+      topics,
+      params.windowStart,
+      params.windowEnd,
+      params.gdeltMaxRecords,
+      feedStates,
+      params.sourceStarts,
+    );
+    // a source whose watermark already reached windowEnd has nothing left to fetch
+    await Promise.all(
+      producers
+        .filter((p) => p.startMs < windowEndMs)
+        .map(async (p) => {
+          try {
+            await withSpan(
+              "source",
+              async () => {
+                for await (const items of p.run()) {
+                  fetchedCount += items.length;
+                  clock.count("fetch", items.length);
+                  await fetched.push({ startMs: p.startMs, items });
+                }
+              },
+              { source: p.name },
+            );
+            completedSources.push(p.source);
+          } catch (e) {
+            // includes GdeltPartialError: items already pushed are written, but the source
+            // stays out of completedSources so its watermark is not moved past failed slices
+            sourceErrors.push(`${p.name}: ${e instanceof Error ? e.message : String(e)}`);
+          }
+        }),
+    );
+    clock.finish("fetch");
+  }, fetched);
+
+  const filterStage = stage(async () => {
+    const seen = new Set<string>();
+    for await (const batch of fetched) {
+      for (const it of batch.items) {
+        const t = it.publishedAt.getTime();
+        if (!(t > batch.startMs && t <= windowEndMs)) continue;
+        filteredCount += 1;
+        if (seen.has(it.contentHash)) continue;
+        seen.add(it.contentHash);
+        clock.count("filter", 1);
+        await unique.push(it);
+      }
+    }
+    clock.finish("filter");
+  }, unique);
+
+  const enrichStage = stage(async () => {
+    const clusterCtx = createClusterContext();
+    for await (const chunk of chunked(unique, ENRICH_CHUNK, ENRICH_MAX_WAIT_MS)) {
+      const rows = await clock.track("enrich", chunk.length, () =>
+        withSpan(
+          "enrich",
+          async () => {
+            const existing = await findExistingHashes(supabase, chunk.map((it) => it.contentHash));
+            const fresh = chunk.filter((it) => !existing.has(it.contentHash));
+            if (!fresh.length) return [];
+            const clustered = await withSpan(
+              "cluster",
+              () => assignClusters(supabase, fresh.map((it) => toNewsRow(it)), clusterCtx),
+              { rows: fresh.length },
+            );
+            return params.translate ? translateHeads(clustered) : clustered;
+          },
+          { items: chunk.length },
+        ),
+      );
+      for (const row of rows) await ready.push(row);
+    }
+    clock.finish("enrich");
+  }, ready);
+
+  const writeStage = stage(async () => {
+    for await (const chunk of chunked(ready, WRITE_CHUNK, WRITE_MAX_WAIT_MS)) {
+      const written = await clock.track("write", chunk.length, () =>
+        withSpan("write", () => writeNewsItems(supabase, chunk), { rows: chunk.length }),
+      );
+      outputCount += written.inserted;
+    }
+    clock.finish("write");
+  }, null);
+
+  await Promise.all([fetchStage, filterStage, enrichStage, writeStage]);
+  // only now are the RSS items behind these ETags/high-water marks stored
+  await saveFeedStates(feedStates);
+
+  return { fetchedCount, filteredCount, outputCount, sourceErrors, completedSources, timings: clock.snapshot() };
+}
@@ -0,0 +1,26 @@
+import { randomUUID } from "node:crypto";
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+
+// job_state row whose lease serializes the daily, micro-batch and manual sync ingest runs
+export const INGEST_LEASE_KEY = "daily_news";
+
+// Covers the routes' maxDuration (300 s) with some slack; a run that dies without
+// releasing keeps other runs out for at most this long.
+export const INGEST_LEASE_TTL_MS = 330_000;
+
+// Returns the owner token when the lease was taken, null when another run holds it.
+export async function acquireJobLease(supabase: SupabaseAdmin, key: string, ttlMs: number): Promise<string | null> {
+  const owner = randomUUID();
+  const { data, error } = await supabase.rpc("acquire_job_lease", {
+    p_key: key,
+    p_owner: owner,
+    p_ttl_seconds: Math.ceil(ttlMs / 1000),
+  });
+  if (error) throw error;
+  return data === true ? owner : null;
+}
+
+export async function releaseJobLease(supabase: SupabaseAdmin, key: string, owner: string): Promise<void> {
+  const { error } = await supabase.rpc("release_job_lease", { p_key: key, p_owner: owner });
+  if (error) throw error;
+}
@@ -0,0 +1,107 @@
+import { getOptionalEnv } from "../lib/env";
+import { httpRequest, isCircuitOpen, recordFailover } from "./http";
+import { setSpanAttrs, withSpan } from "./tracing";
+
+export type LlmProvider = "zhipu" | "openai";
+
+export type ChatMessage = { role: "system" | "user" | "assistant"; content: string };
+
+type ChatResponse = {
+  choices?: Array<{
+    message?: {
+      content?: string;
+    };
+  }>;
+  usage?: { total_tokens?: number };
+};
+
+const DEFAULT_BASE_URL: Record<LlmProvider, string> = {
+  openai: "https://api.openai.com/v1",
+  zhipu: "https://open.bigmodel.cn/api/paas/v4",
+};
+
+const PROVIDER_NAME: Record<LlmProvider, string> = { zhipu: "Zhipu", openai: "OpenAI" };
+
+// OPENAI_BASE_URL / ZHIPU_BASE_URL point the app at a compatible gateway or at
+// scripts/mock-llm-server.mjs for offline benchmarks.
+export function chatCompletionsUrl(provider: LlmProvider): string {
+  const override = provider === "zhipu" ? getOptionalEnv("ZHIPU_BASE_URL") : getOptionalEnv("OPENAI_BASE_URL");
+  return `${(override ?? DEFAULT_BASE_URL[provider]).replace(/\/+$/, "")}/chat/completions`;
+}
+
+export function llmApiKey(provider: LlmProvider): string | null {
+  if (provider === "zhipu") return getOptionalEnv("ZHIPU_API_KEY") ?? getOptionalEnv("GLM") ?? null;
+  return getOptionalEnv("OPENAI_API_KEY") ?? null;
+}
+
+// The preferred provider first, then any other provider with a key unless LLM_FAILOVER=0.
+function providerOrder(preferred: LlmProvider): LlmProvider[] {
+  const order: LlmProvider[] = [preferred];
+  if ((getOptionalEnv("LLM_FAILOVER") ?? "1") === "0") return order;
+  for (const p of ["zhipu", "openai"] as const) {
+    if (p !== preferred && llmApiKey(p)) order.push(p);
+  }
+  return order;
+}
+
+export async function chatCompletion(params: {
+  preferred: LlmProvider;
+  label: string;
+  models: Record<LlmProvider, string>;
+  messages: ChatMessage[];
+  temperature?: number;
+  deadline?: number;
+}): Promise<{ content: string; provider: LlmProvider; tokens: number }> {
+  const order = providerOrder(params.preferred);
+  let lastError: unknown = null;
+
+  for (let i = 0; i < order.length; i++) {
+    const provider = order[i];
+    const apiKey = llmApiKey(provider);
+    if (!apiKey) {
+      lastError = new Error(`${PROVIDER_NAME[provider]} API key missing`);
+      continue;
+    }
+    if (params.deadline && Date.now() >= params.deadline) {
+      lastError ??= new Error(`${params.label} deadline reached`);
+      break;
+    }
+    // Skip an open circuit while another provider remains to try.
+    if (isCircuitOpen(provider) && i < order.length - 1) {
+      recordFailover(provider);
+      continue;
+    }
+
+    try {
+      const model = params.models[provider];
+      return await withSpan(
+        `llm.${params.label}`,
+        async () => {
+          const body = {
+            model,
+            temperature: params.temperature ?? 0.2,
+            ...(provider === "zhipu" ? { stream: false } : {}),
+            messages: params.messages,
+          };
+          const res = await httpRequest(provider, chatCompletionsUrl(provider), {
+            method: "POST",
+            headers: { "content-type": "application/json", authorization: `Bearer ${apiKey}` },
+            body: JSON.stringify(body),
+            deadline: params.deadline,
+          });
+          if (!res.ok) throw new Error(`${PROVIDER_NAME[provider]} ${params.label} HTTP ${res.status}`);
+          const json = JSON.parse(res.text) as ChatResponse;
+          const tokens = json.usage?.total_tokens ?? 0;
+          setSpanAttrs({ tokens });
+          return { content: json.choices?.[0]?.message?.content ?? "", provider, tokens };
+        },
+        { provider, model },
+      );
+    } catch (e) {
+      lastError = e;
+      if (i < order.length - 1) recordFailover(provider);
+    }
+  }
+
+  throw lastError ?? new Error(`${params.label} failed`);
+}
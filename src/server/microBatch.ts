@@ -0,0 +1,24 @@
+import { DateTime } from "luxon";
+import { getOptionalEnv } from "../lib/env";
+import { toIso } from "../lib/time";
+import { runScheduledIngest, skippedIngest, type ScheduledIngestResult } from "./dailyCron";
+
+function envInt(name: string, fallback: number, min: number, max: number): number {
+  const n = Number.parseInt(getOptionalEnv(name) ?? "", 10);
+  if (!Number.isFinite(n)) return fallback;
+  return Math.max(min, Math.min(max, n));
+}
+
+// Every few minutes (vercel.json) instead of one daily burst: each source covers the time
+// since its own watermark plus MICRO_OVERLAP_MINUTES for upstream indexing lag (GDELT
+// lists articles 15+ minutes after publication). Shares the daily run's lease, so a
+// micro-batch that finds a run in progress returns SKIPPED.
+export async function runMicroBatch(): Promise<ScheduledIngestResult> {
+  const now = DateTime.now();
+  if (getOptionalEnv("MICRO_BATCH") === "0") return skippedIngest(toIso(now));
+  return runScheduledIngest({
+    mode: "micro",
+    windowEnd: now,
+    overlapMs: envInt("MICRO_OVERLAP_MINUTES", 30, 0, 24 * 60) * 60_000,
+  });
+}
@@ -0,0 +1,241 @@
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+import type { NewsItemRow } from "../lib/types";
+import type { TopicKey } from "../config/topics";
+
+export type NewsDays = "1" | "7" | "30" | "ALL";
+
+export type NewsFilters = {
+  topic: TopicKey;
+  days: NewsDays;
+  q: string;
+  collapse?: boolean;
+  archive?: boolean;
+};
+
+// Drops LIKE wildcards (PostgREST also reads `*` as one) and the LIKE escape character, so
+// the query always matches as a literal substring.
+export function sanitizeQuery(q: string): string {
+  return q.replaceAll(/[%_*\\]/g, " ").trim().slice(0, 80);
+}
+
+// Double-quoted so commas, dots and parentheses in the query don't break or=(...) syntax.
+export function ilikeValue(q: string): string {
+  return `"%${q.replaceAll('"', '\\"')}%"`;
+}
+
+export function safeDays(v: unknown): NewsDays {
+  const s = typeof v === "string" ? v.toUpperCase() : "";
+  if (s === "1" || s === "7" || s === "30") return s;
+  return "ALL";
+}
+
+export function computeSince(days: NewsDays): string | null {
+  if (days === "ALL") return null;
+  const n = Number.parseInt(days, 10);
+  return new Date(Date.now() - n * 24 * 60 * 60 * 1000).toISOString();
+}
+
+// Mirrors public.news_search_tokens: latin words and CJK bigrams. Only used to rank
+// matches; which rows match is a substring test (see selectNews).
+export function searchTokens(q: string): string[] {
+  const s = q.normalize("NFKC");
+  const out = new Set<string>();
+  for (const m of s.matchAll(/[A-Za-z0-9]+/g)) out.add(m[0].toLowerCase());
+  for (const m of s.matchAll(/[\u3400-\u9FFF]+/g)) {
+    const run = m[0];
+    if (run.length === 1) {
+      out.add(run);
+      continue;
+    }
+    for (let i = 0; i < run.length - 1; i++) out.add(run.slice(i, i + 2));
+  }
+  return Array.from(out);
+}
+
+export type NewsCursor = { publishedAt: string; id: string };
+
+export type NewsPage = {
+  items: NewsItemRow[];
+  nextCursor: string | null;
+  prevCursor: string | null;
+};
+
+export function encodeCursor(row: Pick<NewsItemRow, "published_at" | "id">): string {
+  return Buffer.from(`${row.published_at}|${row.id}`, "utf8").toString("base64url");
+}
+
+export function decodeCursor(v: string | null | undefined): NewsCursor | null {
+  if (!v) return null;
+  try {
+    const [publishedAt, id] = Buffer.from(v, "base64url").toString("utf8").split("|");
+    if (!publishedAt || !id || Number.isNaN(new Date(publishedAt).getTime())) return null;
+    if (!/^[0-9a-f-]{36}$/i.test(id)) return null;
+    return { publishedAt, id };
+  } catch {
+    return null;
+  }
+}
+
+function keysetClause(cursor: NewsCursor, direction: "next" | "prev"): string {
+  const op = direction === "next" ? "lt" : "gt";
+  const ts = `"${cursor.publishedAt}"`;
+  return `published_at.${op}.${ts},and(published_at.eq.${ts},id.${op}.${cursor.id})`;
+}
+
+export function selectNews<Columns extends string>(
+  supabase: SupabaseAdmin,
+  columns: Columns,
+  filters: NewsFilters,
+  opts: {
+    count?: "exact" | "planned" | "estimated";
+    head?: boolean;
+    cursor?: NewsCursor | null;
+    direction?: "next" | "prev";
+  } = {},
+) {
+  const orClauses: string[] = [];
+  let query = supabase
+    .from(filters.archive ? "news_item_all" : "news_item")
+    .select(columns, { count: opts.count, head: opts.head })
+    .eq("topic", filters.topic);
+
+  if (filters.collapse !== false) {
+    query = query.eq("is_cluster_head", true);
+  }
+
+  const since = computeSince(filters.days);
+  if (since) {
+    query = query.gte("published_at", since);
+  }
+
+  // Substring match so partial words ("batt", "Xiao") and single CJK characters still hit;
+  // the trigram indexes from migration 023 serve each ILIKE.
+  const q = sanitizeQuery(filters.q);
+  if (q) {
+    const like = ilikeValue(q);
+    orClauses.push(
+      [
+        `title.ilike.${like}`,
+        `title_zh.ilike.${like}`,
+        `summary.ilike.${like}`,
+        `summary_zh.ilike.${like}`,
+        `source.ilike.${like}`,
+      ].join(","),
+    );
+  }
+
+  if (opts.cursor) {
+    orClauses.push(keysetClause(opts.cursor, opts.direction ?? "next"));
+  }
+
+  if (orClauses.length === 1) {
+    query = query.or(orClauses[0]);
+  } else if (orClauses.length > 1) {
+    query = query.or(`and(${orClauses.map((c) => `or(${c})`).join(",")})`);
+  }
+
+  return query;
+}
+
+export async function pageNews(
+  supabase: SupabaseAdmin,
+  filters: NewsFilters,
+  opts: { pageSize: number; cursor?: string | null; direction?: "next" | "prev" },
+): Promise<NewsPage> {
+  const cursor = decodeCursor(opts.cursor);
+  const direction = cursor && opts.direction === "prev" ? "prev" : "next";
+  const ascending = direction === "prev";
+  const { data, error } = await selectNews(supabase, "*", filters, { cursor, direction })
+    .order("published_at", { ascending })
+    .order("id", { ascending })
+    .limit(opts.pageSize + 1);
+  if (error) throw error;
+
+  const rows = (data ?? []) as NewsItemRow[];
+  const hasMore = rows.length > opts.pageSize;
+  const page = rows.slice(0, opts.pageSize);
+  if (direction === "prev") page.reverse();
+
+  const first = page[0];
+  const last = page[page.length - 1];
+  if (direction === "next") {
+    return {
+      items: page,
+      nextCursor: hasMore && last ? encodeCursor(last) : null,
+      prevCursor: cursor && first ? encodeCursor(first) : null,
+    };
+  }
+  return {
+    items: page,
+    nextCursor: last ? encodeCursor(last) : null,
+    prevCursor: hasMore && first ? encodeCursor(first) : null,
+  };
+}
+
+const COUNT_TTL_MS = { rolling: 10 * 60 * 1000, all: 24 * 60 * 60 * 1000 };
+
+function countKey(filters: NewsFilters): string {
+  const key = [filters.topic, filters.days, sanitizeQuery(filters.q), filters.collapse !== false];
+  return JSON.stringify(filters.archive ? [...key, "archive"] : key);
+}
+
+export async function countNews(supabase: SupabaseAdmin, filters: NewsFilters): Promise<number | null> {
+  const key = countKey(filters);
+  const ttl = filters.days === "ALL" ? COUNT_TTL_MS.all : COUNT_TTL_MS.rolling;
+  const { data: cached } = await supabase
+    .from("news_count_cache")
+    .select("count,computed_at")
+    .eq("filter_key", key)
+    .maybeSingle();
+  const row = cached as { count: number; computed_at: string } | null;
+  if (row && Date.now() - new Date(row.computed_at).getTime() < ttl) return row.count;
+
+  const { count, error } = await selectNews(supabase, "id", filters, { count: "exact", head: true });
+  if (error || typeof count !== "number") return row?.count ?? null;
+
+  await supabase.from("news_count_cache").upsert(
+    {
+      filter_key: key,
+      topic: filters.topic,
+      q: sanitizeQuery(filters.q),
+      count,
+      computed_at: new Date().toISOString(),
+    },
+    { onConflict: "filter_key" },
+  );
+  return count;
+}
+
+export async function invalidateNewsCounts(
+  supabase: SupabaseAdmin,
+  scope: { topics?: string[]; searchOnly?: boolean },
+): Promise<void> {
+  let query = supabase.from("news_count_cache").delete();
+  if (scope.topics) {
+    if (!scope.topics.length) return;
+    query = query.in("topic", scope.topics);
+  }
+  query = scope.searchOnly ? query.neq("q", "") : query.neq("filter_key", "");
+  await query;
+}
+
+export async function searchNewsRanked(
+  supabase: SupabaseAdmin,
+  filters: NewsFilters,
+  opts: { limit: number; offset?: number },
+): Promise<NewsItemRow[] | null> {
+  const q = sanitizeQuery(filters.q);
+  if (!q) return null;
+  const { data, error } = await supabase.rpc("search_news_item", {
+    p_topic: filters.topic,
+    p_query: q,
+    p_tokens: searchTokens(q),
+    p_since: computeSince(filters.days),
+    p_collapse: filters.collapse !== false,
+    p_limit: opts.limit,
+    p_offset: opts.offset ?? 0,
+    p_archive: filters.archive === true,
+  });
+  if (error) throw error;
+  return (data ?? []) as NewsItemRow[];
+}
@@ -0,0 +1,109 @@
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+import type { NewNewsItem, Topic } from "../lib/types";
+import { assignClusters } from "./clustering";
+import { invalidateNewsCounts } from "./newsQuery";
+import { invalidateNewsReads } from "./readCache";
+import { setSpanAttrs, withSpan } from "./tracing";
+
+export type IngestItem = {
+  topic: Topic;
+  title: string;
+  summary: string | null;
+  url: string;
+  source: string;
+  publishedAt: Date;
+  contentHash: string;
+  language: string;
+};
+
+export type IngestResult = {
+  inserted: number;
+  skipped: number;
+  insertedHashes: string[];
+};
+
+const DEFAULT_CHUNK_SIZE = 500;
+
+export function toNewsRow(
+  it: IngestItem,
+  tr?: { title_zh: string | null; summary_zh: string | null } | null,
+): NewNewsItem {
+  return {
+    topic: it.topic,
+    title: it.title,
+    title_zh: tr?.title_zh ?? null,
+    url: it.url,
+    source: it.source,
+    published_at: new Date(it.publishedAt).toISOString(),
+    content_hash: it.contentHash,
+    language: it.language ?? "und",
+    summary: it.summary ?? null,
+    summary_zh: tr?.summary_zh ?? null,
+  };
+}
+
+export async function findExistingHashes(supabase: SupabaseAdmin, hashes: string[]): Promise<Set<string>> {
+  const unique = Array.from(new Set(hashes));
+  return withSpan(
+    "db.probe",
+    async () => {
+      const out = new Set<string>();
+      for (let offset = 0; offset < unique.length; offset += DEFAULT_CHUNK_SIZE) {
+        const { data, error } = await supabase
+          .from("news_item_hash")
+          .select("content_hash")
+          .in("content_hash", unique.slice(offset, offset + DEFAULT_CHUNK_SIZE));
+        if (error) throw error;
+        for (const row of (data ?? []) as Array<{ content_hash: string }>) out.add(row.content_hash);
+      }
+      setSpanAttrs({ existing: out.size });
+      return out;
+    },
+    { hashes: unique.length },
+  );
+}
+
+export async function writeNewsItems(
+  supabase: SupabaseAdmin,
+  rows: NewNewsItem[],
+  opts: { chunkSize?: number } = {},
+): Promise<IngestResult> {
+  const seen = new Set<string>();
+  const unique: NewNewsItem[] = [];
+  for (const row of rows) {
+    if (seen.has(row.content_hash)) continue;
+    seen.add(row.content_hash);
+    unique.push(row);
+  }
+
+  const clustered = await withSpan("cluster", () => assignClusters(supabase, unique), { rows: unique.length });
+  const chunkSize = Math.max(1, opts.chunkSize ?? DEFAULT_CHUNK_SIZE);
+  const insertedHashes: string[] = [];
+  for (let offset = 0; offset < clustered.length; offset += chunkSize) {
+    const chunk = clustered.slice(offset, offset + chunkSize);
+    await withSpan(
+      "db.upsert",
+      async () => {
+        const { data, error } = await supabase.rpc("ingest_news_items", { items: chunk });
+        if (error) throw error;
+        const inserted = (data ?? []) as Array<{ inserted_hash: string }>;
+        for (const row of inserted) insertedHashes.push(row.inserted_hash);
+        setSpanAttrs({ inserted: inserted.length });
+      },
+      { rows: chunk.length },
+    );
+  }
+
+  if (insertedHashes.length) {
+    const topicByHash = new Map(clustered.map((r) => [r.content_hash, r.topic] as const));
+    const topics = Array.from(new Set(insertedHashes.map((h) => topicByHash.get(h)).filter((t): t is Topic => Boolean(t))));
+    await invalidateNewsCounts(supabase, { topics });
+    invalidateNewsReads(topics);
+  }
+
+  return {
+    inserted: insertedHashes.length,
+    skipped: rows.length - insertedHashes.length,
+    insertedHashes,
+  };
+}
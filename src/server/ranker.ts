@@ -0,0 +1,134 @@
+import type { NewsItemRow } from "../lib/types";
+import { getSalienceKeywords, type TopicDef, type TopicKey } from "../config/topics";
+
+export type RankMode = "llm" | "local" | "hybrid";
+
+export const RANK_MODES: RankMode[] = ["llm", "local", "hybrid"];
+
+export type RankableItem = Pick<NewsItemRow, "topic" | "title" | "title_zh" | "summary" | "source" | "published_at"> & {
+  cluster_size?: number | null;
+};
+
+export function safeRankMode(v: unknown, fallback: RankMode = "llm"): RankMode {
+  const s = typeof v === "string" ? v.toLowerCase() : "";
+  return (RANK_MODES as string[]).includes(s) ? (s as RankMode) : fallback;
+}
+
+// Substring match on the lowercased source name or domain; first hit wins.
+const SOURCE_AUTHORITY: Array<[string, number]> = [
+  ["reuters", 1],
+  ["bloomberg", 1],
+  ["financial times", 1],
+  ["ft.com", 1],
+  ["wall street journal", 1],
+  ["wsj", 1],
+  ["财新", 0.95],
+  ["caixin", 0.95],
+  ["第一财经", 0.9],
+  ["yicai", 0.9],
+  ["cnbc", 0.9],
+  ["nikkei", 0.9],
+  ["新华", 0.85],
+  ["xinhua", 0.85],
+  ["证券时报", 0.85],
+  ["上海证券报", 0.85],
+  ["中国证券报", 0.85],
+  ["21世纪经济报道", 0.85],
+  ["经济观察", 0.8],
+  ["澎湃", 0.8],
+  ["thepaper", 0.8],
+  ["scmp", 0.8],
+  ["south china morning post", 0.8],
+  ["36氪", 0.75],
+  ["36kr", 0.75],
+  ["techcrunch", 0.75],
+  ["the verge", 0.7],
+  ["electrek", 0.7],
+  ["cnevpost", 0.7],
+  ["新浪", 0.6],
+  ["sina", 0.6],
+  ["网易", 0.55],
+  ["搜狐", 0.55],
+  ["腾讯", 0.55],
+];
+
+const DEFAULT_AUTHORITY = 0.4;
+
+// The event types the LLM pick prompt asks to prioritise, shared across topics.
+const EVENT_KEYWORDS: Record<string, number> = {
+  财报: 1.5,
+  业绩: 1.2,
+  earnings: 1.5,
+  revenue: 1,
+  监管: 1.2,
+  regulator: 1.2,
+  调查: 1.2,
+  investigation: 1.2,
+  事故: 1.5,
+  起火: 1.5,
+  "battery fire": 1.5,
+  召回: 1.5,
+  recall: 1.5,
+  订单: 1.2,
+  量产: 1.2,
+  "mass production": 1.2,
+  诉讼: 1.2,
+  lawsuit: 1.2,
+  合作: 0.8,
+  partnership: 0.8,
+  政策: 0.8,
+  tariff: 1.2,
+  关税: 1.2,
+  裁员: 1.2,
+  layoffs: 1.2,
+  融资: 1,
+  上市: 1,
+  IPO: 1.2,
+  发布: 0.8,
+  launch: 0.8,
+};
+
+const HALF_LIFE_HOURS: Record<string, number> = { "1": 12, "7": 48, "30": 168, ALL: 336 };
+
+const WEIGHTS = { recency: 0.35, authority: 0.2, cluster: 0.2, salience: 0.25 };
+
+function sourceAuthority(source: string): number {
+  const s = source.toLowerCase();
+  for (const [needle, weight] of SOURCE_AUTHORITY) {
+    if (s.includes(needle)) return weight;
+  }
+  return DEFAULT_AUTHORITY;
+}
+
+function keywordScore(text: string, keywords: Record<string, number>): number {
+  let score = 0;
+  for (const [kw, weight] of Object.entries(keywords)) {
+    if (text.includes(kw.toLowerCase())) score += weight;
+  }
+  return score;
+}
+
+// Deterministic score in [0, 1] per candidate; returns candidate indices best first.
+export function rankCandidates(
+  items: RankableItem[],
+  params: { topic: TopicKey; days: string; topics?: TopicDef[]; now?: number },
+): Array<{ index: number; score: number }> {
+  const now = params.now ?? Date.now();
+  const halfLifeMs = (HALF_LIFE_HOURS[params.days] ?? HALF_LIFE_HOURS.ALL) * 60 * 60 * 1000;
+  const topicKeywords = getSalienceKeywords(params.topic, params.topics);
+  const maxCluster = Math.max(1, ...items.map((it) => it.cluster_size ?? 1));
+
+  const scored = items.map((it, index) => {
+    const ageMs = Math.max(0, now - new Date(it.published_at).getTime());
+    const recency = Number.isFinite(ageMs) ? Math.pow(0.5, ageMs / halfLifeMs) : 0;
+    const authority = sourceAuthority(it.source ?? "");
+    const cluster = maxCluster > 1 ? Math.log1p((it.cluster_size ?? 1) - 1) / Math.log1p(maxCluster - 1) : 0;
+    const text = `${it.title_zh ?? ""} ${it.title} ${it.summary ?? ""}`.toLowerCase();
+    const salience = Math.min(1, (keywordScore(text, topicKeywords) + keywordScore(text, EVENT_KEYWORDS)) / 4);
+    const score =
+      WEIGHTS.recency * recency + WEIGHTS.authority * authority + WEIGHTS.cluster * cluster + WEIGHTS.salience * salience;
+    return { index, score };
+  });
+
+  return scored.sort((a, b) => b.score - a.score || a.index - b.index);
+}
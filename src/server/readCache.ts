@@ -0,0 +1,150 @@
+import { revalidateTag, unstable_cache } from "next/cache";
+import { getOptionalEnv } from "../lib/env";
+import { createSupabaseAdmin } from "../lib/supabaseAdmin";
+import type { NewsItemRow } from "../lib/types";
+import { countNews, pageNews, sanitizeQuery, searchNewsRanked, type NewsFilters, type NewsPage } from "./newsQuery";
+
+// Next data cache in front of the /news, /status and digest reads. Entries are tagged per
+// topic, so a sync that writes CATL rows leaves cached XIAOMI pages alone; revalidate is
+// only a backstop for rolling "last N days" windows drifting.
+
+export type ReadCacheName = "list" | "count" | "search" | "status";
+
+const READ_CACHES: ReadCacheName[] = ["list", "count", "search", "status"];
+
+const REVALIDATE_S: Record<ReadCacheName, number> = { list: 300, count: 600, search: 300, status: 60 };
+
+const NEWS_TAG = "news";
+const STATUS_TAG = "status";
+
+const counters = Object.fromEntries(READ_CACHES.map((n) => [n, { hits: 0, misses: 0, bypassed: 0 }])) as Record<
+  ReadCacheName,
+  { hits: number; misses: number; bypassed: number }
+>;
+
+function cacheEnabled(): boolean {
+  return getOptionalEnv("READ_CACHE") !== "0";
+}
+
+function topicTag(topic: string): string {
+  return `${NEWS_TAG}:${topic}`;
+}
+
+function filterKey(filters: NewsFilters): string[] {
+  return [
+    filters.topic,
+    filters.days,
+    sanitizeQuery(filters.q),
+    filters.collapse === false ? "all" : "heads",
+    filters.archive ? "archive" : "live",
+  ];
+}
+
+// The loader runs only on a miss (or a background refresh of a stale entry), so calls that
+// never reach it are hits.
+async function cachedRead<T>(
+  name: ReadCacheName,
+  keyParts: string[],
+  tags: string[],
+  load: () => Promise<T>,
+): Promise<T> {
+  if (!cacheEnabled()) {
+    counters[name].bypassed += 1;
+    return load();
+  }
+  let loaded = false;
+  let value: T;
+  try {
+    value = await unstable_cache(
+      async () => {
+        loaded = true;
+        return load();
+      },
+      ["read", name, ...keyParts],
+      { tags, revalidate: REVALIDATE_S[name] },
+    )();
+  } catch (e) {
+    // outside a Next request there is no incremental cache; loader errors propagate
+    if (loaded) throw e;
+    counters[name].bypassed += 1;
+    return load();
+  }
+  counters[name][loaded ? "misses" : "hits"] += 1;
+  return value;
+}
+
+export function readNewsPage(
+  filters: NewsFilters,
+  opts: { pageSize: number; cursor?: string | null; direction?: "next" | "prev" },
+): Promise<NewsPage> {
+  return cachedRead(
+    "list",
+    [...filterKey(filters), String(opts.pageSize), opts.cursor ?? "", opts.direction ?? "next"],
+    [NEWS_TAG, topicTag(filters.topic)],
+    () => pageNews(createSupabaseAdmin(), filters, opts),
+  );
+}
+
+export function readNewsCount(filters: NewsFilters): Promise<number | null> {
+  return cachedRead("count", filterKey(filters), [NEWS_TAG, topicTag(filters.topic)], () =>
+    countNews(createSupabaseAdmin(), filters),
+  );
+}
+
+export function readNewsRanked(
+  filters: NewsFilters,
+  opts: { limit: number; offset?: number },
+): Promise<NewsItemRow[] | null> {
+  return cachedRead(
+    "search",
+    [...filterKey(filters), String(opts.limit), String(opts.offset ?? 0)],
+    [NEWS_TAG, topicTag(filters.topic)],
+    () => searchNewsRanked(createSupabaseAdmin(), filters, opts),
+  );
+}
+
+export function readStatus<T>(load: () => Promise<T>): Promise<T> {
+  return cachedRead("status", [], [STATUS_TAG], load);
+}
+
+// Expires right away: with the "max" profile the first read after a write would still get
+// the stale entry (stale-while-revalidate), e.g. /news right after "同步完成".
+function revalidate(tags: string[]) {
+  for (const tag of tags) {
+    try {
+      revalidateTag(tag, { expire: 0 });
+    } catch {
+      // called outside a Next request (scripts); entries still expire via revalidate
+    }
+  }
+}
+
+// Write paths: pass the topics whose rows changed, or nothing when every topic is affected
+// (retention moving partitions). The status page shows the latest items and run, so it
+// goes stale with any write.
+export function invalidateNewsReads(topics?: string[]) {
+  if (topics && !topics.length) return;
+  revalidate([...(topics ? topics.map(topicTag) : [NEWS_TAG]), STATUS_TAG]);
+}
+
+export function invalidateStatusRead() {
+  revalidate([STATUS_TAG]);
+}
+
+export function getReadCacheMetrics(): Record<ReadCacheName, { hits: number; misses: number; bypassed: number }> {
+  return Object.fromEntries(READ_CACHES.map((n) => [n, { ...counters[n] }])) as Record<
+    ReadCacheName,
+    { hits: number; misses: number; bypassed: number }
+  >;
+}
+
+export function renderReadCacheMetrics(): string {
+  const lines = ["# TYPE read_cache_requests_total counter"];
+  for (const n of READ_CACHES) {
+    const c = counters[n];
+    lines.push(`read_cache_requests_total{cache="${n}",result="hit"} ${c.hits}`);
+    lines.push(`read_cache_requests_total{cache="${n}",result="miss"} ${c.misses}`);
+    lines.push(`read_cache_requests_total{cache="${n}",result="bypass"} ${c.bypassed}`);
+  }
+  return `${lines.join("\n")}\n`;
+}
@@ -0,0 +1,67 @@
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+import { getOptionalEnv } from "../lib/env";
+import { invalidateNewsCounts } from "./newsQuery";
+import { invalidateNewsReads } from "./readCache";
+import { setSpanAttrs, withSpan } from "./tracing";
+
+// Monthly news_item partitions older than NEWS_RETENTION_MONTHS move to news_item_archive
+// (see migration 019). Archived items stay deduped and are only read with archive=1.
+
+export type ArchiveResult = { partitions: string[]; movedRows: number };
+
+// run_span gets a trace from every cron run; spans older than SPAN_RETENTION_DAYS are deleted.
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+export function retentionMonths(): number {
+  const n = Number.parseInt(getOptionalEnv("NEWS_RETENTION_MONTHS") ?? "", 10);
+  if (!Number.isFinite(n)) return 12;
+  return Math.max(0, Math.min(120, n));
+}
+
+export function spanRetentionDays(): number {
+  const n = Number.parseInt(getOptionalEnv("SPAN_RETENTION_DAYS") ?? "", 10);
+  if (!Number.isFinite(n)) return 30;
+  return Math.max(0, Math.min(3650, n));
+}
+
+export async function pruneRunSpans(supabase: SupabaseAdmin): Promise<number> {
+  const keepDays = spanRetentionDays();
+  if (!keepDays) return 0;
+
+  return withSpan(
+    "db.prune_spans",
+    async () => {
+      const cutoff = new Date(Date.now() - keepDays * DAY_MS).toISOString();
+      const { count, error } = await supabase.from("run_span").delete({ count: "exact" }).lt("created_at", cutoff);
+      if (error) throw error;
+      setSpanAttrs({ deleted: count ?? 0 });
+      return count ?? 0;
+    },
+    { keepDays },
+  );
+}
+
+export async function archiveOldNews(supabase: SupabaseAdmin): Promise<ArchiveResult> {
+  const keepMonths = retentionMonths();
+  if (!keepMonths) return { partitions: [], movedRows: 0 };
+
+  return withSpan(
+    "db.archive",
+    async () => {
+      const { data, error } = await supabase.rpc("archive_news_partitions", { p_keep_months: keepMonths });
+      if (error) throw error;
+      const rows = (data ?? []) as Array<{ partition_name: string; moved_rows: number }>;
+      const result = {
+        partitions: rows.map((r) => r.partition_name),
+        movedRows: rows.reduce((sum, r) => sum + Number(r.moved_rows), 0),
+      };
+      if (result.partitions.length) {
+        await invalidateNewsCounts(supabase, {});
+        invalidateNewsReads();
+      }
+      setSpanAttrs({ partitions: result.partitions.length, moved: result.movedRows });
+      return result;
+    },
+    { keepMonths },
+  );
+}
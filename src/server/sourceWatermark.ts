@@ -0,0 +1,54 @@
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+import { sourceKey, type SourceDef } from "../config/sources";
+
+type WatermarkRow = { source_key: string; high_water_at: string };
+
+export async function loadSourceWatermarks(supabase: SupabaseAdmin, sources: SourceDef[]): Promise<Map<string, string>> {
+  const out = new Map<string, string>();
+  if (!sources.length) return out;
+  const { data, error } = await supabase
+    .from("source_watermark")
+    .select("source_key,high_water_at")
+    .in("source_key", sources.map(sourceKey));
+  if (error) throw error;
+  for (const row of (data ?? []) as WatermarkRow[]) out.set(row.source_key, row.high_water_at);
+  return out;
+}
+
+// Only moves marks forward: a daily run ending at 08:00 must not rewind a source a
+// micro-batch already carried past it. Callers hold the ingest lease, so read-then-write
+// does not race.
+export async function advanceSourceWatermarks(
+  supabase: SupabaseAdmin,
+  sources: SourceDef[],
+  previous: Map<string, string>,
+  highWaterAt: string,
+): Promise<void> {
+  const at = new Date(highWaterAt).getTime();
+  const rows = sources
+    .filter((s) => {
+      const prev = previous.get(sourceKey(s));
+      return !prev || new Date(prev).getTime() < at;
+    })
+    .map((s) => ({ source_key: sourceKey(s), label: s.label, high_water_at: highWaterAt, updated_at: new Date().toISOString() }));
+  if (!rows.length) return;
+  const { error } = await supabase.from("source_watermark").upsert(rows, { onConflict: "source_key" });
+  if (error) throw error;
+}
+
+// Window start per source: its own mark (or the run-wide fallback for a new source) minus
+// the overlap that absorbs indexing lag at the upstream.
+export function planSourceStarts(
+  sources: SourceDef[],
+  watermarks: Map<string, string>,
+  fallbackStartIso: string,
+  overlapMs: number,
+): Map<string, string> {
+  const out = new Map<string, string>();
+  for (const s of sources) {
+    const key = sourceKey(s);
+    const base = new Date(watermarks.get(key) ?? fallbackStartIso).getTime();
+    out.set(key, new Date(base - overlapMs).toISOString());
+  }
+  return out;
+}
@@ -0,0 +1,159 @@
+import { DateTime } from "luxon";
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+import type { RunKind } from "../lib/types";
+
+// Reads the trigger-maintained rollups from migration 018: rows scale with days ×
+// topics × sources × languages, never with news_item.
+
+type NewsRollupRow = {
+  day: string;
+  topic: string;
+  source: string;
+  language: string;
+  items: number;
+  cluster_heads: number;
+  translated: number;
+};
+
+type RunRollupRow = {
+  day: string;
+  kind: RunKind;
+  runs: number;
+  succeeded: number;
+  failed: number;
+  total_ms: number;
+  max_ms: number;
+  fetched: number;
+  inserted: number;
+};
+
+export type RunKindStat = {
+  runs: number;
+  succeeded: number;
+  failed: number;
+  avgRunMs: number | null;
+  maxRunMs: number | null;
+};
+
+// runs/succeeded/failed/avgRunMs/maxRunMs cover every kind; byKind splits them so the
+// micro-batches don't hide the daily run.
+export type DailyStat = {
+  day: string;
+  items: number;
+  byTopic: Record<string, number>;
+  clusterHeads: number;
+  translated: number;
+  translationCoverage: number | null;
+  runs: number;
+  succeeded: number;
+  failed: number;
+  avgRunMs: number | null;
+  maxRunMs: number | null;
+  byKind: Partial<Record<RunKind, RunKindStat>>;
+};
+
+export type StatsSummary = {
+  since: string;
+  days: DailyStat[];
+  topSources: Array<{ source: string; items: number }>;
+  languages: Record<string, number>;
+};
+
+const ZH_LANGUAGES = new Set(["zh", "zh-cn", "zh-hans"]);
+const MAX_ROLLUP_ROWS = 20000;
+
+export function safeStatsDays(v: unknown, fallback = 14): number {
+  const n = Number.parseInt(typeof v === "string" ? v : "", 10);
+  return Number.isFinite(n) ? Math.max(1, Math.min(90, n)) : fallback;
+}
+
+export async function loadDailyStats(supabase: SupabaseAdmin, params: { days: number }): Promise<StatsSummary> {
+  const today = DateTime.now().setZone("Asia/Shanghai").startOf("day");
+  const since = today.minus({ days: params.days - 1 }).toISODate() ?? "";
+
+  const [{ data: newsRows, error: newsErr }, { data: runRows, error: runErr }] = await Promise.all([
+    supabase
+      .from("news_daily_rollup")
+      .select("day,topic,source,language,items,cluster_heads,translated")
+      .gte("day", since)
+      .limit(MAX_ROLLUP_ROWS),
+    supabase
+      .from("run_daily_rollup")
+      .select("day,kind,runs,succeeded,failed,total_ms,max_ms,fetched,inserted")
+      .gte("day", since),
+  ]);
+  if (newsErr) throw newsErr;
+  if (runErr) throw runErr;
+
+  const byDay = new Map<string, DailyStat & { totalRunMs: number; nonZhHeads: number; nonZhTranslated: number }>();
+  for (let i = 0; i < params.days; i++) {
+    const day = today.minus({ days: i }).toISODate() ?? "";
+    byDay.set(day, {
+      day,
+      items: 0,
+      byTopic: {},
+      clusterHeads: 0,
+      translated: 0,
+      translationCoverage: null,
+      runs: 0,
+      succeeded: 0,
+      failed: 0,
+      avgRunMs: null,
+      maxRunMs: null,
+      byKind: {},
+      totalRunMs: 0,
+      nonZhHeads: 0,
+      nonZhTranslated: 0,
+    });
+  }
+
+  const sources = new Map<string, number>();
+  const languages: Record<string, number> = {};
+  for (const r of (newsRows ?? []) as NewsRollupRow[]) {
+    const d = byDay.get(r.day);
+    if (!d) continue;
+    d.items += r.items;
+    d.byTopic[r.topic] = (d.byTopic[r.topic] ?? 0) + r.items;
+    d.clusterHeads += r.cluster_heads;
+    d.translated += r.translated;
+    if (!ZH_LANGUAGES.has(r.language.toLowerCase())) {
+      d.nonZhHeads += r.cluster_heads;
+      d.nonZhTranslated += r.translated;
+    }
+    sources.set(r.source, (sources.get(r.source) ?? 0) + r.items);
+    languages[r.language] = (languages[r.language] ?? 0) + r.items;
+  }
+
+  for (const r of (runRows ?? []) as RunRollupRow[]) {
+    const d = byDay.get(r.day);
+    if (!d) continue;
+    if (!r.runs) continue;
+    d.byKind[r.kind] = {
+      runs: r.runs,
+      succeeded: r.succeeded,
+      failed: r.failed,
+      avgRunMs: Math.round(Number(r.total_ms) / r.runs),
+      maxRunMs: r.max_ms,
+    };
+    d.runs += r.runs;
+    d.succeeded += r.succeeded;
+    d.failed += r.failed;
+    d.totalRunMs += Number(r.total_ms);
+    d.maxRunMs = Math.max(d.maxRunMs ?? 0, r.max_ms);
+  }
+
+  const days = Array.from(byDay.values()).map(({ totalRunMs, nonZhHeads, nonZhTranslated, ...d }) => ({
+    ...d,
+    avgRunMs: d.runs ? Math.round(totalRunMs / d.runs) : null,
+    translationCoverage: nonZhHeads ? Math.min(1, nonZhTranslated / nonZhHeads) : null,
+  }));
+
+  return {
+    since,
+    days,
+    topSources: Array.from(sources, ([source, items]) => ({ source, items }))
+      .sort((a, b) => b.items - a.items)
+      .slice(0, 20),
+    languages,
+  };
+}
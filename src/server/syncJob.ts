@@ -0,0 +1,346 @@
+import { DateTime } from "luxon";
+import { getOptionalEnv } from "../lib/env";
+import { createSupabaseAdmin, type SupabaseAdmin } from "../lib/supabaseAdmin";
+import { mapWithConcurrency } from "../lib/concurrency";
+import { buildSourceList, type SourceDef } from "../config/sources";
+import {
+  fetchGoogleNewsFeeds,
+  GOOGLE_NEWS_EN_US,
+  GOOGLE_NEWS_ZH_CN,
+  type FeedFetchStat,
+  type FeedStateUpdate,
+} from "./googleNewsRss";
+import { saveFeedStates } from "./feedState";
+import { fetchGdeltDocs } from "./gdelt";
+import { toNewsRow, writeNewsItems, type IngestItem } from "./newsWriter";
+import { translatePendingNews } from "./translationBackfill";
+import { createTrace, runInTrace, saveTrace, withSpan } from "./tracing";
+import { createTopicRoute, loadTopics } from "./topicRegistry";
+import { invalidateStatusRead } from "./readCache";
+import { acquireJobLease, INGEST_LEASE_KEY, INGEST_LEASE_TTL_MS, releaseJobLease } from "./jobLease";
+
+export type SyncJobStatus = "QUEUED" | "RUNNING" | "TRANSLATING" | "SUCCESS" | "FAILED";
+export type SyncSourceStatus = "pending" | "fetching" | "success" | "failed";
+
+export type SyncJobRow = {
+  id: string;
+  created_at: string;
+  updated_at: string;
+  status: SyncJobStatus;
+  window_start: string;
+  window_end: string;
+  incremental: boolean;
+  source_count: number;
+  fetched_count: number;
+  inserted_count: number;
+  translated_count: number;
+  translate_remaining: number | null;
+  started_at: string | null;
+  ended_at: string | null;
+  error_message: string | null;
+};
+
+export type SyncJobSourceRow = {
+  job_id: string;
+  source_index: number;
+  label: string;
+  status: SyncSourceStatus;
+  fetched_count: number;
+  inserted_count: number;
+  error_message: string | null;
+  started_at: string | null;
+  ended_at: string | null;
+};
+
+const TRANSLATE_BATCH = 50;
+// maxDuration of /api/sync/jobs: runSyncJob runs in that request's after(), so the platform
+// stops it at this limit. Translation ends FINALIZE_RESERVE_MS before it to record the result.
+export const SYNC_JOB_MAX_MS = 300_000;
+const FINALIZE_RESERVE_MS = 30_000;
+const ACTIVE_STATUSES: SyncJobStatus[] = ["QUEUED", "RUNNING", "TRANSLATING"];
+
+function nowIso(): string {
+  return new Date().toISOString();
+}
+
+function envInt(name: string, fallback: number): number {
+  const n = Number.parseInt(getOptionalEnv(name) ?? "", 10);
+  return Number.isFinite(n) && n > 0 ? n : fallback;
+}
+
+// Manual syncs look back over a fixed window, so they default to a full fetch that neither
+// reads nor advances the cron's feed state; with `incremental`, save the returned
+// feedStates only after the items are written.
+export async function fetchSourceItems(
+  source: SourceDef,
+  window: { windowStart: string; windowEnd: string },
+  opts: { incremental?: boolean } = {},
+): Promise<{ items: IngestItem[]; feeds: FeedFetchStat[]; feedStates: FeedStateUpdate[] }> {
+  let items: IngestItem[] = [];
+  let feeds: FeedFetchStat[] = [];
+  let feedStates: FeedStateUpdate[] = [];
+  const route = createTopicRoute(await loadTopics(), source.topics);
+  if (source.type === "rss") {
+    const locale = source.locale === "en-US" ? GOOGLE_NEWS_EN_US : GOOGLE_NEWS_ZH_CN;
+    const result = await fetchGoogleNewsFeeds(route, [source.query], [locale], {
+      incremental: opts.incremental === true,
+    });
+    items = result.items;
+    feeds = result.feeds;
+    feedStates = result.feedStates;
+  } else {
+    items = await fetchGdeltDocs({
+      route,
+      query: source.query,
+      windowStartIso: window.windowStart,
+      windowEndIso: window.windowEnd,
+      maxRecords: source.maxRecords ?? 200,
+    });
+  }
+
+  const windowStartMs = DateTime.fromISO(window.windowStart, { zone: "utc" }).toMillis();
+  const windowEndMs = DateTime.fromISO(window.windowEnd, { zone: "utc" }).toMillis();
+  return {
+    items: items.filter((it) => {
+      const t = it.publishedAt.getTime();
+      return t > windowStartMs && t <= windowEndMs;
+    }),
+    feeds,
+    feedStates,
+  };
+}
+
+export async function createSyncJob(params: { lookbackHours?: number; incremental?: boolean } = {}): Promise<string> {
+  const supabase = createSupabaseAdmin();
+  await failStaleSyncJobs(supabase);
+  const sources = buildSourceList(await loadTopics());
+  const now = DateTime.now();
+  const lookback = Number.isFinite(params.lookbackHours) ? Math.max(1, Math.min(240, params.lookbackHours ?? 168)) : 168;
+  const { data, error } = await supabase
+    .from("sync_job")
+    .insert({
+      status: "QUEUED",
+      window_start: now.minus({ hours: lookback }).toUTC().toISO(),
+      window_end: now.toUTC().toISO(),
+      incremental: params.incremental === true,
+      source_count: sources.length,
+    })
+    .select("id")
+    .single();
+  if (error) throw error;
+  const jobId = (data as { id: string }).id;
+
+  const { error: srcErr } = await supabase.from("sync_job_source").insert(
+    sources.map((s) => ({ job_id: jobId, source_index: s.index, label: s.label, status: "pending" })),
+  );
+  if (srcErr) throw srcErr;
+  return jobId;
+}
+
+// A job whose invocation was killed at maxDuration stays active with a stale updated_at
+// (every stage updates it); mark it FAILED so pollers stop waiting.
+async function failStaleSyncJobs(supabase: SupabaseAdmin, jobId?: string): Promise<void> {
+  const cutoff = new Date(Date.now() - SYNC_JOB_MAX_MS).toISOString();
+  let query = supabase
+    .from("sync_job")
+    .update({ status: "FAILED", ended_at: nowIso(), updated_at: nowIso(), error_message: "同步超时中断" })
+    .in("status", ACTIVE_STATUSES)
+    .lt("updated_at", cutoff);
+  if (jobId) query = query.eq("id", jobId);
+  const { data } = await query.select("id");
+  const ids = ((data ?? []) as Array<{ id: string }>).map((r) => r.id);
+  if (!ids.length) return;
+  await supabase
+    .from("sync_job_source")
+    .update({ status: "failed", error_message: "同步超时中断", ended_at: nowIso() })
+    .in("job_id", ids)
+    .in("status", ["pending", "fetching"]);
+}
+
+export async function getSyncJob(jobId: string): Promise<{ job: SyncJobRow; sources: SyncJobSourceRow[] } | null> {
+  const supabase = createSupabaseAdmin();
+  let { data } = await supabase.from("sync_job").select("*").eq("id", jobId).maybeSingle();
+  if (!data) return null;
+  const row = data as SyncJobRow;
+  if (ACTIVE_STATUSES.includes(row.status) && Date.parse(row.updated_at) < Date.now() - SYNC_JOB_MAX_MS) {
+    await failStaleSyncJobs(supabase, jobId);
+    ({ data } = await supabase.from("sync_job").select("*").eq("id", jobId).maybeSingle());
+    if (!data) return null;
+  }
+  const { data: sources } = await supabase
+    .from("sync_job_source")
+    .select("*")
+    .eq("job_id", jobId)
+    .order("source_index", { ascending: true });
+  return { job: data as SyncJobRow, sources: (sources ?? []) as SyncJobSourceRow[] };
+}
+
+async function updateSource(supabase: SupabaseAdmin, jobId: string, index: number, patch: Partial<SyncJobSourceRow>) {
+  await supabase.from("sync_job_source").update(patch).eq("job_id", jobId).eq("source_index", index);
+}
+
+async function updateJob(supabase: SupabaseAdmin, jobId: string, patch: Partial<SyncJobRow>) {
+  await supabase
+    .from("sync_job")
+    .update({ ...patch, updated_at: nowIso() })
+    .eq("id", jobId);
+}
+
+// Fetches every source concurrently (Google News and GDELT each get their own host
+// limit), writes the results one source at a time so clustering sees earlier writes,
+// records the run, then backfills translations within the remaining time budget.
+export async function runSyncJob(jobId: string): Promise<void> {
+  const supabase = createSupabaseAdmin();
+  const started = Date.now();
+  const { data: claimed } = await supabase
+    .from("sync_job")
+    .update({ status: "RUNNING", started_at: nowIso(), updated_at: nowIso() })
+    .eq("id", jobId)
+    .eq("status", "QUEUED")
+    .select("*");
+  const job = ((claimed ?? [])[0] ?? null) as SyncJobRow | null;
+  if (!job) return;
+
+  // Same lease as the daily and micro-batch runs: sync also writes news_item and moves
+  // job_state.daily_news. It is held until last_success_at is written, not through translation.
+  let owner: string | null = null;
+  try {
+    owner = await acquireJobLease(supabase, INGEST_LEASE_KEY, INGEST_LEASE_TTL_MS);
+  } catch (e) {
+    await updateJob(supabase, jobId, { status: "FAILED", ended_at: nowIso(), error_message: e instanceof Error ? e.message : "同步失败" });
+    return;
+  }
+  if (!owner) {
+    await updateJob(supabase, jobId, { status: "FAILED", ended_at: nowIso(), error_message: "定时抓取正在运行，请稍后重试" });
+    return;
+  }
+  const leaseOwner = owner;
+  let leaseHeld = true;
+  const releaseLease = async () => {
+    if (!leaseHeld) return;
+    leaseHeld = false;
+    await releaseJobLease(supabase, INGEST_LEASE_KEY, leaseOwner).catch(() => null);
+  };
+
+  const window = { windowStart: job.window_start, windowEnd: job.window_end };
+  let writeLock: Promise<unknown> = Promise.resolve();
+  const serialized = <R>(fn: () => Promise<R>): Promise<R> => {
+    const p = writeLock.then(fn);
+    writeLock = p.catch(() => null);
+    return p;
+  };
+
+  const results: Array<{ index: number; ok: boolean; fetched: number; inserted: number; error?: string }> = [];
+  let fetchedTotal = 0;
+  let insertedTotal = 0;
+
+  const runSource = async (source: SourceDef) => {
+    await updateSource(supabase, jobId, source.index, { status: "fetching", started_at: nowIso() });
+    try {
+      const { items, feedStates } = await withSpan(
+        "source",
+        () => fetchSourceItems(source, window, { incremental: job.incremental }),
+        { source: source.label },
+      );
+      const written = items.length
+        ? await serialized(() => writeNewsItems(supabase, items.map((it) => toNewsRow(it))))
+        : { inserted: 0 };
+      await saveFeedStates(feedStates);
+      results.push({ index: source.index, ok: true, fetched: items.length, inserted: written.inserted });
+      fetchedTotal += items.length;
+      insertedTotal += written.inserted;
+      await updateSource(supabase, jobId, source.index, {
+        status: "success",
+        fetched_count: items.length,
+        inserted_count: written.inserted,
+        ended_at: nowIso(),
+      });
+      await updateJob(supabase, jobId, { fetched_count: fetchedTotal, inserted_count: insertedTotal });
+    } catch (e) {
+      const msg = e instanceof Error ? e.message : "抓取失败";
+      results.push({ index: source.index, ok: false, fetched: 0, inserted: 0, error: msg });
+      await updateSource(supabase, jobId, source.index, { status: "failed", error_message: msg, ended_at: nowIso() });
+    }
+  };
+
+  const trace = createTrace("sync");
+  let runId: string | null = null;
+  await runInTrace(trace, async () => {
+    try {
+      const sources = buildSourceList(await loadTopics());
+      const rss = sources.filter((s) => s.type === "rss");
+      const gdelt = sources.filter((s) => s.type === "gdelt");
+      await Promise.all([
+        mapWithConcurrency(rss, envInt("SYNC_RSS_CONCURRENCY", 4), runSource),
+        mapWithConcurrency(gdelt, envInt("SYNC_GDELT_CONCURRENCY", 2), runSource),
+      ]);
+
+      const okCount = results.filter((r) => r.ok).length;
+      const errors = results
+        .filter((r) => !r.ok && r.error)
+        .sort((a, b) => a.index - b.index)
+        .map((r) => `#${r.index}: ${r.error}`)
+        .join("; ");
+      const now = nowIso();
+
+      const { data: runRow } = await supabase
+        .from("run_log")
+        .insert({
+          status: okCount ? "SUCCESS" : "FAILED",
+          kind: "sync",
+          started_at: new Date(started).toISOString(),
+          ended_at: now,
+          window_start: job.window_start,
+          window_end: job.window_end,
+          fetched_count: fetchedTotal,
+          deduped_count: fetchedTotal - insertedTotal,
+          output_count: insertedTotal,
+          error_message: errors || null,
+        })
+        .select("id")
+        .maybeSingle();
+      runId = (runRow as { id: string } | null)?.id ?? null;
+      invalidateStatusRead();
+
+      if (!okCount) {
+        await updateJob(supabase, jobId, { status: "FAILED", ended_at: now, error_message: errors || "所有源均失败" });
+        return;
+      }
+
+      // forward only: a micro-batch may have finished after this job's window was fixed
+      await supabase
+        .from("job_state")
+        .update({ last_success_at: job.window_end, updated_at: now })
+        .eq("key", INGEST_LEASE_KEY)
+        .or(`last_success_at.is.null,last_success_at.lt."${job.window_end}"`);
+      await releaseLease();
+
+      await updateJob(supabase, jobId, { status: "TRANSLATING", error_message: errors || null });
+      let translatedTotal = 0;
+      let translateError: string | null = null;
+      const translateDeadline = started + SYNC_JOB_MAX_MS - FINALIZE_RESERVE_MS;
+      try {
+        while (Date.now() < translateDeadline) {
+          const r = await translatePendingNews({ limit: TRANSLATE_BATCH, deadline: translateDeadline });
+          translatedTotal += r.translated;
+          await updateJob(supabase, jobId, { translated_count: translatedTotal, translate_remaining: r.remaining });
+          if (!r.remaining || !r.translated) break;
+        }
+      } catch (e) {
+        translateError = `翻译出错：${e instanceof Error ? e.message : "未知错误"}`;
+      }
+
+      await updateJob(supabase, jobId, {
+        status: "SUCCESS",
+        ended_at: nowIso(),
+        error_message: [errors, translateError].filter(Boolean).join("; ") || null,
+      });
+    } catch (e) {
+      const msg = e instanceof Error ? e.message : "同步失败";
+      await updateJob(supabase, jobId, { status: "FAILED", ended_at: nowIso(), error_message: msg });
+    } finally {
+      await releaseLease();
+    }
+  });
+  await saveTrace(supabase, trace, { runId });
+}
@@ -0,0 +1,84 @@
+import { getOptionalEnv } from "../lib/env";
+import { compileMatcher, type MultiMatcher } from "../lib/ahoCorasick";
+import { createSupabaseAdmin } from "../lib/supabaseAdmin";
+import { BUILTIN_TOPICS, type TopicDef, type TopicKey } from "../config/topics";
+
+type TopicRow = {
+  key: string;
+  display_name: string;
+  aliases: string[] | null;
+  queries: string[] | null;
+  salience_keywords: Record<string, number> | null;
+};
+
+export type TopicRoute = {
+  topics: TopicKey[];
+  // Topics of this route whose aliases occur in text; items matching none are dropped,
+  // unless the route has a single topic (the query itself was specific to it).
+  classify(text: string): TopicKey[];
+};
+
+const CACHE_TTL_MS = 60_000;
+
+let cached: { at: number; topics: TopicDef[] } | null = null;
+const matchers = new WeakMap<TopicDef[], MultiMatcher<TopicKey>>();
+
+function stateEnabled(): boolean {
+  return Boolean(getOptionalEnv("SUPABASE_URL") && getOptionalEnv("SUPABASE_SERVICE_ROLE_KEY"));
+}
+
+function toTopicDef(row: TopicRow): TopicDef {
+  return {
+    key: row.key,
+    displayName: row.display_name,
+    aliases: (row.aliases ?? []).filter((a) => a.trim()),
+    queries: (row.queries ?? []).filter((q) => q.trim()),
+    salienceKeywords: row.salience_keywords ?? {},
+  };
+}
+
+// Enabled topics in display order. Falls back to the built-ins when Supabase is not
+// configured or the registry is empty/unreadable, so ingest never runs with zero topics.
+export async function loadTopics(): Promise<TopicDef[]> {
+  if (cached && Date.now() - cached.at < CACHE_TTL_MS) return cached.topics;
+  let topics = BUILTIN_TOPICS;
+  if (stateEnabled()) {
+    try {
+      const supabase = createSupabaseAdmin();
+      const { data, error } = await supabase
+        .from("topic_registry")
+        .select("key,display_name,aliases,queries,salience_keywords")
+        .eq("enabled", true)
+        .order("sort_order", { ascending: true })
+        .order("key", { ascending: true });
+      if (error) throw error;
+      const rows = (data ?? []) as TopicRow[];
+      if (rows.length) topics = rows.map(toTopicDef);
+    } catch {
+      // keep the built-ins; retried after the TTL
+    }
+  }
+  cached = { at: Date.now(), topics };
+  return topics;
+}
+
+function topicMatcher(topics: TopicDef[]): MultiMatcher<TopicKey> {
+  let m = matchers.get(topics);
+  if (!m) {
+    m = compileMatcher(topics.flatMap((t) => [t.key, t.displayName, ...t.aliases].map((a): [string, TopicKey] => [a, t.key])));
+    matchers.set(topics, m);
+  }
+  return m;
+}
+
+export function createTopicRoute(topics: TopicDef[], keys: TopicKey[]): TopicRoute {
+  const matcher = topicMatcher(topics);
+  return {
+    topics: keys,
+    classify(text) {
+      const found = matcher.match(text);
+      const hit = keys.filter((k) => found.has(k));
+      return hit.length || keys.length !== 1 ? hit : keys;
+    },
+  };
+}
@@ -0,0 +1,131 @@
+import { AsyncLocalStorage } from "node:async_hooks";
+import { randomUUID } from "node:crypto";
+import type { SupabaseAdmin } from "../lib/supabaseAdmin";
+
+// Minimal span API: a trace collects spans in memory for one cron run, sync job or
+// digest job and is written to run_span once at the end. Outside a trace every call
+// is a passthrough, so instrumented helpers cost nothing when called from plain routes.
+
+export type TraceKind = "daily" | "micro" | "sync" | "ai_digest";
+
+export type SpanAttrs = Record<string, string | number | boolean | null>;
+
+export type SpanRecord = {
+  spanId: number;
+  parentId: number | null;
+  name: string;
+  startMs: number;
+  durationMs: number;
+  status: "ok" | "error";
+  error: string | null;
+  attrs: SpanAttrs;
+};
+
+export type Trace = {
+  id: string;
+  kind: TraceKind;
+  startedAt: number;
+  spans: SpanRecord[];
+  dropped: number;
+};
+
+type TraceContext = { trace: Trace; span: SpanRecord | null };
+
+const MAX_SPANS = 2000;
+const INSERT_CHUNK = 500;
+
+const storage = new AsyncLocalStorage<TraceContext>();
+
+function errorMessage(e: unknown): string {
+  return (e instanceof Error ? e.message : String(e)).slice(0, 500);
+}
+
+export function createTrace(kind: TraceKind): Trace {
+  return { id: randomUUID(), kind, startedAt: performance.now(), spans: [], dropped: 0 };
+}
+
+export function runInTrace<T>(trace: Trace, fn: () => Promise<T>): Promise<T> {
+  return storage.run({ trace, span: null }, fn);
+}
+
+function openSpan(ctx: TraceContext, name: string, attrs: SpanAttrs | undefined): SpanRecord | null {
+  const { trace } = ctx;
+  if (trace.spans.length >= MAX_SPANS) {
+    trace.dropped += 1;
+    return null;
+  }
+  const span: SpanRecord = {
+    spanId: trace.spans.length,
+    parentId: ctx.span?.spanId ?? null,
+    name,
+    startMs: Math.round(performance.now() - trace.startedAt),
+    durationMs: 0,
+    status: "ok",
+    error: null,
+    attrs: { ...attrs },
+  };
+  trace.spans.push(span);
+  return span;
+}
+
+export async function withSpan<T>(name: string, fn: () => Promise<T>, attrs?: SpanAttrs): Promise<T> {
+  const ctx = storage.getStore();
+  if (!ctx) return fn();
+  const span = openSpan(ctx, name, attrs);
+  if (!span) return fn();
+
+  const started = performance.now();
+  try {
+    return await storage.run({ trace: ctx.trace, span }, fn);
+  } catch (e) {
+    span.status = "error";
+    span.error = errorMessage(e);
+    throw e;
+  } finally {
+    span.durationMs = Math.round(performance.now() - started);
+  }
+}
+
+export function setSpanAttrs(attrs: SpanAttrs) {
+  const span = storage.getStore()?.span;
+  if (span) Object.assign(span.attrs, attrs);
+}
+
+// For errors a caller deliberately swallows: leaves a zero-length failed span behind.
+export function recordSpanError(name: string, e: unknown, attrs?: SpanAttrs) {
+  const ctx = storage.getStore();
+  if (!ctx) return;
+  const span = openSpan(ctx, name, attrs);
+  if (!span) return;
+  span.status = "error";
+  span.error = errorMessage(e);
+}
+
+export async function saveTrace(
+  supabase: SupabaseAdmin,
+  trace: Trace,
+  ref: { runId?: string | null; jobId?: string | null },
+) {
+  const rows = trace.spans.map((s) => ({
+    trace_id: trace.id,
+    trace_kind: trace.kind,
+    run_id: ref.runId ?? null,
+    job_id: ref.jobId ?? null,
+    span_id: s.spanId,
+    parent_id: s.parentId,
+    name: s.name,
+    start_ms: s.startMs,
+    duration_ms: s.durationMs,
+    status: s.status,
+    error_message: s.error,
+    attrs: s.attrs,
+  }));
+  try {
+    for (let offset = 0; offset < rows.length; offset += INSERT_CHUNK) {
+      const { error } = await supabase.from("run_span").insert(rows.slice(offset, offset + INSERT_CHUNK));
+      if (error) throw error;
+    }
+  } catch {
+    // tracing is best-effort
+  }
+}
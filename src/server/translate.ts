@@ -1,4 +1,9 @@
 import { getOptionalEnv } from "../lib/env";
+import { translationCacheKey } from "../lib/hash";
+import { createRateLimiter, mapWithConcurrency } from "../lib/concurrency";
+import { createSupabaseAdmin } from "../lib/supabaseAdmin";
+import { chatCompletion, type LlmProvider } from "./llm";
+import { setSpanAttrs, withSpan } from "./tracing";
 
 export type TranslatableItem = {
   title: string;
@@ -10,22 +15,6 @@ export type TranslationResult = {
   summaryZh: string | null;
 };
 
-type OpenAIChatResponse = {
-  choices?: Array<{
-    message?: {
-      content?: string;
-    };
-  }>;
-};
-
-type ZhipuChatResponse = {
-  choices?: Array<{
-    message?: {
-      content?: string;
-    };
-  }>;
-};
-
 function extractJsonArray(text: string): unknown {
   const start = text.indexOf("[");
   const end = text.lastIndexOf("]");
@@ -36,44 +25,29 @@ function extractJsonArray(text: string): unknown {
   return JSON.parse(slice);
 }
 
-async function callOpenAITranslate(payload: {
-  items: Array<{ i: number; title: string; summary: string | null }>;
-}): Promise<TranslationResult[]> {
-  const apiKey = getOptionalEnv("OPENAI_API_KEY");
-  if (!apiKey) return payload.items.map(() => ({ titleZh: null, summaryZh: null }));
-
-  const model = getOptionalEnv("OPENAI_TRANSLATE_MODEL") ?? "gpt-4o-mini";
-  const body = {
-    model,
-    temperature: 0.2,
+type TranslationProvider = LlmProvider;
+
+const TRANSLATE_SYSTEM_PROMPT =
+  "你是翻译引擎。把输入的标题与摘要翻译成简体中文。保持专有名词、公司名、产品名、股票代码、计量单位与数字不变；不要添加解释。输出必须是严格的 JSON 数组，每个元素为 {i:number, title_zh:string|null, summary_zh:string|null}，顺序与输入一致。";
+
+async function callTranslate(
+  preferred: TranslationProvider,
+  payload: { items: Array<{ i: number; title: string; summary: string | null }> },
+  deadline?: number,
+): Promise<{ results: TranslationResult[]; provider: TranslationProvider }> {
+  const { content, provider } = await chatCompletion({
+    preferred,
+    label: "translate",
+    models: {
+      openai: getOptionalEnv("OPENAI_TRANSLATE_MODEL") ?? "gpt-4o-mini",
+      zhipu: getOptionalEnv("ZHIPU_MODEL") ?? getOptionalEnv("GLM_MODEL") ?? "glm-4.6v",
+    },
     messages: [
-      {
-        role: "system",
-        content:
-          "你是翻译引擎。把输入的标题与摘要翻译成简体中文。保持专有名词、公司名、产品名、股票代码、计量单位与数字不变；不要添加解释。输出必须是严格的 JSON 数组，每个元素为 {i:number, title_zh:string|null, summary_zh:string|null}，顺序与输入一致。",
-      },
-      {
-        role: "user",
-        content: JSON.stringify(payload),
-      },
+      { role: "system", content: TRANSLATE_SYSTEM_PROMPT },
+      { role: "user", content: JSON.stringify(payload) },
     ],
-  };
-
-  const res = await fetch("https://api.openai.com/v1/chat/completions", {
-    method: "POST",
-    headers: {
-      "content-type": "application/json",
-      authorization: `Bearer ${apiKey}`,
-    },
-    body: JSON.stringify(body),
+    deadline,
   });
-
-  if (!res.ok) {
-    throw new Error(`OpenAI translate HTTP ${res.status}`);
-  }
-
-  const json = (await res.json()) as OpenAIChatResponse;
-  const content = json.choices?.[0]?.message?.content ?? "";
   const parsed = extractJsonArray(content) as Array<{ i: number; title_zh?: string | null; summary_zh?: string | null }>;
 
   const map = new Map<number, TranslationResult>();
@@ -85,88 +59,146 @@ async function callOpenAITranslate(payload: {
     });
   }
 
-  return payload.items.map((it) => map.get(it.i) ?? { titleZh: null, summaryZh: null });
+  return { results: payload.items.map((it) => map.get(it.i) ?? { titleZh: null, summaryZh: null }), provider };
 }
 
-async function callZhipuTranslate(payload: {
-  items: Array<{ i: number; title: string; summary: string | null }>;
-}): Promise<TranslationResult[]> {
-  const apiKey = getOptionalEnv("ZHIPU_API_KEY") ?? getOptionalEnv("GLM");
-  if (!apiKey) return payload.items.map(() => ({ titleZh: null, summaryZh: null }));
-
-  const model = getOptionalEnv("ZHIPU_MODEL") ?? getOptionalEnv("GLM_MODEL") ?? "glm-4.6v";
-  const body = {
-    model,
-    temperature: 0.2,
-    stream: false,
-    messages: [
-      {
-        role: "system",
-        content:
-          "你是翻译引擎。把输入的标题与摘要翻译成简体中文。保持专有名词、公司名、产品名、股票代码、计量单位与数字不变；不要添加解释。输出必须是严格的 JSON 数组，每个元素为 {i:number, title_zh:string|null, summary_zh:string|null}，顺序与输入一致。",
-      },
-      {
-        role: "user",
-        content: JSON.stringify(payload),
-      },
-    ],
-  };
+function pickProvider(): TranslationProvider | null {
+  const forced = (getOptionalEnv("TRANSLATION_PROVIDER") ?? "").toLowerCase();
+  if (forced === "zhipu") return (getOptionalEnv("ZHIPU_API_KEY") ?? getOptionalEnv("GLM")) ? "zhipu" : null;
+  if (forced === "openai") return getOptionalEnv("OPENAI_API_KEY") ? "openai" : null;
 
-  const res = await fetch("https://open.bigmodel.cn/api/paas/v4/chat/completions", {
-    method: "POST",
-    headers: {
-      "content-type": "application/json",
-      authorization: `Bearer ${apiKey}`,
-    },
-    body: JSON.stringify(body),
-  });
+  if (getOptionalEnv("ZHIPU_API_KEY") ?? getOptionalEnv("GLM")) return "zhipu";
+  if (getOptionalEnv("OPENAI_API_KEY")) return "openai";
+  return null;
+}
 
-  if (!res.ok) {
-    throw new Error(`Zhipu translate HTTP ${res.status}`);
-  }
+function estimateTokens(text: string | null): number {
+  if (!text) return 0;
+  const cjk = (text.match(/[\u3400-\u9FFF]/g) ?? []).length;
+  return cjk + Math.ceil((text.length - cjk) / 4);
+}
 
-  const json = (await res.json()) as ZhipuChatResponse;
-  const content = json.choices?.[0]?.message?.content ?? "";
-  const parsed = extractJsonArray(content) as Array<{ i: number; title_zh?: string | null; summary_zh?: string | null }>;
+function envInt(name: string, fallback: number, min: number, max: number): number {
+  const n = Number.parseInt(getOptionalEnv(name) ?? "", 10);
+  if (!Number.isFinite(n)) return fallback;
+  return Math.max(min, Math.min(max, n));
+}
 
-  const map = new Map<number, TranslationResult>();
-  for (const row of parsed) {
-    if (typeof row?.i !== "number") continue;
-    map.set(row.i, {
-      titleZh: typeof row.title_zh === "string" ? row.title_zh.trim() : null,
-      summaryZh: typeof row.summary_zh === "string" ? row.summary_zh.trim() : null,
-    });
+function buildBatches(items: TranslatableItem[], tokenBudget: number, maxBatchItems: number): number[][] {
+  const batches: number[][] = [];
+  let current: number[] = [];
+  let tokens = 0;
+  items.forEach((it, idx) => {
+    const cost = estimateTokens(it.title) + estimateTokens(it.summary) + 12;
+    if (current.length && (tokens + cost > tokenBudget || current.length >= maxBatchItems)) {
+      batches.push(current);
+      current = [];
+      tokens = 0;
+    }
+    current.push(idx);
+    tokens += cost;
+  });
+  if (current.length) batches.push(current);
+  return batches;
+}
+
+function cacheEnabled(): boolean {
+  return Boolean(getOptionalEnv("SUPABASE_URL") && getOptionalEnv("SUPABASE_SERVICE_ROLE_KEY"));
+}
+
+async function readCache(keys: string[]): Promise<Map<string, TranslationResult>> {
+  const out = new Map<string, TranslationResult>();
+  if (!keys.length || !cacheEnabled()) return out;
+  try {
+    const supabase = createSupabaseAdmin();
+    for (let offset = 0; offset < keys.length; offset += 200) {
+      const { data } = await supabase
+        .from("translation_cache")
+        .select("key,title_zh,summary_zh")
+        .in("key", keys.slice(offset, offset + 200));
+      for (const row of (data ?? []) as Array<{ key: string; title_zh: string | null; summary_zh: string | null }>) {
+        out.set(row.key, { titleZh: row.title_zh, summaryZh: row.summary_zh });
+      }
+    }
+  } catch {
+    // cache is best-effort
   }
+  return out;
+}
 
-  return payload.items.map((it) => map.get(it.i) ?? { titleZh: null, summaryZh: null });
+async function writeCache(entries: Array<{ key: string; result: TranslationResult; provider: TranslationProvider }>) {
+  const rows = entries
+    .filter((e) => e.result.titleZh)
+    .map((e) => ({ key: e.key, title_zh: e.result.titleZh, summary_zh: e.result.summaryZh, provider: e.provider }));
+  if (!rows.length || !cacheEnabled()) return;
+  try {
+    const supabase = createSupabaseAdmin();
+    await supabase.from("translation_cache").upsert(rows, { onConflict: "key" });
+  } catch {
+    // cache is best-effort
+  }
 }
 
-type TranslationProvider = "zhipu" | "openai";
+async function translateWith(
+  provider: TranslationProvider,
+  items: TranslatableItem[],
+  deadline?: number,
+): Promise<TranslationResult[]> {
+  const keys = items.map((it) => translationCacheKey(it.title, it.summary));
+  const uniqueKeys: string[] = [];
+  const firstByKey = new Map<string, TranslatableItem>();
+  keys.forEach((key, idx) => {
+    if (firstByKey.has(key)) return;
+    firstByKey.set(key, items[idx]);
+    uniqueKeys.push(key);
+  });
 
-function pickProvider(): TranslationProvider | null {
-  const forced = (getOptionalEnv("TRANSLATION_PROVIDER") ?? "").toLowerCase();
-  if (forced === "zhipu") return (getOptionalEnv("ZHIPU_API_KEY") ?? getOptionalEnv("GLM")) ? "zhipu" : null;
-  if (forced === "openai") return getOptionalEnv("OPENAI_API_KEY") ? "openai" : null;
+  const resolved = await readCache(uniqueKeys);
+  const missKeys = uniqueKeys.filter((k) => !resolved.has(k));
+  const missItems = missKeys.map((k) => firstByKey.get(k) as TranslatableItem);
+
+  const batches = buildBatches(
+    missItems,
+    envInt("TRANSLATE_BATCH_TOKENS", 1500, 200, 8000),
+    envInt("TRANSLATE_BATCH_MAX_ITEMS", 20, 1, 50),
+  );
+  const throttle = createRateLimiter(envInt("TRANSLATE_RPM", 30, 1, 600));
+  const fresh: Array<{ key: string; result: TranslationResult; provider: TranslationProvider }> = [];
+  const errors: unknown[] = [];
+
+  await mapWithConcurrency(batches, envInt("TRANSLATE_CONCURRENCY", 3, 1, 16), async (batch) => {
+    const payload = {
+      items: batch.map((missIdx, i) => ({ i, title: missItems[missIdx].title, summary: missItems[missIdx].summary })),
+    };
+    try {
+      await throttle();
+      const translated = await callTranslate(provider, payload, deadline);
+      batch.forEach((missIdx, i) => {
+        const result = translated.results[i];
+        if (!result) return;
+        resolved.set(missKeys[missIdx], result);
+        fresh.push({ key: missKeys[missIdx], result, provider: translated.provider });
+      });
+    } catch (e) {
+      errors.push(e);
+    }
+  });
+  setSpanAttrs({ cache_hits: uniqueKeys.length - missKeys.length, batches: batches.length, batch_errors: errors.length });
 
-  if (getOptionalEnv("ZHIPU_API_KEY") ?? getOptionalEnv("GLM")) return "zhipu";
-  if (getOptionalEnv("OPENAI_API_KEY")) return "openai";
-  return null;
+  if (errors.length && !fresh.length && missKeys.length) throw errors[0];
+  await writeCache(fresh);
+
+  return keys.map((key) => resolved.get(key) ?? { titleZh: null, summaryZh: null });
 }
 
-export async function translateItemsToZh(items: TranslatableItem[]): Promise<TranslationResult[]> {
+// `deadline` (epoch ms) bounds every model call, for callers that must finish inside a
+// function time limit; batches that run out of time come back untranslated.
+export async function translateItemsToZh(
+  items: TranslatableItem[],
+  opts: { deadline?: number } = {},
+): Promise<TranslationResult[]> {
   const enabled = (getOptionalEnv("TRANSLATE_TO_ZH") ?? "1") !== "0";
   const provider = pickProvider();
   if (!enabled || !provider) return items.map(() => ({ titleZh: null, summaryZh: null }));
-
-  const results: TranslationResult[] = [];
-  const batchSize = 10;
-  for (let offset = 0; offset < items.length; offset += batchSize) {
-    const batch = items.slice(offset, offset + batchSize);
-    const payload = { items: batch.map((it, idx) => ({ i: idx, title: it.title, summary: it.summary })) };
-    const translated =
-      provider === "zhipu" ? await callZhipuTranslate(payload) : await callOpenAITranslate(payload);
-    results.push(...translated);
-  }
-
-  return results;
+  return withSpan("translate", () => translateWith(provider, items, opts.deadline), { items: items.length });
 }
@@ -0,0 +1,64 @@
+import { createSupabaseAdmin } from "../lib/supabaseAdmin";
+import { translateItemsToZh, type TranslationResult } from "./translate";
+import { invalidateNewsCounts } from "./newsQuery";
+import { invalidateNewsReads } from "./readCache";
+import { recordSpanError } from "./tracing";
+
+const NON_ZH_FILTER = '("zh","zh-cn","zh-hans")';
+
+export async function translatePendingNews(params: {
+  limit: number;
+  deadline?: number;
+}): Promise<{ translated: number; remaining: number }> {
+  const supabase = createSupabaseAdmin();
+  const limit = Math.max(1, Math.min(200, Math.trunc(params.limit) || 1));
+
+  const { data: items, error: queryErr } = await supabase
+    .from("news_item")
+    .select("id,topic,title,summary")
+    .is("title_zh", null)
+    .eq("is_cluster_head", true)
+    .not("language", "in", NON_ZH_FILTER)
+    .order("published_at", { ascending: false })
+    .limit(limit);
+
+  if (queryErr) throw queryErr;
+
+  let translated = 0;
+  const rows = (items ?? []) as Array<{ id: string; topic: string; title: string; summary: string | null }>;
+  let results: TranslationResult[] = [];
+  if (rows.length) {
+    try {
+      results = await translateItemsToZh(
+        rows.map((it) => ({ title: it.title, summary: it.summary })),
+        { deadline: params.deadline },
+      );
+    } catch (e) {
+      // the model call is best-effort: leave the rows for the next call. Database errors
+      // below propagate so callers don't report a failed write as done.
+      recordSpanError("translate.backfill", e, { rows: rows.length });
+    }
+  }
+
+  const updates = rows
+    .map((it, i) => ({ id: it.id, title_zh: results[i]?.titleZh ?? null, summary_zh: results[i]?.summaryZh ?? null }))
+    .filter((u) => u.title_zh);
+  if (updates.length) {
+    const { data: applied, error: applyErr } = await supabase.rpc("apply_news_translations", { items: updates });
+    if (applyErr) throw applyErr;
+    translated = typeof applied === "number" ? applied : updates.length;
+    await invalidateNewsCounts(supabase, { searchOnly: true });
+    const translatedIds = new Set(updates.map((u) => u.id));
+    invalidateNewsReads(Array.from(new Set(rows.filter((r) => translatedIds.has(r.id)).map((r) => r.topic))));
+  }
+
+  const { count, error: countErr } = await supabase
+    .from("news_item")
+    .select("id", { count: "exact", head: true })
+    .is("title_zh", null)
+    .eq("is_cluster_head", true)
+    .not("language", "in", NON_ZH_FILTER);
+  if (countErr) throw countErr;
+
+  return { translated, remaining: count ?? 0 };
+}
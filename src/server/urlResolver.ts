@@ -0,0 +1,276 @@
+import { getOptionalEnv } from "../lib/env";
+import { canonicalizeUrl } from "../lib/hash";
+import { mapWithConcurrency } from "../lib/concurrency";
+import { createLru } from "../lib/lru";
+import { createSupabaseAdmin } from "../lib/supabaseAdmin";
+import { httpRequest } from "./http";
+import { setSpanAttrs, withSpan } from "./tracing";
+
+// Google News RSS links are news.google.com/rss/articles/<id> redirects, so the same
+// publisher article gets a different URL (and content_hash) per token and never matches
+// its GDELT copy. Resolution order: in-process LRU, offline decode of the older id format,
+// the url_alias table, then the network (HTTP redirect, else the batchexecute endpoint the
+// article page itself calls). Failures keep the redirect URL.
+
+type AliasRow = { alias_url: string; resolved_url: string | null; method: string; resolved_at: string };
+
+type Resolution = { url: string | null; method: "redirect" | "batchexecute" | "failed" };
+
+const LRU_SIZE = 5000;
+const LOOKUP_CHUNK = 200;
+const RESOLVE_TIMEOUT_MS = 8000;
+const FAILED_RETRY_MS = 24 * 60 * 60 * 1000;
+const USER_AGENT = "Mozilla/5.0 (compatible; daily-news-bot)";
+
+// null marks a redirect that could not be resolved; retried after FAILED_RETRY_MS via url_alias.
+const lru = createLru<string, string | null>(LRU_SIZE);
+
+function envInt(name: string, fallback: number, min: number, max: number): number {
+  const n = Number.parseInt(getOptionalEnv(name) ?? "", 10);
+  if (!Number.isFinite(n)) return fallback;
+  return Math.max(min, Math.min(max, n));
+}
+
+function resolverEnabled(): boolean {
+  return getOptionalEnv("GOOGLE_NEWS_RESOLVE") !== "0";
+}
+
+function stateEnabled(): boolean {
+  return Boolean(getOptionalEnv("SUPABASE_URL") && getOptionalEnv("SUPABASE_SERVICE_ROLE_KEY"));
+}
+
+function googleNewsBase(): string {
+  return (getOptionalEnv("GOOGLE_NEWS_BASE_URL") ?? "https://news.google.com").replace(/\/+$/, "");
+}
+
+function isGoogleHost(url: string): boolean {
+  try {
+    const host = new URL(url).hostname;
+    return host === "google.com" || host.endsWith(".google.com");
+  } catch {
+    return true;
+  }
+}
+
+export function googleNewsArticleId(url: string): string | null {
+  try {
+    const u = new URL(url);
+    if (u.hostname !== "news.google.com") return null;
+    return /^\/(?:rss\/)?articles\/([A-Za-z0-9_-]+)/.exec(u.pathname)?.[1] ?? null;
+  } catch {
+    return null;
+  }
+}
+
+function aliasKey(id: string): string {
+  return `https://news.google.com/rss/articles/${id}`;
+}
+
+// Older ids are base64url protobuf: 0x08 0x13 0x22, a varint length, then the URL itself.
+// Newer ones carry an opaque "AU_yqL..." token and need the network.
+export function decodeGoogleNewsId(id: string): string | null {
+  const bytes = Buffer.from(id, "base64url");
+  if (bytes.length < 5 || bytes[0] !== 0x08 || bytes[1] !== 0x13 || bytes[2] !== 0x22) return null;
+  let len = 0;
+  let shift = 0;
+  let pos = 3;
+  while (pos < bytes.length && shift < 28) {
+    const b = bytes[pos++];
+    len |= (b & 0x7f) << shift;
+    if (!(b & 0x80)) break;
+    shift += 7;
+  }
+  if (len <= 0 || pos + len > bytes.length) return null;
+  const url = bytes.subarray(pos, pos + len).toString("utf8");
+  return /^https?:\/\/[^\s]+$/.test(url) ? url : null;
+}
+
+function parseBatchexecute(text: string): string | null {
+  const body = text.split("\n\n")[1];
+  if (!body) return null;
+  const rows = JSON.parse(body) as unknown[];
+  for (const row of rows) {
+    if (!Array.isArray(row) || row[0] !== "wrb.fr" || typeof row[2] !== "string") continue;
+    const inner = JSON.parse(row[2]) as unknown[];
+    if (inner[0] === "garturlres" && typeof inner[1] === "string") return inner[1];
+  }
+  return null;
+}
+
+// Throws on transport errors (timeouts, open circuit) so the caller can retry next run;
+// returns a "failed" resolution only when Google answered without a usable URL.
+async function resolveOnline(id: string): Promise<Resolution> {
+  const base = googleNewsBase();
+  const res = await httpRequest("google_news", `${base}/rss/articles/${id}?oc=5`, {
+    headers: { "user-agent": USER_AGENT },
+    redirect: "manual",
+    timeoutMs: RESOLVE_TIMEOUT_MS,
+  });
+  const location = res.headers.get("location");
+  if (res.status >= 300 && res.status < 400 && location) {
+    const target = new URL(location, base).toString();
+    return isGoogleHost(target) ? { url: null, method: "failed" } : { url: target, method: "redirect" };
+  }
+  if (!res.ok) {
+    if (res.status === 429 || res.status >= 500) throw new Error(`Google News HTTP ${res.status}`);
+    return { url: null, method: "failed" };
+  }
+
+  const sig = /data-n-a-sg="([^"]+)"/.exec(res.text)?.[1];
+  const ts = /data-n-a-ts="([^"]+)"/.exec(res.text)?.[1];
+  if (!sig || !ts) return { url: null, method: "failed" };
+
+  const req = [
+    "garturlreq",
+    [
+      ["X", "X", ["X", "X"], null, null, 1, 1, "US:en", null, 1, null, null, null, null, null, 0, 1],
+      "X",
+      "X",
+      1,
+      [1, 1, 1],
+      1,
+      1,
+      null,
+      0,
+      0,
+      null,
+      0,
+    ],
+    id,
+    Number(ts),
+    sig,
+  ];
+  const out = await httpRequest("google_news", `${base}/_/DotsSplashUi/data/batchexecute`, {
+    method: "POST",
+    headers: { "content-type": "application/x-www-form-urlencoded;charset=UTF-8", "user-agent": USER_AGENT },
+    body: `f.req=${encodeURIComponent(JSON.stringify([[["Fbv4je", JSON.stringify(req), null, "generic"]]]))}`,
+    timeoutMs: RESOLVE_TIMEOUT_MS,
+  });
+  if (!out.ok) {
+    if (out.status === 429 || out.status >= 500) throw new Error(`Google News HTTP ${out.status}`);
+    return { url: null, method: "failed" };
+  }
+  try {
+    const url = parseBatchexecute(out.text);
+    return url && !isGoogleHost(url) ? { url, method: "batchexecute" } : { url: null, method: "failed" };
+  } catch {
+    return { url: null, method: "failed" };
+  }
+}
+
+async function loadAliases(keys: string[]): Promise<Map<string, AliasRow>> {
+  const out = new Map<string, AliasRow>();
+  if (!keys.length || !stateEnabled()) return out;
+  try {
+    const supabase = createSupabaseAdmin();
+    for (let offset = 0; offset < keys.length; offset += LOOKUP_CHUNK) {
+      const { data, error } = await supabase
+        .from("url_alias")
+        .select("alias_url,resolved_url,method,resolved_at")
+        .in("alias_url", keys.slice(offset, offset + LOOKUP_CHUNK));
+      if (error) throw error;
+      for (const row of (data ?? []) as AliasRow[]) out.set(row.alias_url, row);
+    }
+  } catch {
+    // the table is a cache; fall back to resolving online
+  }
+  return out;
+}
+
+async function saveAliases(rows: Array<Omit<AliasRow, "resolved_at">>): Promise<void> {
+  if (!rows.length || !stateEnabled()) return;
+  try {
+    const supabase = createSupabaseAdmin();
+    const now = new Date().toISOString();
+    await supabase.from("url_alias").upsert(
+      rows.map((r) => ({ ...r, resolved_at: now })),
+      { onConflict: "alias_url" },
+    );
+  } catch {
+    // best-effort
+  }
+}
+
+// Returns input URL -> canonical publisher URL for every Google News redirect that could
+// be resolved; other URLs are left out of the map.
+export async function resolveGoogleNewsUrls(urls: string[]): Promise<Map<string, string>> {
+  const resolved = new Map<string, string>();
+  if (!resolverEnabled()) return resolved;
+
+  const idsByUrl = new Map<string, string>();
+  for (const url of urls) {
+    const id = googleNewsArticleId(url);
+    if (id) idsByUrl.set(url, id);
+  }
+  if (!idsByUrl.size) return resolved;
+
+  return withSpan(
+    "rss.resolve",
+    async () => {
+      const byId = new Map<string, string | null>();
+      const pending = new Set<string>();
+      let decoded = 0;
+      for (const id of new Set(idsByUrl.values())) {
+        const key = aliasKey(id);
+        if (lru.has(key)) {
+          byId.set(id, lru.get(key) ?? null);
+          continue;
+        }
+        const url = decodeGoogleNewsId(id);
+        if (url) {
+          decoded += 1;
+          lru.set(key, url);
+          byId.set(id, url);
+          continue;
+        }
+        pending.add(id);
+      }
+      const lruHits = byId.size - decoded;
+
+      const stored = await loadAliases(Array.from(pending, aliasKey));
+      const now = Date.now();
+      let cached = 0;
+      for (const id of Array.from(pending)) {
+        const row = stored.get(aliasKey(id));
+        if (!row) continue;
+        if (!row.resolved_url && now - new Date(row.resolved_at).getTime() > FAILED_RETRY_MS) continue;
+        lru.set(aliasKey(id), row.resolved_url);
+        byId.set(id, row.resolved_url);
+        pending.delete(id);
+        cached += 1;
+      }
+
+      const fresh: Array<Omit<AliasRow, "resolved_at">> = [];
+      let transient = 0;
+      await mapWithConcurrency(Array.from(pending), envInt("GOOGLE_NEWS_RESOLVE_CONCURRENCY", 4, 1, 16), async (id) => {
+        let result: Resolution;
+        try {
+          result = await resolveOnline(id);
+        } catch {
+          transient += 1;
+          return;
+        }
+        lru.set(aliasKey(id), result.url);
+        byId.set(id, result.url);
+        fresh.push({ alias_url: aliasKey(id), resolved_url: result.url, method: result.method });
+      });
+      await saveAliases(fresh);
+
+      for (const [url, id] of idsByUrl) {
+        const target = byId.get(id);
+        if (target) resolved.set(url, canonicalizeUrl(target));
+      }
+      setSpanAttrs({
+        links: idsByUrl.size,
+        lru: lruHits,
+        decoded,
+        cached,
+        fetched: fresh.length,
+        failed: fresh.filter((r) => !r.resolved_url).length,
+        transient,
+      });
+      return resolved;
+    },
+    { links: idsByUrl.size },
+  );
+}
@@ -0,0 +1,24 @@
+create table if not exists public.translation_cache (
+  key text primary key,
+  title_zh text null,
+  summary_zh text null,
+  provider text not null,
+  created_at timestamptz not null default now()
+);
+
+alter table public.translation_cache enable row level security;
+
+create or replace function public.apply_news_translations(items jsonb)
+returns integer
+language sql
+as $$
+  with updated as (
+    update public.news_item n
+    set title_zh = r.title_zh,
+        summary_zh = r.summary_zh
+    from jsonb_to_recordset(items) as r(id uuid, title_zh text, summary_zh text)
+    where n.id = r.id
+    returning 1
+  )
+  select count(*)::int from updated;
+$$;
@@ -0,0 +1,25 @@
+create or replace function public.ingest_news_items(items jsonb)
+returns table (inserted_hash text)
+language sql
+as $$
+  insert into public.news_item as n (
+    topic, title, title_zh, url, source, published_at, content_hash, language, summary, summary_zh
+  )
+  select
+    r.topic, r.title, r.title_zh, r.url, r.source, r.published_at, r.content_hash,
+    coalesce(r.language, 'und'), r.summary, r.summary_zh
+  from jsonb_to_recordset(items) as r(
+    topic text,
+    title text,
+    title_zh text,
+    url text,
+    source text,
+    published_at timestamptz,
+    content_hash text,
+    language text,
+    summary text,
+    summary_zh text
+  )
+  on conflict do nothing
+  returning n.content_hash;
+$$;
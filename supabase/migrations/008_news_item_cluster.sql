@@ -0,0 +1,62 @@
+alter table public.news_item add column if not exists fingerprint text null;
+alter table public.news_item add column if not exists fingerprint_bands text[] null;
+alter table public.news_item add column if not exists cluster_id text null;
+alter table public.news_item add column if not exists is_cluster_head boolean not null default true;
+alter table public.news_item add column if not exists cluster_size int not null default 1;
+
+create index if not exists idx_news_item_fingerprint_bands on public.news_item using gin (fingerprint_bands);
+create index if not exists idx_news_item_cluster_id on public.news_item (cluster_id);
+create index if not exists idx_news_item_head_topic_published
+  on public.news_item (topic, published_at desc)
+  where is_cluster_head;
+
+drop function if exists public.ingest_news_items(jsonb);
+
+create or replace function public.ingest_news_items(items jsonb)
+returns table (inserted_hash text)
+language plpgsql
+as $$
+declare
+  inserted text[];
+  touched text[];
+begin
+  with ins as (
+    insert into public.news_item as n (
+      topic, title, title_zh, url, source, published_at, content_hash, language, summary, summary_zh,
+      fingerprint, fingerprint_bands, cluster_id, is_cluster_head
+    )
+    select
+      r.topic, r.title, r.title_zh, r.url, r.source, r.published_at, r.content_hash,
+      coalesce(r.language, 'und'), r.summary, r.summary_zh,
+      r.fingerprint, r.fingerprint_bands, coalesce(r.cluster_id, r.content_hash), coalesce(r.is_cluster_head, true)
+    from jsonb_to_recordset(items) as r(
+      topic text,
+      title text,
+      title_zh text,
+      url text,
+      source text,
+      published_at timestamptz,
+      content_hash text,
+      language text,
+      summary text,
+      summary_zh text,
+      fingerprint text,
+      fingerprint_bands text[],
+      cluster_id text,
+      is_cluster_head boolean
+    )
+    on conflict do nothing
+    returning n.content_hash, n.cluster_id
+  )
+  select coalesce(array_agg(ins.content_hash), '{}'), coalesce(array_agg(distinct ins.cluster_id), '{}')
+  into inserted, touched
+  from ins;
+
+  update public.news_item h
+  set cluster_size = (select count(*) from public.news_item m where m.cluster_id = h.cluster_id)
+  where h.content_hash = any(touched)
+    and h.is_cluster_head;
+
+  return query select unnest(inserted);
+end;
+$$;
@@ -0,0 +1,56 @@
+create or replace function public.news_search_tokens(input text)
+returns text[]
+language sql
+immutable
+parallel safe
+as $$
+  select coalesce(array_agg(distinct t.tok), '{}')
+  from (
+    select lower(m[1]) as tok
+    from regexp_matches(normalize(coalesce(input, ''), NFKC), '([A-Za-z0-9]+)', 'g') as m
+    union all
+    select substr(run[1], i, 2)
+    from regexp_matches(normalize(coalesce(input, ''), NFKC), '([\u3400-\u9fff]+)', 'g') as run,
+         generate_series(1, greatest(char_length(run[1]) - 1, 1)) as i
+  ) t;
+$$;
+
+alter table public.news_item
+add column if not exists search_tokens text[]
+generated always as (
+  public.news_search_tokens(
+    coalesce(title, '') || ' ' || coalesce(title_zh, '') || ' ' ||
+    coalesce(summary, '') || ' ' || coalesce(summary_zh, '') || ' ' || coalesce(source, '')
+  )
+) stored;
+
+create index if not exists idx_news_item_search_tokens on public.news_item using gin (search_tokens);
+
+create or replace function public.search_news_item(
+  p_topic text,
+  p_tokens text[],
+  p_since timestamptz default null,
+  p_collapse boolean default true,
+  p_limit int default 50,
+  p_offset int default 0
+)
+returns setof public.news_item
+language sql
+stable
+as $$
+  select n.*
+  from public.news_item n
+  where n.topic = p_topic
+    and n.search_tokens @> p_tokens
+    and (p_since is null or n.published_at >= p_since)
+    and (not p_collapse or n.is_cluster_head)
+  order by
+    (
+      select count(*)
+      from unnest(p_tokens) as t(tok)
+      where t.tok = any(public.news_search_tokens(n.title || ' ' || coalesce(n.title_zh, '')))
+    ) desc,
+    n.published_at desc
+  limit greatest(p_limit, 1)
+  offset greatest(p_offset, 0);
+$$;
@@ -0,0 +1,20 @@
+drop index if exists public.idx_news_item_head_topic_published;
+
+create index if not exists idx_news_item_topic_published_id
+  on public.news_item (topic, published_at desc, id desc);
+
+create index if not exists idx_news_item_head_topic_published_id
+  on public.news_item (topic, published_at desc, id desc)
+  where is_cluster_head;
+
+create table if not exists public.news_count_cache (
+  filter_key text primary key,
+  topic text not null,
+  q text not null default '',
+  count int not null,
+  computed_at timestamptz not null default now()
+);
+
+create index if not exists idx_news_count_cache_topic on public.news_count_cache (topic);
+
+alter table public.news_count_cache enable row level security;
@@ -0,0 +1,15 @@
+create table if not exists public.rss_feed_state (
+  feed_url text primary key,
+  etag text null,
+  last_modified text null,
+  high_water_at timestamptz null,
+  last_status int null,
+  last_bytes int not null default 0,
+  last_parse_ms int not null default 0,
+  last_item_count int not null default 0,
+  last_new_items int not null default 0,
+  fetched_at timestamptz null,
+  updated_at timestamptz not null default now()
+);
+
+alter table public.rss_feed_state enable row level security;
@@ -0,0 +1,4 @@
+-- Per-stage timings of the streaming ingest pipeline:
+-- { total_ms, stages: { fetch|filter|enrich|write: { startedMs, endedMs, busyMs, items } }, source_errors }
+alter table public.run_log
+  add column if not exists stage_timings jsonb;
@@ -0,0 +1,28 @@
+-- Digest cache keyed by the candidate set (ordered content hashes returned by loadCandidates).
+alter table public.ai_digest_job
+  add column if not exists candidate_fingerprint text null,
+  add column if not exists candidate_hashes text[] null,
+  add column if not exists cache_hit text null check (cache_hit in ('miss', 'exact', 'incremental')),
+  add column if not exists tokens_used int not null default 0,
+  add column if not exists tokens_saved int not null default 0;
+
+create index if not exists idx_ai_digest_job_cache_lookup
+  on public.ai_digest_job (topic, days, q, status, created_at desc);
+
+create or replace view public.ai_digest_cache_stats
+with (security_invoker = true) as
+select
+  date_trunc('day', created_at) as day,
+  count(*) filter (where cache_hit is not null) as jobs,
+  count(*) filter (where cache_hit = 'exact') as exact_hits,
+  count(*) filter (where cache_hit = 'incremental') as incremental_hits,
+  round(
+    count(*) filter (where cache_hit in ('exact', 'incremental'))::numeric
+      / nullif(count(*) filter (where cache_hit is not null), 0),
+    3
+  ) as hit_rate,
+  coalesce(sum(tokens_used), 0) as tokens_used,
+  coalesce(sum(tokens_saved), 0) as tokens_saved
+from public.ai_digest_job
+where status = 'SUCCESS'
+group by 1;
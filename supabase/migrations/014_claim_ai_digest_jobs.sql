@@ -0,0 +1,23 @@
+-- Atomically claim up to p_limit due jobs; concurrent workers skip rows another worker holds.
+create or replace function public.claim_ai_digest_jobs(p_limit int)
+returns setof public.ai_digest_job
+language sql
+as $$
+  with picked as (
+    select id
+    from public.ai_digest_job
+    where status = 'QUEUED'
+      and (next_run_at is null or next_run_at <= now())
+    order by created_at
+    limit greatest(p_limit, 1)
+    for update skip locked
+  )
+  update public.ai_digest_job j
+  set status = 'RUNNING',
+      started_at = now(),
+      updated_at = now(),
+      error_message = null
+  from picked
+  where j.id = picked.id
+  returning j.*;
+$$;
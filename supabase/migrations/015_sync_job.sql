@@ -0,0 +1,35 @@
+create table if not exists public.sync_job (
+  id uuid primary key default gen_random_uuid(),
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now(),
+  status text not null check (status in ('QUEUED', 'RUNNING', 'TRANSLATING', 'SUCCESS', 'FAILED')),
+  window_start timestamptz not null,
+  window_end timestamptz not null,
+  incremental boolean not null default true,
+  source_count int not null default 0,
+  fetched_count int not null default 0,
+  inserted_count int not null default 0,
+  translated_count int not null default 0,
+  translate_remaining int null,
+  started_at timestamptz null,
+  ended_at timestamptz null,
+  error_message text null
+);
+
+create index if not exists idx_sync_job_created_at_desc on public.sync_job (created_at desc);
+
+create table if not exists public.sync_job_source (
+  job_id uuid not null references public.sync_job (id) on delete cascade,
+  source_index int not null,
+  label text not null,
+  status text not null default 'pending' check (status in ('pending', 'fetching', 'success', 'failed')),
+  fetched_count int not null default 0,
+  inserted_count int not null default 0,
+  error_message text null,
+  started_at timestamptz null,
+  ended_at timestamptz null,
+  primary key (job_id, source_index)
+);
+
+alter table public.sync_job enable row level security;
+alter table public.sync_job_source enable row level security;
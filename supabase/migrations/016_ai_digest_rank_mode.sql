@@ -0,0 +1,4 @@
+-- How candidates were narrowed before the digest call; part of the cache key.
+-- Existing rows predate the local ranker and were picked by the LLM alone.
+alter table public.ai_digest_job
+  add column if not exists rank_mode text not null default 'llm' check (rank_mode in ('llm', 'local', 'hybrid'));
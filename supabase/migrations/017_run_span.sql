@@ -0,0 +1,52 @@
+-- Spans recorded by src/server/tracing.ts: one row per traced call, offsets relative to
+-- the start of the trace. run_id links cron/sync runs, job_id links AI digest jobs.
+create table if not exists public.run_span (
+  id bigint generated always as identity primary key,
+  trace_id uuid not null,
+  trace_kind text not null check (trace_kind in ('daily', 'sync', 'ai_digest')),
+  run_id uuid null references public.run_log (id) on delete cascade,
+  job_id uuid null references public.ai_digest_job (id) on delete cascade,
+  span_id int not null,
+  parent_id int null,
+  name text not null,
+  start_ms int not null,
+  duration_ms int not null,
+  status text not null check (status in ('ok', 'error')),
+  error_message text null,
+  attrs jsonb not null default '{}'::jsonb,
+  created_at timestamptz not null default now()
+);
+
+create index if not exists idx_run_span_run_id on public.run_span (run_id, span_id) where run_id is not null;
+create index if not exists idx_run_span_job_id on public.run_span (job_id, span_id) where job_id is not null;
+create index if not exists idx_run_span_created_at on public.run_span (created_at desc);
+
+alter table public.run_span enable row level security;
+
+-- Daily p50/p95 per span name (Asia/Shanghai days) for the /status trend table.
+create or replace function public.run_span_percentiles(p_days int default 7)
+returns table (
+  day date,
+  name text,
+  calls bigint,
+  errors bigint,
+  p50_ms int,
+  p95_ms int,
+  tokens bigint
+)
+language sql
+stable
+as $$
+  select
+    (s.created_at at time zone 'Asia/Shanghai')::date as day,
+    s.name,
+    count(*) as calls,
+    count(*) filter (where s.status = 'error') as errors,
+    percentile_cont(0.5) within group (order by s.duration_ms)::int as p50_ms,
+    percentile_cont(0.95) within group (order by s.duration_ms)::int as p95_ms,
+    coalesce(sum((s.attrs ->> 'tokens')::bigint) filter (where s.name like 'llm.%'), 0) as tokens
+  from public.run_span s
+  where s.created_at >= now() - make_interval(days => greatest(p_days, 1))
+  group by 1, 2
+  order by 1, 2;
+$$;
@@ -0,0 +1,225 @@
+-- Per-day rollups read by /status and /api/stats instead of scanning news_item/run_log.
+-- Days are Asia/Shanghai calendar days. Both tables are maintained by triggers, so
+-- ingest_news_items and apply_news_translations keep them current without app changes.
+create table if not exists public.news_daily_rollup (
+  day date not null,
+  topic text not null,
+  source text not null,
+  language text not null,
+  items int not null default 0,
+  cluster_heads int not null default 0,
+  translated int not null default 0,
+  primary key (day, topic, source, language)
+);
+
+create table if not exists public.run_daily_rollup (
+  day date primary key,
+  runs int not null default 0,
+  succeeded int not null default 0,
+  failed int not null default 0,
+  total_ms bigint not null default 0,
+  max_ms int not null default 0,
+  fetched bigint not null default 0,
+  inserted bigint not null default 0
+);
+
+alter table public.news_daily_rollup enable row level security;
+alter table public.run_daily_rollup enable row level security;
+
+-- Each row version counts +1 in its bucket when it appears and -1 when it goes away, so
+-- inserts, deletes and updates that move a row between buckets (or flip title_zh /
+-- is_cluster_head) all net out. Updates that touch none of those (cluster_size) are skipped.
+create or replace function public.news_daily_rollup_insert_trigger()
+returns trigger
+language plpgsql
+as $$
+begin
+  insert into public.news_daily_rollup as r (day, topic, source, language, items, cluster_heads, translated)
+  select
+    (published_at at time zone 'Asia/Shanghai')::date,
+    topic,
+    source,
+    language,
+    count(*),
+    count(*) filter (where is_cluster_head),
+    count(*) filter (where title_zh is not null)
+  from new_rows
+  group by 1, 2, 3, 4
+  on conflict (day, topic, source, language) do update
+  set items = r.items + excluded.items,
+      cluster_heads = r.cluster_heads + excluded.cluster_heads,
+      translated = r.translated + excluded.translated;
+  return null;
+end;
+$$;
+
+create or replace function public.news_daily_rollup_update_trigger()
+returns trigger
+language plpgsql
+as $$
+begin
+  with moved as (
+    select o.id
+    from old_rows o
+    join new_rows n on n.id = o.id
+    where (o.published_at, o.topic, o.source, o.language, o.is_cluster_head, o.title_zh is null)
+      is distinct from (n.published_at, n.topic, n.source, n.language, n.is_cluster_head, n.title_zh is null)
+  ),
+  changed as (
+    select n.published_at, n.topic, n.source, n.language, n.is_cluster_head, n.title_zh, 1 as sign
+    from new_rows n
+    join moved m on m.id = n.id
+    union all
+    select o.published_at, o.topic, o.source, o.language, o.is_cluster_head, o.title_zh, -1 as sign
+    from old_rows o
+    join moved m on m.id = o.id
+  ),
+  grouped as (
+    select
+      (published_at at time zone 'Asia/Shanghai')::date as day,
+      topic,
+      source,
+      language,
+      sum(sign) as items,
+      coalesce(sum(sign) filter (where is_cluster_head), 0) as cluster_heads,
+      coalesce(sum(sign) filter (where title_zh is not null), 0) as translated
+    from changed
+    group by 1, 2, 3, 4
+  )
+  insert into public.news_daily_rollup as r (day, topic, source, language, items, cluster_heads, translated)
+  select day, topic, source, language, items, cluster_heads, translated
+  from grouped
+  where items <> 0 or cluster_heads <> 0 or translated <> 0
+  on conflict (day, topic, source, language) do update
+  set items = r.items + excluded.items,
+      cluster_heads = r.cluster_heads + excluded.cluster_heads,
+      translated = r.translated + excluded.translated;
+  return null;
+end;
+$$;
+
+create or replace function public.news_daily_rollup_delete_trigger()
+returns trigger
+language plpgsql
+as $$
+begin
+  insert into public.news_daily_rollup as r (day, topic, source, language, items, cluster_heads, translated)
+  select
+    (published_at at time zone 'Asia/Shanghai')::date,
+    topic,
+    source,
+    language,
+    -count(*),
+    -count(*) filter (where is_cluster_head),
+    -count(*) filter (where title_zh is not null)
+  from old_rows
+  group by 1, 2, 3, 4
+  on conflict (day, topic, source, language) do update
+  set items = r.items + excluded.items,
+      cluster_heads = r.cluster_heads + excluded.cluster_heads,
+      translated = r.translated + excluded.translated;
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_news_daily_rollup_insert on public.news_item;
+create trigger trg_news_daily_rollup_insert
+  after insert on public.news_item
+  referencing new table as new_rows
+  for each statement execute function public.news_daily_rollup_insert_trigger();
+
+drop trigger if exists trg_news_daily_rollup_update on public.news_item;
+create trigger trg_news_daily_rollup_update
+  after update on public.news_item
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function public.news_daily_rollup_update_trigger();
+
+drop trigger if exists trg_news_daily_rollup_delete on public.news_item;
+create trigger trg_news_daily_rollup_delete
+  after delete on public.news_item
+  referencing old table as old_rows
+  for each statement execute function public.news_daily_rollup_delete_trigger();
+
+-- Finished runs only: RUNNING rows are counted when they move to SUCCESS/FAILED, and rows
+-- inserted already finished (sync jobs) are counted on insert.
+create or replace function public.run_daily_rollup_trigger()
+returns trigger
+language plpgsql
+as $$
+declare
+  ms int;
+begin
+  if new.status not in ('SUCCESS', 'FAILED') then
+    return null;
+  end if;
+  if tg_op = 'UPDATE' and old.status in ('SUCCESS', 'FAILED') then
+    return null;
+  end if;
+
+  ms := greatest(0, coalesce(extract(epoch from (new.ended_at - new.started_at)) * 1000, 0))::int;
+  insert into public.run_daily_rollup as r (day, runs, succeeded, failed, total_ms, max_ms, fetched, inserted)
+  values (
+    (new.started_at at time zone 'Asia/Shanghai')::date,
+    1,
+    case when new.status = 'SUCCESS' then 1 else 0 end,
+    case when new.status = 'FAILED' then 1 else 0 end,
+    ms,
+    ms,
+    new.fetched_count,
+    new.output_count
+  )
+  on conflict (day) do update
+  set runs = r.runs + 1,
+      succeeded = r.succeeded + excluded.succeeded,
+      failed = r.failed + excluded.failed,
+      total_ms = r.total_ms + excluded.total_ms,
+      max_ms = greatest(r.max_ms, excluded.max_ms),
+      fetched = r.fetched + excluded.fetched,
+      inserted = r.inserted + excluded.inserted;
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_run_daily_rollup on public.run_log;
+create trigger trg_run_daily_rollup
+  after insert or update of status on public.run_log
+  for each row execute function public.run_daily_rollup_trigger();
+
+-- Backfill from existing rows.
+insert into public.news_daily_rollup (day, topic, source, language, items, cluster_heads, translated)
+select
+  (published_at at time zone 'Asia/Shanghai')::date,
+  topic,
+  source,
+  language,
+  count(*),
+  count(*) filter (where is_cluster_head),
+  count(*) filter (where title_zh is not null)
+from public.news_item
+group by 1, 2, 3, 4
+on conflict (day, topic, source, language) do update
+set items = excluded.items,
+    cluster_heads = excluded.cluster_heads,
+    translated = excluded.translated;
+
+insert into public.run_daily_rollup (day, runs, succeeded, failed, total_ms, max_ms, fetched, inserted)
+select
+  (started_at at time zone 'Asia/Shanghai')::date,
+  count(*),
+  count(*) filter (where status = 'SUCCESS'),
+  count(*) filter (where status = 'FAILED'),
+  coalesce(sum(greatest(0, extract(epoch from (ended_at - started_at)) * 1000)), 0)::bigint,
+  coalesce(max(greatest(0, extract(epoch from (ended_at - started_at)) * 1000)), 0)::int,
+  sum(fetched_count),
+  sum(output_count)
+from public.run_log
+where status in ('SUCCESS', 'FAILED')
+group by 1
+on conflict (day) do update
+set runs = excluded.runs,
+    succeeded = excluded.succeeded,
+    failed = excluded.failed,
+    total_ms = excluded.total_ms,
+    max_ms = excluded.max_ms,
+    fetched = excluded.fetched,
+    inserted = excluded.inserted;
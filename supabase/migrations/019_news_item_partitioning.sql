@@ -0,0 +1,399 @@
+-- news_item becomes a range-partitioned table with one partition per UTC month of
+-- published_at. Unique indexes on a partitioned table must include the partition key, so
+-- url/content_hash uniqueness moves to news_item_hash, a narrow registry that outlives the
+-- partitions: archived items still block re-ingestion. Partitions older than the retention
+-- window are copied into news_item_archive (lz4-compressed, no fingerprint columns) and
+-- dropped; news_item_all reads both.
+
+drop function if exists public.search_news_item(text, text[], timestamptz, boolean, int, int);
+
+drop index if exists public.uq_news_item_url;
+drop index if exists public.uq_news_item_content_hash;
+drop index if exists public.idx_news_item_published_at_desc;
+drop index if exists public.idx_news_item_language;
+drop index if exists public.idx_news_item_fingerprint_bands;
+drop index if exists public.idx_news_item_cluster_id;
+drop index if exists public.idx_news_item_search_tokens;
+drop index if exists public.idx_news_item_topic_published_id;
+drop index if exists public.idx_news_item_head_topic_published_id;
+
+alter table public.news_item rename to news_item_legacy;
+alter table public.news_item_legacy rename constraint news_item_pkey to news_item_legacy_pkey;
+
+create table public.news_item (
+  id uuid not null default gen_random_uuid(),
+  topic text not null,
+  title text not null,
+  url text not null,
+  source text not null,
+  published_at timestamptz not null,
+  content_hash text not null,
+  created_at timestamptz not null default now(),
+  language text not null default 'und',
+  summary text null,
+  title_zh text null,
+  summary_zh text null,
+  fingerprint text null,
+  fingerprint_bands text[] null,
+  cluster_id text null,
+  is_cluster_head boolean not null default true,
+  cluster_size int not null default 1,
+  search_tokens text[] generated always as (
+    public.news_search_tokens(
+      coalesce(title, '') || ' ' || coalesce(title_zh, '') || ' ' ||
+      coalesce(summary, '') || ' ' || coalesce(summary_zh, '') || ' ' || coalesce(source, '')
+    )
+  ) stored,
+  primary key (id, published_at)
+) partition by range (published_at);
+
+create table if not exists public.news_item_hash (
+  content_hash text primary key,
+  url text not null unique,
+  published_at timestamptz not null,
+  archived boolean not null default false
+);
+
+alter table public.news_item_hash enable row level security;
+
+-- Partitions are created by the table owner and keep RLS on with no policies of their own,
+-- so they are only reachable through news_item (or by the service role).
+create or replace function public.ensure_news_item_partition(p_month date)
+returns boolean
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  lo date := date_trunc('month', p_month)::date;
+  part text := 'news_item_p' || to_char(date_trunc('month', p_month), 'YYYYMM');
+begin
+  if to_regclass('public.' || part) is not null then
+    return false;
+  end if;
+  execute format(
+    'create table public.%I partition of public.news_item for values from (%L) to (%L)',
+    part,
+    lo::timestamp at time zone 'UTC',
+    (lo + interval '1 month')::timestamp at time zone 'UTC'
+  );
+  execute format('alter table public.%I enable row level security', part);
+  return true;
+exception
+  when duplicate_table then
+    return false;
+end;
+$$;
+
+revoke execute on function public.ensure_news_item_partition(date) from public, anon, authenticated;
+grant execute on function public.ensure_news_item_partition(date) to service_role;
+
+-- Every month with legacy rows, plus the trailing year and two months ahead.
+select public.ensure_news_item_partition(m)
+from (
+  select distinct date_trunc('month', published_at at time zone 'UTC')::date as m
+  from public.news_item_legacy
+  union
+  select generate_series(
+    date_trunc('month', now() at time zone 'UTC') - interval '12 months',
+    date_trunc('month', now() at time zone 'UTC') + interval '2 months',
+    interval '1 month'
+  )::date
+) months
+order by m;
+
+insert into public.news_item (
+  id, topic, title, url, source, published_at, content_hash, created_at, language, summary, title_zh, summary_zh,
+  fingerprint, fingerprint_bands, cluster_id, is_cluster_head, cluster_size
+)
+select
+  id, topic, title, url, source, published_at, content_hash, created_at, language, summary, title_zh, summary_zh,
+  fingerprint, fingerprint_bands, cluster_id, is_cluster_head, cluster_size
+from public.news_item_legacy;
+
+insert into public.news_item_hash (content_hash, url, published_at)
+select content_hash, url, published_at
+from public.news_item_legacy
+on conflict do nothing;
+
+drop table public.news_item_legacy;
+
+create index if not exists idx_news_item_id on public.news_item (id);
+create index if not exists idx_news_item_content_hash on public.news_item (content_hash);
+create index if not exists idx_news_item_language on public.news_item (language);
+create index if not exists idx_news_item_fingerprint_bands on public.news_item using gin (fingerprint_bands);
+create index if not exists idx_news_item_cluster_id on public.news_item (cluster_id);
+create index if not exists idx_news_item_search_tokens on public.news_item using gin (search_tokens);
+create index if not exists idx_news_item_topic_published_id
+  on public.news_item (topic, published_at desc, id desc);
+create index if not exists idx_news_item_head_topic_published_id
+  on public.news_item (topic, published_at desc, id desc)
+  where is_cluster_head;
+
+alter table public.news_item enable row level security;
+
+drop policy if exists news_item_select_anon on public.news_item;
+create policy news_item_select_anon
+on public.news_item
+for select
+to anon
+using (true);
+
+drop policy if exists news_item_select_authenticated on public.news_item;
+create policy news_item_select_authenticated
+on public.news_item
+for select
+to authenticated
+using (true);
+
+grant select on public.news_item to anon;
+grant all privileges on public.news_item to authenticated;
+
+-- Rollup triggers from 018 go last so the copy above is not counted twice. Statement-level
+-- triggers only fire for statements against news_item itself, so dropping or rewriting a
+-- partition leaves the rollups alone.
+create trigger trg_news_daily_rollup_insert
+  after insert on public.news_item
+  referencing new table as new_rows
+  for each statement execute function public.news_daily_rollup_insert_trigger();
+
+create trigger trg_news_daily_rollup_update
+  after update on public.news_item
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function public.news_daily_rollup_update_trigger();
+
+create trigger trg_news_daily_rollup_delete
+  after delete on public.news_item
+  referencing old table as old_rows
+  for each statement execute function public.news_daily_rollup_delete_trigger();
+
+create or replace function public.ingest_news_items(items jsonb)
+returns table (inserted_hash text)
+language plpgsql
+as $$
+declare
+  inserted text[];
+  touched text[];
+begin
+  perform public.ensure_news_item_partition(m)
+  from (
+    select distinct date_trunc('month', (r->>'published_at')::timestamptz at time zone 'UTC')::date as m
+    from jsonb_array_elements(items) as r
+    where r->>'published_at' is not null
+  ) months;
+
+  with src as (
+    select *
+    from jsonb_to_recordset(items) as r(
+      topic text,
+      title text,
+      title_zh text,
+      url text,
+      source text,
+      published_at timestamptz,
+      content_hash text,
+      language text,
+      summary text,
+      summary_zh text,
+      fingerprint text,
+      fingerprint_bands text[],
+      cluster_id text,
+      is_cluster_head boolean
+    )
+  ),
+  registered as (
+    insert into public.news_item_hash as h (content_hash, url, published_at)
+    select content_hash, url, published_at
+    from src
+    on conflict do nothing
+    returning h.content_hash, h.url
+  ),
+  ins as (
+    insert into public.news_item as n (
+      topic, title, title_zh, url, source, published_at, content_hash, language, summary, summary_zh,
+      fingerprint, fingerprint_bands, cluster_id, is_cluster_head
+    )
+    select distinct on (r.content_hash)
+      r.topic, r.title, r.title_zh, r.url, r.source, r.published_at, r.content_hash,
+      coalesce(r.language, 'und'), r.summary, r.summary_zh,
+      r.fingerprint, r.fingerprint_bands, coalesce(r.cluster_id, r.content_hash), coalesce(r.is_cluster_head, true)
+    from src r
+    join registered g on g.content_hash = r.content_hash and g.url = r.url
+    returning n.content_hash, n.cluster_id
+  )
+  select coalesce(array_agg(ins.content_hash), '{}'), coalesce(array_agg(distinct ins.cluster_id), '{}')
+  into inserted, touched
+  from ins;
+
+  update public.news_item h
+  set cluster_size = (select count(*) from public.news_item m where m.cluster_id = h.cluster_id)
+  where h.content_hash = any(touched)
+    and h.is_cluster_head;
+
+  return query select unnest(inserted);
+end;
+$$;
+
+create table if not exists public.news_item_archive (
+  id uuid primary key,
+  topic text not null,
+  title text not null,
+  url text not null,
+  source text not null,
+  published_at timestamptz not null,
+  content_hash text not null,
+  created_at timestamptz not null,
+  language text not null default 'und',
+  summary text null,
+  title_zh text null,
+  summary_zh text null,
+  cluster_id text null,
+  is_cluster_head boolean not null default true,
+  cluster_size int not null default 1,
+  search_tokens text[] generated always as (
+    public.news_search_tokens(
+      coalesce(title, '') || ' ' || coalesce(title_zh, '') || ' ' ||
+      coalesce(summary, '') || ' ' || coalesce(summary_zh, '') || ' ' || coalesce(source, '')
+    )
+  ) stored,
+  archived_at timestamptz not null default now()
+);
+
+-- A low toast_tuple_target makes Postgres compress ordinary-sized rows, not just >2 kB ones.
+alter table public.news_item_archive set (toast_tuple_target = 128);
+alter table public.news_item_archive alter column title set compression lz4;
+alter table public.news_item_archive alter column url set compression lz4;
+alter table public.news_item_archive alter column summary set compression lz4;
+alter table public.news_item_archive alter column title_zh set compression lz4;
+alter table public.news_item_archive alter column summary_zh set compression lz4;
+alter table public.news_item_archive alter column search_tokens set compression lz4;
+
+create index if not exists idx_news_item_archive_topic_published_id
+  on public.news_item_archive (topic, published_at desc, id desc);
+create index if not exists idx_news_item_archive_search_tokens
+  on public.news_item_archive using gin (search_tokens);
+
+alter table public.news_item_archive enable row level security;
+
+drop policy if exists news_item_archive_select_anon on public.news_item_archive;
+create policy news_item_archive_select_anon
+on public.news_item_archive
+for select
+to anon
+using (true);
+
+drop policy if exists news_item_archive_select_authenticated on public.news_item_archive;
+create policy news_item_archive_select_authenticated
+on public.news_item_archive
+for select
+to authenticated
+using (true);
+
+grant select on public.news_item_archive to anon, authenticated;
+
+-- The constant archived column lets the planner drop the archive branch outright when a
+-- query filters on "not archived".
+create or replace view public.news_item_all
+with (security_invoker = true) as
+select
+  id, topic, title, url, source, published_at, content_hash, created_at, language, summary, title_zh, summary_zh,
+  fingerprint, fingerprint_bands, cluster_id, is_cluster_head, cluster_size, search_tokens, false as archived
+from public.news_item
+union all
+select
+  id, topic, title, url, source, published_at, content_hash, created_at, language, summary, title_zh, summary_zh,
+  null::text, null::text[], cluster_id, is_cluster_head, cluster_size, search_tokens, true as archived
+from public.news_item_archive;
+
+grant select on public.news_item_all to anon, authenticated;
+
+create or replace function public.search_news_item(
+  p_topic text,
+  p_tokens text[],
+  p_since timestamptz default null,
+  p_collapse boolean default true,
+  p_limit int default 50,
+  p_offset int default 0,
+  p_archive boolean default false
+)
+returns setof public.news_item_all
+language sql
+stable
+as $$
+  select n.*
+  from public.news_item_all n
+  where n.topic = p_topic
+    and n.search_tokens @> p_tokens
+    and (p_since is null or n.published_at >= p_since)
+    and (not p_collapse or n.is_cluster_head)
+    and (p_archive or not n.archived)
+  order by
+    (
+      select count(*)
+      from unnest(p_tokens) as t(tok)
+      where t.tok = any(public.news_search_tokens(n.title || ' ' || coalesce(n.title_zh, '')))
+    ) desc,
+    n.published_at desc
+  limit greatest(p_limit, 1)
+  offset greatest(p_offset, 0);
+$$;
+
+-- Moves every monthly partition that ends on or before the start of the current UTC month
+-- minus p_keep_months into news_item_archive, then drops it. Also creates the next
+-- partitions ahead of time so ingest rarely has to.
+create or replace function public.archive_news_partitions(p_keep_months int)
+returns table (partition_name text, moved_rows bigint)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  cutoff date := (date_trunc('month', now() at time zone 'UTC') - make_interval(months => greatest(p_keep_months, 1)))::date;
+  part record;
+  moved bigint;
+begin
+  perform public.ensure_news_item_partition((date_trunc('month', now() at time zone 'UTC') + make_interval(months => i))::date)
+  from generate_series(0, 2) as i;
+
+  for part in
+    select c.relname
+    from pg_inherits i
+    join pg_class c on c.oid = i.inhrelid
+    where i.inhparent = 'public.news_item'::regclass
+      and c.relname ~ '^news_item_p[0-9]{6}$'
+      and to_date(substr(c.relname, 12), 'YYYYMM') < cutoff
+    order by c.relname
+  loop
+    execute format(
+      'insert into public.news_item_archive (
+         id, topic, title, url, source, published_at, content_hash, created_at, language, summary, title_zh,
+         summary_zh, cluster_id, is_cluster_head, cluster_size
+       )
+       select
+         id, topic, title, url, source, published_at, content_hash, created_at, language, summary, title_zh,
+         summary_zh, cluster_id, is_cluster_head, cluster_size
+       from public.%I
+       on conflict (id) do nothing',
+      part.relname
+    );
+    get diagnostics moved = row_count;
+
+    execute format(
+      'update public.news_item_hash h set archived = true from public.%I p where h.content_hash = p.content_hash',
+      part.relname
+    );
+    execute format('drop table public.%I', part.relname);
+
+    partition_name := part.relname;
+    moved_rows := moved;
+    return next;
+  end loop;
+end;
+$$;
+
+revoke execute on function public.archive_news_partitions(int) from public, anon, authenticated;
+grant execute on function public.archive_news_partitions(int) to service_role;
+
+-- Digests over archived news are cached separately from the default (live-only) ones.
+alter table public.ai_digest_job
+  add column if not exists include_archive boolean not null default false;
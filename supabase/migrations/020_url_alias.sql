@@ -0,0 +1,14 @@
+-- Google News redirect (news.google.com/rss/articles/<id>) -> publisher URL, filled by
+-- src/server/urlResolver.ts so each redirect is resolved over the network once.
+-- resolved_url is null when Google answered without a usable target; those rows are
+-- retried after a day.
+create table if not exists public.url_alias (
+  alias_url text primary key,
+  resolved_url text null,
+  method text not null check (method in ('redirect', 'batchexecute', 'failed')),
+  resolved_at timestamptz not null default now()
+);
+
+create index if not exists idx_url_alias_resolved_url on public.url_alias (resolved_url);
+
+alter table public.url_alias enable row level security;
@@ -0,0 +1,33 @@
+-- Tracked topics, read by src/server/topicRegistry.ts (cached for a minute per instance).
+-- Aliases are OR'd into merged RSS/GDELT queries and matched against fetched titles to
+-- route items back to topics, so adding a topic is an insert here rather than a deploy.
+create table if not exists public.topic_registry (
+  key text primary key check (key ~ '^[A-Z0-9_]+$'),
+  display_name text not null,
+  aliases text[] not null default '{}',
+  salience_keywords jsonb not null default '{}'::jsonb,
+  enabled boolean not null default true,
+  sort_order int not null default 0,
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now()
+);
+
+alter table public.topic_registry enable row level security;
+
+insert into public.topic_registry (key, display_name, aliases, salience_keywords, sort_order)
+values
+  (
+    'CATL',
+    '宁德时代',
+    array['宁德时代', 'CATL', 'Contemporary Amperex'],
+    '{"宁德时代": 2, "CATL": 2, "Contemporary Amperex": 2, "动力电池": 1, "储能": 1, "battery": 1, "energy storage": 1, "钠离子": 1.5, "sodium-ion": 1.5, "麒麟电池": 1.5, "神行": 1.5, "固态电池": 1.5, "solid-state": 1.5, "曾毓群": 1.5, "特斯拉": 0.5, "Tesla": 0.5}'::jsonb,
+    10
+  ),
+  (
+    'XIAOMI',
+    '小米',
+    array['小米', 'Xiaomi', 'SU7', 'YU7'],
+    '{"小米": 2, "Xiaomi": 2, "小米汽车": 1.5, "Xiaomi Auto": 1.5, "SU7": 1.5, "YU7": 1.5, "雷军": 1.5, "Lei Jun": 1.5, "澎湃": 1, "HyperOS": 1, "手机": 0.5, "smartphone": 0.5, "交付": 1, "deliveries": 1}'::jsonb,
+    20
+  )
+on conflict (key) do nothing;
@@ -0,0 +1,56 @@
+-- Lease on job_state so at most one ingest run (daily or micro-batch) is active at a time.
+-- The conditional update is the lock: a concurrent caller blocks on the row, then re-checks
+-- lease_until against the winner's commit and gets false. An expired lease (crashed run)
+-- can be taken over.
+alter table public.job_state
+  add column if not exists lease_owner text null,
+  add column if not exists lease_until timestamptz null;
+
+create or replace function public.acquire_job_lease(p_key text, p_owner text, p_ttl_seconds int)
+returns boolean
+language plpgsql
+as $$
+declare
+  v_acquired boolean;
+begin
+  insert into public.job_state (key) values (p_key) on conflict (key) do nothing;
+
+  update public.job_state
+  set lease_owner = p_owner,
+      lease_until = now() + make_interval(secs => greatest(p_ttl_seconds, 1)),
+      updated_at = now()
+  where key = p_key
+    and (lease_until is null or lease_until < now() or lease_owner = p_owner)
+  returning true into v_acquired;
+
+  return coalesce(v_acquired, false);
+end;
+$$;
+
+create or replace function public.release_job_lease(p_key text, p_owner text)
+returns void
+language sql
+as $$
+  update public.job_state
+  set lease_owner = null,
+      lease_until = null,
+      updated_at = now()
+  where key = p_key
+    and lease_owner = p_owner;
+$$;
+
+-- Per-source high-water marks (source_key from src/config/sources.ts): each scheduled run
+-- fetches a source from its own mark minus an overlap, so a source that failed catches up
+-- on the next run while the others stay small.
+create table if not exists public.source_watermark (
+  source_key text primary key,
+  label text not null,
+  high_water_at timestamptz not null,
+  updated_at timestamptz not null default now()
+);
+
+alter table public.source_watermark enable row level security;
+
+alter table public.run_span drop constraint if exists run_span_trace_kind_check;
+alter table public.run_span
+  add constraint run_span_trace_kind_check check (trace_kind in ('daily', 'micro', 'sync', 'ai_digest'));
@@ -0,0 +1,61 @@
+-- Search matches substrings again ("batt", "Xiao", single CJK characters), as the original
+-- ILIKE scan did; trigram GIN indexes on each searched column let Postgres answer the OR'd
+-- ILIKEs with a BitmapOr instead of a scan. search_tokens is kept for relevance ranking.
+
+create extension if not exists pg_trgm;
+
+create index if not exists idx_news_item_title_trgm on public.news_item using gin (title gin_trgm_ops);
+create index if not exists idx_news_item_title_zh_trgm on public.news_item using gin (title_zh gin_trgm_ops);
+create index if not exists idx_news_item_summary_trgm on public.news_item using gin (summary gin_trgm_ops);
+create index if not exists idx_news_item_summary_zh_trgm on public.news_item using gin (summary_zh gin_trgm_ops);
+create index if not exists idx_news_item_source_trgm on public.news_item using gin (source gin_trgm_ops);
+
+create index if not exists idx_news_item_archive_title_trgm on public.news_item_archive using gin (title gin_trgm_ops);
+create index if not exists idx_news_item_archive_title_zh_trgm on public.news_item_archive using gin (title_zh gin_trgm_ops);
+create index if not exists idx_news_item_archive_summary_trgm on public.news_item_archive using gin (summary gin_trgm_ops);
+create index if not exists idx_news_item_archive_summary_zh_trgm on public.news_item_archive using gin (summary_zh gin_trgm_ops);
+create index if not exists idx_news_item_archive_source_trgm on public.news_item_archive using gin (source gin_trgm_ops);
+
+drop function if exists public.search_news_item(text, text[], timestamptz, boolean, int, int, boolean);
+
+-- Same rows as the /news ILIKE filter, ordered by how many query tokens the title contains.
+create or replace function public.search_news_item(
+  p_topic text,
+  p_query text,
+  p_tokens text[] default '{}',
+  p_since timestamptz default null,
+  p_collapse boolean default true,
+  p_limit int default 50,
+  p_offset int default 0,
+  p_archive boolean default false
+)
+returns setof public.news_item_all
+language sql
+stable
+as $$
+  with pattern as (
+    select '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%' as p
+  )
+  select n.*
+  from public.news_item_all n, pattern
+  where n.topic = p_topic
+    and (
+      n.title ilike pattern.p
+      or n.title_zh ilike pattern.p
+      or n.summary ilike pattern.p
+      or n.summary_zh ilike pattern.p
+      or n.source ilike pattern.p
+    )
+    and (p_since is null or n.published_at >= p_since)
+    and (not p_collapse or n.is_cluster_head)
+    and (p_archive or not n.archived)
+  order by
+    (
+      select count(*)
+      from unnest(p_tokens) as t(tok)
+      where t.tok = any(public.news_search_tokens(n.title || ' ' || coalesce(n.title_zh, '')))
+    ) desc,
+    n.published_at desc
+  limit greatest(p_limit, 1)
+  offset greatest(p_offset, 0);
+$$;
@@ -0,0 +1,110 @@
+-- Re-heads clusters whose head was never stored, and backfills cluster_id for rows written
+-- before migration 008. Fingerprints for those rows are filled in by the daily cron
+-- (server/clustering backfillFingerprints), since they are computed in the app.
+
+update public.news_item set cluster_id = content_hash where cluster_id is null;
+
+-- Promotes the earliest member of each given cluster (all clusters when null) that has no
+-- head, and refreshes the promoted heads' cluster_size.
+create or replace function public.rehead_news_clusters(p_cluster_ids text[] default null)
+returns int
+language plpgsql
+as $$
+declare
+  promoted int;
+begin
+  with orphan as (
+    select distinct on (m.cluster_id) m.id, m.published_at
+    from public.news_item m
+    where (p_cluster_ids is null or m.cluster_id = any(p_cluster_ids))
+      and m.cluster_id is not null
+      and not exists (
+        select 1 from public.news_item h where h.cluster_id = m.cluster_id and h.is_cluster_head
+      )
+    order by m.cluster_id, m.published_at, m.id
+  )
+  update public.news_item p
+  set
+    is_cluster_head = true,
+    cluster_size = (select count(*) from public.news_item c where c.cluster_id = p.cluster_id)
+  from orphan
+  where p.id = orphan.id and p.published_at = orphan.published_at;
+
+  get diagnostics promoted = row_count;
+  return promoted;
+end;
+$$;
+
+select public.rehead_news_clusters(null);
+
+create or replace function public.ingest_news_items(items jsonb)
+returns table (inserted_hash text)
+language plpgsql
+as $$
+declare
+  inserted text[];
+  touched text[];
+begin
+  perform public.ensure_news_item_partition(m)
+  from (
+    select distinct date_trunc('month', (r->>'published_at')::timestamptz at time zone 'UTC')::date as m
+    from jsonb_array_elements(items) as r
+    where r->>'published_at' is not null
+  ) months;
+
+  with src as (
+    select *
+    from jsonb_to_recordset(items) as r(
+      topic text,
+      title text,
+      title_zh text,
+      url text,
+      source text,
+      published_at timestamptz,
+      content_hash text,
+      language text,
+      summary text,
+      summary_zh text,
+      fingerprint text,
+      fingerprint_bands text[],
+      cluster_id text,
+      is_cluster_head boolean
+    )
+  ),
+  registered as (
+    insert into public.news_item_hash as h (content_hash, url, published_at)
+    select content_hash, url, published_at
+    from src
+    on conflict do nothing
+    returning h.content_hash, h.url
+  ),
+  ins as (
+    insert into public.news_item as n (
+      topic, title, title_zh, url, source, published_at, content_hash, language, summary, summary_zh,
+      fingerprint, fingerprint_bands, cluster_id, is_cluster_head
+    )
+    select distinct on (r.content_hash)
+      r.topic, r.title, r.title_zh, r.url, r.source, r.published_at, r.content_hash,
+      coalesce(r.language, 'und'), r.summary, r.summary_zh,
+      r.fingerprint, r.fingerprint_bands, coalesce(r.cluster_id, r.content_hash), coalesce(r.is_cluster_head, true)
+    from src r
+    join registered g on g.content_hash = r.content_hash and g.url = r.url
+    returning n.content_hash, n.cluster_id
+  )
+  select coalesce(array_agg(ins.content_hash), '{}'), coalesce(array_agg(distinct ins.cluster_id), '{}')
+  into inserted, touched
+  from ins;
+
+  -- A follower can point at a head from the same batch whose insert was rejected (url or
+  -- hash already registered), which would leave the cluster hidden from collapsed lists.
+  perform public.rehead_news_clusters(touched);
+
+  -- keyed on cluster_id: a promoted head's content_hash is not its cluster's id
+  update public.news_item h
+  set cluster_size = (select count(*) from public.news_item m where m.cluster_id = h.cluster_id)
+  where h.cluster_id = any(touched)
+    and h.is_cluster_head;
+
+  return query select unnest(inserted);
+end;
+$$;
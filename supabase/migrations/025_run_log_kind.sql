@@ -0,0 +1,89 @@
+-- Breaks the run rollup out by run kind, so 144 micro-batches a day don't drown the daily
+-- run in /status, and takes a run's duration from stage_timings.total_ms when ended_at
+-- does not lie after started_at (cron runs used to write the time they started).
+
+alter table public.run_log add column if not exists kind text not null default 'daily';
+
+alter table public.run_log drop constraint if exists run_log_kind_check;
+alter table public.run_log add constraint run_log_kind_check check (kind in ('daily', 'micro', 'sync'));
+
+update public.run_log set kind = 'micro' where stage_timings->>'mode' = 'micro';
+update public.run_log r
+set kind = 'sync'
+from public.sync_job j
+where r.kind = 'daily'
+  and r.window_start = j.window_start
+  and r.window_end = j.window_end;
+
+alter table public.run_daily_rollup add column if not exists kind text not null default 'daily';
+alter table public.run_daily_rollup drop constraint if exists run_daily_rollup_pkey;
+alter table public.run_daily_rollup add primary key (day, kind);
+
+create or replace function public.run_duration_ms(r public.run_log)
+returns int
+language sql
+immutable
+as $$
+  select greatest(
+    0,
+    coalesce(extract(epoch from (r.ended_at - r.started_at)) * 1000, 0),
+    coalesce((r.stage_timings->>'total_ms')::numeric, 0)
+  )::int;
+$$;
+
+create or replace function public.run_daily_rollup_trigger()
+returns trigger
+language plpgsql
+as $$
+declare
+  ms int;
+begin
+  if new.status not in ('SUCCESS', 'FAILED') then
+    return null;
+  end if;
+  if tg_op = 'UPDATE' and old.status in ('SUCCESS', 'FAILED') then
+    return null;
+  end if;
+
+  ms := public.run_duration_ms(new);
+  insert into public.run_daily_rollup as r (day, kind, runs, succeeded, failed, total_ms, max_ms, fetched, inserted)
+  values (
+    (new.started_at at time zone 'Asia/Shanghai')::date,
+    new.kind,
+    1,
+    case when new.status = 'SUCCESS' then 1 else 0 end,
+    case when new.status = 'FAILED' then 1 else 0 end,
+    ms,
+    ms,
+    new.fetched_count,
+    new.output_count
+  )
+  on conflict (day, kind) do update
+  set runs = r.runs + 1,
+      succeeded = r.succeeded + excluded.succeeded,
+      failed = r.failed + excluded.failed,
+      total_ms = r.total_ms + excluded.total_ms,
+      max_ms = greatest(r.max_ms, excluded.max_ms),
+      fetched = r.fetched + excluded.fetched,
+      inserted = r.inserted + excluded.inserted;
+  return null;
+end;
+$$;
+
+-- Rebuild from run_log with the kinds and durations above.
+delete from public.run_daily_rollup;
+
+insert into public.run_daily_rollup (day, kind, runs, succeeded, failed, total_ms, max_ms, fetched, inserted)
+select
+  (started_at at time zone 'Asia/Shanghai')::date,
+  kind,
+  count(*),
+  count(*) filter (where status = 'SUCCESS'),
+  count(*) filter (where status = 'FAILED'),
+  coalesce(sum(public.run_duration_ms(run_log)), 0)::bigint,
+  coalesce(max(public.run_duration_ms(run_log)), 0)::int,
+  sum(fetched_count),
+  sum(output_count)
+from public.run_log
+where status in ('SUCCESS', 'FAILED')
+group by 1, 2;
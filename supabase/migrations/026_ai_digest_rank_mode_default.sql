@@ -0,0 +1,3 @@
+-- LLM selection stays the default; hybrid/local are opt-in per job (rankMode) or through
+-- AI_DIGEST_RANK_MODE.
+alter table public.ai_digest_job alter column rank_mode set default 'llm';
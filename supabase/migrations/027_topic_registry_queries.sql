@@ -0,0 +1,14 @@
+-- Hand-tuned Google News queries per topic, fetched as single-topic sources next to the
+-- merged alias queries. Seeds the queries the built-in topics used before the registry.
+alter table public.topic_registry add column if not exists queries text[] not null default '{}';
+
+update public.topic_registry
+set queries = array['CATL battery OR CATL energy storage', '宁德时代 动力电池 OR 储能'],
+    updated_at = now()
+where key = 'CATL' and queries = '{}';
+
+update public.topic_registry
+set queries = array['小米 汽车 OR SU7 OR Xiaomi EV', 'Xiaomi smartphone OR Xiaomi Auto'],
+    aliases = case when '小米集团' = any(aliases) then aliases else array_append(aliases, '小米集团') end,
+    updated_at = now()
+where key = 'XIAOMI' and queries = '{}';
@@ -0,0 +1,41 @@
+-- A worker killed at the function time limit leaves its claimed jobs RUNNING. The claim
+-- also picks up RUNNING jobs started more than p_stale_seconds ago (longer than any
+-- invocation can live); each reclaim counts as an attempt, and a job that has already
+-- been reclaimed twice is failed instead of being retried forever.
+drop function if exists public.claim_ai_digest_jobs(int);
+
+create or replace function public.claim_ai_digest_jobs(p_limit int, p_stale_seconds int default 330)
+returns setof public.ai_digest_job
+language sql
+as $$
+  update public.ai_digest_job
+  set status = 'FAILED',
+      ended_at = now(),
+      updated_at = now(),
+      next_run_at = null,
+      error_message = 'AI 解读超时中断'
+  where status = 'RUNNING'
+    and started_at < now() - make_interval(secs => p_stale_seconds)
+    and attempt >= 2;
+
+  with picked as (
+    select id, status = 'RUNNING' as stale
+    from public.ai_digest_job
+    where (status = 'QUEUED' and (next_run_at is null or next_run_at <= now()))
+       or (status = 'RUNNING' and started_at < now() - make_interval(secs => p_stale_seconds))
+    order by created_at
+    limit greatest(p_limit, 1)
+    for update skip locked
+  )
+  update public.ai_digest_job j
+  set status = 'RUNNING',
+      started_at = now(),
+      updated_at = now(),
+      attempt = j.attempt + case when picked.stale then 1 else 0 end,
+      error_message = null
+  from picked
+  where j.id = picked.id
+  returning j.*;
+$$;
+
+create index if not exists idx_ai_digest_job_running on public.ai_digest_job (started_at) where status = 'RUNNING';
@@ -0,0 +1,485 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as _dt
+import glob
+import json
+import os
+import re
+import sys
+import urllib.parse
+import urllib.request
+from typing import Iterable, Iterator
+from zoneinfo import ZoneInfo
+
+from generate_project_design_docx import _para, write_docx_stream
+
+# Weekly analyst pack: a filtered slice of news_item plus stored ai_digest_job digests,
+# written as DOCX / CSV / JSONL. Rows are read one keyset page at a time and written to
+# every output before the next page is fetched, so memory does not grow with the slice.
+#
+#   python tools/export_news_pack.py --topic CATL --since 2026-10-05 --until 2026-10-12
+#   python tools/export_news_pack.py --topic XIAOMI --fixture path/to/news-pack-xiaomi-....jsonl
+#   python tools/export_news_pack.py --synthetic 200000 --formats docx
+#
+# Reads SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY from the environment (or .env.local).
+
+SHANGHAI = ZoneInfo("Asia/Shanghai")
+TOPIC_NAMES = {"CATL": "宁德时代", "XIAOMI": "小米"}
+NEWS_COLUMNS = [
+    "id",
+    "topic",
+    "published_at",
+    "source",
+    "title",
+    "title_zh",
+    "url",
+    "summary",
+    "summary_zh",
+    "language",
+    "cluster_size",
+]
+DIGEST_SECTIONS = [
+    ("majorChanges", "重要变化"),
+    ("bullish", "利多"),
+    ("bearish", "利空"),
+    ("watch", "关注事项"),
+]
+
+
+def _load_env_file(path: str) -> None:
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            k, v = line.split("=", 1)
+            os.environ.setdefault(k.strip(), v.strip().strip('"').strip("'"))
+
+
+def _parse_day(s: str) -> _dt.datetime:
+    return _dt.datetime.strptime(s, "%Y-%m-%d").replace(tzinfo=SHANGHAI)
+
+
+def _iso(dt: _dt.datetime) -> str:
+    return dt.astimezone(_dt.timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+# Same as sanitizeQuery in src/server/newsQuery.ts: LIKE wildcards and the escape character
+# become spaces, so --q is always a literal substring.
+def _sanitize_query(q: str) -> str:
+    return re.sub(r"[%_*\\]", " ", q).strip()[:80]
+
+
+# Same as ilikeValue in src/server/newsQuery.ts: double-quoted so commas, dots and
+# parentheses in the query don't break PostgREST's or=(...) syntax.
+def _ilike_value(q: str) -> str:
+    return '"%' + q.replace('"', '\\"') + '%"'
+
+
+def _fmt_time(iso: str) -> str:
+    try:
+        dt = _dt.datetime.fromisoformat(iso.replace("Z", "+00:00"))
+    except ValueError:
+        return iso
+    return dt.astimezone(SHANGHAI).strftime("%Y-%m-%d %H:%M")
+
+
+class Filters:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.topic: str = args.topic.upper()
+        self.until = _parse_day(args.until) if args.until else _dt.datetime.now(SHANGHAI).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) + _dt.timedelta(days=1)
+        self.since = _parse_day(args.since) if args.since else self.until - _dt.timedelta(days=7)
+        self.q: str = _sanitize_query(args.q)
+        self.collapse: bool = not args.all_reports
+        self.archive: bool = args.archive
+
+    def matches(self, row: dict) -> bool:
+        if row.get("topic") != self.topic:
+            return False
+        if self.collapse and row.get("is_cluster_head") is False:
+            return False
+        published = _dt.datetime.fromisoformat(str(row["published_at"]).replace("Z", "+00:00"))
+        if not (self.since <= published < self.until):
+            return False
+        if self.q:
+            q = self.q.lower()
+            hay = " ".join(str(row.get(k) or "") for k in ("title", "title_zh", "summary", "summary_zh", "source"))
+            return q in hay.lower()
+        return True
+
+
+class RestSource:
+    def __init__(self, url: str, key: str, page_size: int) -> None:
+        self.base = url.rstrip("/") + "/rest/v1/"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}", "Accept": "application/json"}
+        self.page_size = page_size
+
+    def _get(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        req = urllib.request.Request(self.base + table + "?" + urllib.parse.urlencode(params), headers=self.headers)
+        with urllib.request.urlopen(req, timeout=60) as res:
+            return json.load(res)
+
+    # Same (published_at, id) keyset as src/server/newsQuery.ts.
+    def news_pages(self, f: Filters) -> Iterator[list[dict]]:
+        table = "news_item_all" if f.archive else "news_item"
+        columns = NEWS_COLUMNS + ["archived"] if f.archive else NEWS_COLUMNS
+        base: list[tuple[str, str]] = [
+            ("select", ",".join(columns)),
+            ("topic", f"eq.{f.topic}"),
+            ("published_at", f"gte.{_iso(f.since)}"),
+            ("published_at", f"lt.{_iso(f.until)}"),
+            ("order", "published_at.desc,id.desc"),
+            ("limit", str(self.page_size)),
+        ]
+        if f.collapse:
+            base.append(("is_cluster_head", "is.true"))
+        like_clause = None
+        if f.q:
+            like = _ilike_value(f.q)
+            like_clause = ",".join(f"{c}.ilike.{like}" for c in ("title", "title_zh", "summary", "summary_zh", "source"))
+
+        cursor: dict | None = None
+        while True:
+            clauses = [like_clause] if like_clause else []
+            if cursor:
+                ts = f'"{cursor["published_at"]}"'
+                clauses.append(f'published_at.lt.{ts},and(published_at.eq.{ts},id.lt.{cursor["id"]})')
+            params = list(base)
+            if len(clauses) == 1:
+                params.append(("or", f"({clauses[0]})"))
+            elif clauses:
+                params.append(("and", "(" + ",".join(f"or({c})" for c in clauses) + ")"))
+            rows = self._get(table, params)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < self.page_size:
+                return
+            cursor = rows[-1]
+
+    def digests(self, f: Filters, limit: int) -> list[dict]:
+        return self._get(
+            "ai_digest_job",
+            [
+                ("select", "id,topic,days,q,created_at,candidate_count,candidate_fingerprint,digest"),
+                ("status", "eq.SUCCESS"),
+                ("topic", f"eq.{f.topic}"),
+                ("created_at", f"gte.{_iso(f.since)}"),
+                ("created_at", f"lt.{_iso(f.until)}"),
+                ("digest", "not.is.null"),
+                ("order", "created_at.desc"),
+                ("limit", str(max(limit * 10, 50))),
+            ],
+        )
+
+
+# Local fixture mode: a news pack JSONL as written by --formats jsonl (newest first), or a
+# directory holding one (or news_item.jsonl). Digests come from the pack's -digests.jsonl
+# sibling or DIR/ai_digest_job.jsonl. Read line by line with the same filters.
+class FixtureSource:
+    def __init__(self, path: str, page_size: int) -> None:
+        self.news_path, self.digests_path = self._resolve(path)
+        self.page_size = page_size
+
+    @staticmethod
+    def _resolve(path: str) -> tuple[str, str | None]:
+        if os.path.isfile(path):
+            news = path
+        elif os.path.isdir(path):
+            legacy = os.path.join(path, "news_item.jsonl")
+            packs = sorted(
+                p for p in glob.glob(os.path.join(path, "news-pack-*.jsonl")) if not p.endswith("-digests.jsonl")
+            )
+            if os.path.exists(legacy):
+                news = legacy
+            elif len(packs) == 1:
+                news = packs[0]
+            elif packs:
+                raise FileNotFoundError(f"{path} holds several news packs, pass one of them: {', '.join(packs)}")
+            else:
+                raise FileNotFoundError(f"no news_item.jsonl or news-pack-*.jsonl in {path}")
+        else:
+            raise FileNotFoundError(f"fixture not found: {path}")
+        candidates = [news.removesuffix(".jsonl") + "-digests.jsonl", os.path.join(os.path.dirname(news), "ai_digest_job.jsonl")]
+        return news, next((p for p in candidates if os.path.exists(p)), None)
+
+    @staticmethod
+    def _lines(path: str | None) -> Iterator[dict]:
+        if not path:
+            return
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+    def news_pages(self, f: Filters) -> Iterator[list[dict]]:
+        page: list[dict] = []
+        for row in self._lines(self.news_path):
+            if not f.matches(row) or (row.get("archived") and not f.archive):
+                continue
+            page.append(row)
+            if len(page) >= self.page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def digests(self, f: Filters, limit: int) -> list[dict]:
+        out = []
+        for row in self._lines(self.digests_path):
+            created = _dt.datetime.fromisoformat(str(row["created_at"]).replace("Z", "+00:00"))
+            if row.get("topic") == f.topic and row.get("digest") and f.since <= created < f.until:
+                out.append(row)
+        out.sort(key=lambda r: r["created_at"], reverse=True)
+        return out[: max(limit * 10, 50)]
+
+
+# Deterministic fake rows for checking throughput and memory at arbitrary volume.
+class SyntheticSource:
+    def __init__(self, count: int, page_size: int) -> None:
+        self.count = count
+        self.page_size = page_size
+
+    def news_pages(self, f: Filters) -> Iterator[list[dict]]:
+        span = (f.until - f.since).total_seconds()
+        step = span / max(self.count, 1)
+        for start in range(0, self.count, self.page_size):
+            page = []
+            for i in range(start, min(self.count, start + self.page_size)):
+                published = f.until - _dt.timedelta(seconds=step * (i + 1))
+                page.append(
+                    {
+                        "id": f"00000000-0000-4000-8000-{i:012d}",
+                        "topic": f.topic,
+                        "published_at": _iso(published),
+                        "source": f"source-{i % 37}",
+                        "title": f"Synthetic headline #{i} about {f.topic} battery orders & <markup>",
+                        "title_zh": f"合成标题 #{i}：{TOPIC_NAMES.get(f.topic, f.topic)} 订单与产能",
+                        "url": f"https://example.com/{f.topic.lower()}/{i}",
+                        "summary": "Lorem ipsum " * 12,
+                        "summary_zh": None,
+                        "language": "en",
+                        "cluster_size": 1 + i % 5,
+                    }
+                )
+            yield page
+
+    def digests(self, f: Filters, limit: int) -> list[dict]:
+        return []
+
+
+def _pick_digests(rows: list[dict], limit: int) -> list[dict]:
+    # Cache hits copy an earlier digest verbatim; keep one per candidate set.
+    seen: set[str] = set()
+    out: list[dict] = []
+    if limit <= 0:
+        return out
+    for row in rows:
+        key = row.get("candidate_fingerprint") or row["id"]
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(row)
+        if len(out) >= limit:
+            break
+    return out
+
+
+def _digest_paras(rows: list[dict]) -> Iterator[str]:
+    yield _para("AI 解读", bold=True, style="Heading1")
+    if not rows:
+        yield _para("本期没有已生成的 AI 解读。")
+        yield _para("")
+        return
+    for row in rows:
+        digest = row.get("digest") or {}
+        scope = "不限" if row.get("days") == "ALL" else f"最近 {row.get('days')} 天"
+        title = f"生成于 {_fmt_time(row['created_at'])}（{scope}"
+        title += f"，关键词：{row['q']}）" if row.get("q") else "）"
+        yield _para(title, bold=True, style="Heading2")
+        if digest.get("overall"):
+            yield _para(str(digest["overall"]))
+        for key, label in DIGEST_SECTIONS:
+            items = digest.get(key) or []
+            if not items:
+                continue
+            yield _para(f"{label}：", bold=True)
+            for it in items:
+                yield _para(f"- {it.get('title', '')}：{it.get('reason', '')}")
+                for url in it.get("urls") or []:
+                    yield _para(f"  {url}")
+        yield _para("")
+
+
+def _item_paras(row: dict) -> Iterator[str]:
+    title = (row.get("title_zh") or "").strip() or row.get("title") or ""
+    yield _para(title, bold=True)
+    if row.get("title_zh") and row["title_zh"].strip() != (row.get("title") or "").strip():
+        yield _para(row.get("title") or "")
+    meta = f"{row.get('source') or ''} · {_fmt_time(row['published_at'])}"
+    if (row.get("cluster_size") or 1) > 1:
+        meta += f" · {row['cluster_size']} 家媒体报道"
+    if row.get("archived"):
+        meta += " · 已归档"
+    yield _para(meta)
+    summary = (row.get("summary_zh") or "").strip() or (row.get("summary") or "").strip()
+    if summary:
+        yield _para(summary)
+    yield _para(row.get("url") or "")
+    yield _para("")
+
+
+class PackWriter:
+    """Fans each page out to the requested formats; DOCX chunks are yielded back to
+    write_docx_stream, CSV and JSONL rows go straight to their files."""
+
+    def __init__(self, out_dir: str, stem: str, formats: set[str]) -> None:
+        os.makedirs(out_dir, exist_ok=True)
+        self.paths: dict[str, str] = {}
+        self.count = 0
+        self._csv_file = None
+        self._csv = None
+        self._jsonl = None
+        if "csv" in formats:
+            self.paths["csv"] = os.path.join(out_dir, f"{stem}.csv")
+            # utf-8-sig so Excel opens the Chinese columns correctly.
+            self._csv_file = open(self.paths["csv"], "w", encoding="utf-8-sig", newline="")
+            self._csv = csv.writer(self._csv_file)
+            self._csv.writerow(NEWS_COLUMNS + ["archived"])
+        if "jsonl" in formats:
+            self.paths["jsonl"] = os.path.join(out_dir, f"{stem}.jsonl")
+            self._jsonl = open(self.paths["jsonl"], "w", encoding="utf-8")
+        if "docx" in formats:
+            self.paths["docx"] = os.path.join(out_dir, f"{stem}.docx")
+
+    def write_page(self, rows: list[dict]) -> None:
+        for row in rows:
+            if self._csv:
+                self._csv.writerow([row.get(c) if row.get(c) is not None else "" for c in NEWS_COLUMNS] + [bool(row.get("archived"))])
+            if self._jsonl:
+                self._jsonl.write(json.dumps(row, ensure_ascii=False))
+                self._jsonl.write("\n")
+        self.count += len(rows)
+
+    def write_digests(self, rows: list[dict]) -> None:
+        if "jsonl" not in self.paths:
+            return
+        path = self.paths["jsonl"].removesuffix(".jsonl") + "-digests.jsonl"
+        self.paths["digests"] = path
+        with open(path, "w", encoding="utf-8") as fh:
+            for row in rows:
+                fh.write(json.dumps(row, ensure_ascii=False))
+                fh.write("\n")
+
+    def close(self) -> None:
+        if self._csv_file:
+            self._csv_file.close()
+        if self._jsonl:
+            self._jsonl.close()
+
+
+def export(source, f: Filters, writer: PackWriter, max_digests: int) -> None:
+    digests = _pick_digests(source.digests(f, max_digests), max_digests)
+    writer.write_digests(digests)
+
+    def docx_chunks() -> Iterator[str]:
+        name = TOPIC_NAMES.get(f.topic, f.topic)
+        last_day = (f.until - _dt.timedelta(seconds=1)).strftime("%Y-%m-%d")
+        yield _para(f"{name} 资讯周报", bold=True, style="Heading1")
+        yield _para(f"时间范围：{f.since.strftime('%Y-%m-%d')} 至 {last_day}（北京时间）")
+        details = []
+        if f.q:
+            details.append(f"关键词：{f.q}")
+        details.append("相似报道已合并" if f.collapse else "包含全部相似报道")
+        if f.archive:
+            details.append("包含归档资讯")
+        yield _para("；".join(details))
+        yield _para("")
+        yield from _digest_paras(digests)
+        yield _para("资讯列表", bold=True, style="Heading1")
+        for page in source.news_pages(f):
+            writer.write_page(page)
+            yield "\n".join(p for row in page for p in _item_paras(row))
+        yield _para(f"共 {writer.count} 条。" if writer.count else "本期没有匹配的资讯。")
+
+    try:
+        if "docx" in writer.paths:
+            write_docx_stream(writer.paths["docx"], docx_chunks())
+        else:
+            for page in source.news_pages(f):
+                writer.write_page(page)
+    finally:
+        writer.close()
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource  # POSIX only
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    ap = argparse.ArgumentParser(description="Export a news_item slice and stored AI digests as an analyst pack.")
+    ap.add_argument("--topic", default="CATL")
+    ap.add_argument("--since", help="first day, YYYY-MM-DD (Asia/Shanghai); default until - 7 days")
+    ap.add_argument("--until", help="day after the last day, YYYY-MM-DD; default tomorrow")
+    ap.add_argument("--q", default="", help="substring filter on title/summary/source")
+    ap.add_argument("--all-reports", action="store_true", help="keep every report instead of one per cluster")
+    ap.add_argument("--archive", action="store_true", help="include archived partitions (news_item_all)")
+    ap.add_argument("--formats", default="docx,csv,jsonl")
+    ap.add_argument("--out-dir", default=os.path.join(root, "说明文件夹", "exports"))
+    ap.add_argument("--page-size", type=int, default=1000)
+    ap.add_argument("--max-digests", type=int, default=5)
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--fixture", metavar="PATH", help="read a news pack .jsonl (or a directory holding one) instead of the database")
+    mode.add_argument("--synthetic", type=int, metavar="N", help="export N generated rows, no database")
+    args = ap.parse_args(list(argv) if argv is not None else None)
+
+    formats = {s.strip() for s in args.formats.split(",") if s.strip()}
+    unknown = formats - {"docx", "csv", "jsonl"}
+    if unknown or not formats:
+        ap.error(f"unknown formats: {', '.join(sorted(unknown)) or '(none)'}")
+    page_size = max(1, min(1000, args.page_size))
+
+    f = Filters(args)
+    if args.fixture:
+        try:
+            source = FixtureSource(args.fixture, page_size)
+        except FileNotFoundError as e:
+            print(e, file=sys.stderr)
+            return 2
+    elif args.synthetic is not None:
+        source = SyntheticSource(max(0, args.synthetic), page_size)
+    else:
+        _load_env_file(os.path.join(root, ".env.local"))
+        url = os.environ.get("SUPABASE_URL", "").strip()
+        key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "").strip()
+        if not url or not key:
+            print("Missing env: SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY (or use --fixture / --synthetic)", file=sys.stderr)
+            return 2
+        source = RestSource(url, key, page_size)
+
+    stem = f"news-pack-{f.topic.lower()}-{f.since.strftime('%Y%m%d')}-{(f.until - _dt.timedelta(days=1)).strftime('%Y%m%d')}"
+    writer = PackWriter(args.out_dir, stem, formats)
+    export(source, f, writer, max(0, args.max_digests))
+
+    for kind, path in writer.paths.items():
+        print(f"{kind}: {path}")
+    peak = _peak_rss_mb()
+    print(f"items: {writer.count}, peak RSS: {f'{peak:.1f} MB' if peak is not None else 'n/a'}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@ from __future__ import annotations
 import datetime as _dt
 import os
 import zipfile
+from typing import Iterable
 
 
 def _xml_escape(s: str) -> str:
@@ -29,12 +30,15 @@ def _para(text: str, *, bold: bool = False, style: str | None = None) -> str:
     return f"<w:p>{ppr}<w:r>{rpr}{_w_t(text)}</w:r></w:p>"
 
 
-def _doc_xml(paras: list[str]) -> str:
-    body = "\n".join(paras) + '\n<w:p><w:r><w:t/></w:r></w:p>'
-    return f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+def _doc_head_xml() -> str:
+    return """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
   <w:body>
-    {body}
+"""
+
+
+def _doc_tail_xml() -> str:
+    return """<w:p><w:r><w:t/></w:r></w:p>
     <w:sectPr>
       <w:pgSz w:w="11906" w:h="16838"/>
       <w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" w:header="720" w:footer="720" w:gutter="0"/>
@@ -213,17 +217,29 @@ def build_content() -> list[str]:
     return paras
 
 
-def write_docx(output_path: str) -> None:
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    paras = build_content()
+# document.xml is written into the zip entry chunk by chunk, so `chunks` can be a
+# generator and the document never has to exist in memory as a whole.
+def write_docx_stream(output_path: str, chunks: Iterable[str]) -> None:
+    out_dir = os.path.dirname(output_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
     with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
         z.writestr("[Content_Types].xml", _content_types_xml())
         z.writestr("_rels/.rels", _rels_xml())
-        z.writestr("word/document.xml", _doc_xml(paras))
+        with z.open("word/document.xml", "w") as f:
+            f.write(_doc_head_xml().encode("utf-8"))
+            for chunk in chunks:
+                f.write(chunk.encode("utf-8"))
+                f.write(b"\n")
+            f.write(_doc_tail_xml().encode("utf-8"))
         z.writestr("word/styles.xml", _styles_xml())
         z.writestr("word/_rels/document.xml.rels", _document_rels_xml())
 
 
+def write_docx(output_path: str) -> None:
+    write_docx_stream(output_path, build_content())
+
+
 if __name__ == "__main__":
     root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     out = os.path.join(root, "说明文件夹", "项目设计.docx")